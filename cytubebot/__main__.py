@@ -1,4 +1,12 @@
-from cytubebot.main import main
+import sys
+
+from cytubebot.main import main, stats, worker
 
 if __name__ == "__main__":
-    main()
+    match sys.argv[1:2]:
+        case ["worker"]:
+            worker()
+        case ["stats"]:
+            stats()
+        case _:
+            main()
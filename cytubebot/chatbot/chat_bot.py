@@ -5,11 +5,13 @@ from datetime import datetime, timedelta
 from cytubebot.blackjack.blackjack_bot import BlackjackBot
 from cytubebot.chatbot.chat_processor import ChatProcessor
 from cytubebot.common.commands import Commands
+from cytubebot.common.database_wrapper import DatabaseWrapper
 from cytubebot.common.socket_wrapper import SocketWrapper
 
 REQUIRED_PERMISSION_LEVEL = 3
+ALREADY_QUEUED_ERROR = "This item is already on the playlist"
 ACCEPTABLE_ERRORS = [
-    "This item is already on the playlist",
+    ALREADY_QUEUED_ERROR,
     "Cannot add age restricted videos. See: https://github.com/calzoneman/sync/wiki/Frequently-Asked-Questions#why-dont-age-restricted-youtube-videos-work",
     "The uploader has made this video non-embeddable",
     "This video has not been processed yet.",
@@ -30,6 +32,7 @@ class ChatBot:
         self._password = password
 
         self._sio = SocketWrapper("", "")
+        self._db = DatabaseWrapper("", 0)
         self._chat_processor = ChatProcessor()
         self._blackjack_bot = BlackjackBot()
 
@@ -64,6 +67,7 @@ class ChatBot:
         def login(resp):
             logger.info(resp)
             self._sio.send_chat_msg("Hello!")
+            self._chat_processor.resume_content()
 
         @self._sio.on("userlist")
         def userlist(resp):
@@ -131,10 +135,27 @@ class ChatBot:
             else:
                 self._sio.send_chat_msg(f"{command} is not a valid command")
 
+        def mark_queued(items: list) -> None:
+            video_ids = [
+                item["media"]["id"]
+                for item in items
+                if item.get("media", {}).get("type") == "yt"
+            ]
+            try:
+                self._db.mark_queued(video_ids)
+            except Exception:
+                logger.exception(f"Failed to mark {video_ids} as queued.")
+
+        @self._sio.on("playlist")  # Full playlist, sent on joining the channel
+        def playlist(resp):
+            mark_queued(resp)
+
         @self._sio.on("queue")
         @self._sio.on("queueWarn")
         def queue(resp):
             logger.info(f"queue: {resp}")
+            if "item" in resp:
+                mark_queued([resp["item"]])
             self._sio.data.queue_err = False
             self._sio.data.queue_resp = resp
             self._sio.data.reset_backoff()
@@ -147,6 +168,8 @@ class ChatBot:
                 logger.debug(
                     f"Skipping '{resp['msg']}' due to being an acceptable error for {resp['id']}."
                 )
+                if resp["msg"] == ALREADY_QUEUED_ERROR and "id" in resp:
+                    mark_queued([{"media": {"id": resp["id"], "type": "yt"}}])
                 self._sio.data.queue_err = False
                 self._sio.data.queue_resp = resp
                 self._sio.data.reset_backoff()
@@ -1,17 +1,21 @@
 import logging
 import os
 import re
+from collections import Counter
 from datetime import datetime
 from typing import List
 
-import requests
 from bs4 import BeautifulSoup as bs
 
 from cytubebot.common.commands import Commands
 from cytubebot.common.database_wrapper import DatabaseWrapper
 from cytubebot.common.exceptions import InvalidTagError
+from cytubebot.common.last_update_buffer import LAST_UPDATE_BATCH_SIZE, LastUpdateBuffer
+from cytubebot.common.request_guard import RequestGuard
 from cytubebot.common.socket_wrapper import SocketWrapper
+from cytubebot.content_searchers.channel_health import ChannelHealth
 from cytubebot.content_searchers.content_finder import ContentFinder
+from cytubebot.content_searchers.discovery_stats import DiscoveryStats
 from cytubebot.content_searchers.random_finder import RandomFinder
 
 VALID_TAGS: List = os.environ.get("VALID_TAGS", "").split()
@@ -30,6 +34,10 @@ class ChatProcessor:
         self._db = DatabaseWrapper("", 0)
         self._random_finder = RandomFinder()
         self._content_finder = ContentFinder()
+        self._channel_health = ChannelHealth()
+        self._discovery_stats = DiscoveryStats()
+        self._last_updates = LastUpdateBuffer()
+        self._guard = RequestGuard()
 
     def process_chat_command(self, command, args, allow_force=False) -> None:
         if self._sio.data.lock and not (allow_force and args and args[0] == "--force"):
@@ -48,12 +56,15 @@ class ChatProcessor:
     def _process_command(self, command, args) -> None:
         match command:
             case "content":
-                tag = args[0].upper() if args else None
-                self._handle_content(tag)
+                self._handle_content_command(args)
             case "random" | "random_word":
                 self._handle_random(command, args)
             case "current":
                 self._handle_current()
+            case "failing":
+                self._sio.send_chat_msg(self._channel_health.report())
+            case "stats":
+                self._sio.send_chat_msg(self._discovery_stats.report())
             case "add":
                 self._handle_add_user(args)
             case "remove":
@@ -80,7 +91,7 @@ class ChatProcessor:
 
             video_id = curr["id"]
             url = f"https://www.youtube.com/watch?v={video_id}"
-            resp = requests.get(url, timeout=60)
+            resp = self._guard.get(url, timeout=60)
             resp.raise_for_status()
 
             soup = bs(resp.text, "lxml")
@@ -125,28 +136,160 @@ class ChatProcessor:
         )
         self._sio.send_chat_msg(msg)
 
-    def _handle_content(self, tag) -> None:
-        self._sio.send_chat_msg("Searching for content...")
+    def _handle_content_command(self, args: list) -> None:
+        """
+        Parses `content [TAG] [--within DURATION] [--force]`, where the
+        duration is in seconds, or minutes with an "m" suffix e.g. 20s or 2m.
+        """
+        tag = None
+        within = None
+        args = [arg for arg in args if arg != "--force"]
+        try:
+            if "--within" in args:
+                index = args.index("--within")
+                within = self._parse_duration(args[index + 1])
+                del args[index : index + 2]
+        except (IndexError, ValueError):
+            self._sio.send_chat_msg("Usage: content [TAG] [--within 20s]")
+            return
 
-        content = self._content_finder.find_content(tag)
+        if args:
+            tag = args[0].upper()
+        self._handle_content(tag, within)
+
+    def _parse_duration(self, duration: str) -> float:
+        match = re.fullmatch(r"(\d+(?:\.\d+)?)([sm]?)", duration.lower())
+        if not match:
+            raise ValueError(f"Invalid duration: {duration}")
+        seconds = float(match.group(1))
+        return seconds * 60 if match.group(2) == "m" else seconds
+
+    def _handle_content(self, tag, within: float | None = None) -> None:
+        # Journal entries whose last_update hasn't been written yet, held for
+        # the whole run so the writes are batched across every video.
+        entries: list[str] = []
+        try:
+            self._queue_content(tag, within, entries)
+        finally:
+            # Keeps the videos queued before an interruption from being resumed.
+            self._flush_journal(entries)
+
+    def _queue_content(self, tag, within: float | None, entries: list[str]) -> None:
+        resumed = self._db.recover_journal()
+        if resumed:
+            self._sio.send_chat_msg(
+                f"Resuming {resumed} videos left over from an interrupted run."
+            )
+        counts = self._drain_journal(entries)
+
+        pending = self._content_finder.take_pending_content(tag)
+        if pending is None:
+            self._sio.send_chat_msg("Searching for content, adding videos as found...")
+            # Discovery journals each video as it's found, so a restart doesn't
+            # lose it, the journal is drained as they arrive.
+            for _ in self._content_finder.iter_content(
+                tag, within=within, journal=True
+            ):
+                counts.update(self._drain_journal(entries))
+
+            failed = self._content_finder.failed_channels
+            if failed:
+                self._sio.send_chat_msg(
+                    f"Failed to check {len(failed)} channels: {', '.join(failed[:5])}"
+                    + (" ..." if len(failed) > 5 else "")
+                )
+            unreached = self._content_finder.unreached_channels
+            if not self._content_finder.scan_complete:
+                self._sio.send_chat_msg(
+                    f"Ran out of time before listing every channel, {len(unreached)} "
+                    "listed channels and the rest will be checked next run."
+                )
+            elif unreached:
+                self._sio.send_chat_msg(
+                    f"Ran out of time, {len(unreached)} channels will be checked "
+                    "next run."
+                )
+        elif pending:
+            self._sio.send_chat_msg(f"Adding {len(pending)} videos.")
+            self._db.push_journal(pending)
+            counts.update(self._drain_journal(entries))
+
+        skipped = counts["skipped"]
+        already_queued = f" ({skipped} already on the playlist)" if skipped else ""
+        if counts["added"] == 0:
+            self._sio.send_chat_msg(f"No content to add{already_queued}.")
+            return
 
-        if len(content) == 0:
-            self._sio.send_chat_msg("No content to add.")
+        self._sio.send_chat_msg(
+            f"Finished adding {counts['added']} videos{already_queued}."
+        )
+
+    def resume_content(self) -> None:
+        """
+        Finishes queueing the videos a run interrupted by a restart or
+        disconnect left in the content journal.
+        """
+        if self._sio.data.lock:
             return
 
-        self._sio.send_chat_msg(f"Adding {len(content)} videos.")
+        self._sio.data.lock = True
+        entries: list[str] = []
+        try:
+            resumed = self._db.recover_journal()
+            if resumed:
+                logger.info(f"Resuming {resumed} journaled videos.")
+                try:
+                    counts = self._drain_journal(entries)
+                finally:
+                    self._flush_journal(entries)
+                self._sio.send_chat_msg(
+                    f"Resumed adding {counts['added']} videos from an interrupted run."
+                )
+        except Exception:
+            logger.exception("Failed to resume the content journal.")
+        finally:
+            self._sio.data.lock = False
+
+    def _drain_journal(self, entries: list[str]) -> Counter[str]:
+        """
+        Queues every video in the content journal, adding each one's entry to
+        `entries` once it's queued. The entries are acknowledged, after their
+        channels' last_update is written, every LAST_UPDATE_BATCH_SIZE videos;
+        the caller flushes whatever is left once its run is over.
 
-        for video in content:
+        Returns:
+            The number of videos "added" and "skipped" as already queued.
+        """
+        counts: Counter[str] = Counter()
+        while (taken := self._db.take_journal()) is not None:
+            entry, video = taken
             logger.debug(f"Processing {video}")
 
-            channel_id = video["channel_id"]
-            new_dt = video["datetime"]
             video_id = video["video_id"]
+            # CyTube would only refuse it, skip the round trip.
+            if self._db.is_queued(video_id):
+                logger.info(f"Skipping {video_id}, it's already on the playlist.")
+                counts["skipped"] += 1
+            else:
+                self._sio.add_video_to_queue(video_id)
+                counts["added"] += 1
 
-            self._sio.add_video_to_queue(video_id)
-            self._db.update_datetime(channel_id, str(new_dt))
+            self._last_updates.record(video["channel_id"], video["datetime"])
+            entries.append(entry)
+            if len(entries) >= LAST_UPDATE_BATCH_SIZE:
+                self._flush_journal(entries)
+        return counts
 
-        self._sio.send_chat_msg("Finished adding content.")
+    def _flush_journal(self, entries: list[str]) -> None:
+        """
+        Writes the buffered last_updates, then acknowledges the journal entries
+        they came from.
+        """
+        if not entries:
+            return
+        self._last_updates.flush()
+        self._db.ack_journal(*entries)
+        entries.clear()
 
     def _handle_add_christmas_videos(self) -> None:
         now = datetime.now()
@@ -177,7 +320,11 @@ class ChatProcessor:
 
             rand_id, search_str = self._random_finder.find_random(size)
 
-        if rand_id:
+        if rand_id and self._db.is_queued(rand_id):
+            self._sio.send_chat_msg(
+                f"Searched: {search_str}, but {rand_id} is already on the playlist."
+            )
+        elif rand_id:
             self._sio.add_video_to_queue(rand_id)
             self._sio.send_chat_msg(f"Searched: {search_str}, added: {rand_id}")
         else:
@@ -215,7 +362,7 @@ class ChatProcessor:
 
         def fetch_data(url: str, pattern: str) -> str | None:
             try:
-                resp = requests.get(url, cookies=cookies, timeout=timeout)
+                resp = self._guard.get(url, cookies=cookies, timeout=timeout)
                 soup = bs(resp.text, "lxml")
                 script_tag = soup.find("script", string=re.compile("ytInitialData"))
                 if script_tag:
@@ -227,6 +374,7 @@ class ChatProcessor:
             return None
 
         channel_id: str | None = ""
+        handle: str | None = None
         candidate_urls: List[str] = [
             f"https://www.youtube.com/@{channel_name}",
             f"https://www.youtube.com/c/{channel_name}",
@@ -235,6 +383,8 @@ class ChatProcessor:
         for url in candidate_urls:
             channel_id = fetch_data(url, id_pattern)
             if channel_id:
+                if "/@" in url:
+                    handle = channel_name
                 msg = (
                     f"Found channel ID: {channel_id} for {channel_name}, adding to DB."
                 )
@@ -263,7 +413,7 @@ class ChatProcessor:
                 self._sio.send_chat_msg(msg)
                 return
 
-        self._db.add_channel(channel_id, channel_name)
+        self._db.add_channel(channel_id, channel_name, handle)
 
     def _cleanse_yt_crap(self, channel_name_or_url: str) -> str:
         if "</a>" in channel_name_or_url:
@@ -0,0 +1,262 @@
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import AsyncIterator
+
+import redis.asyncio as aredis
+from cytubebot.common.database_wrapper import (
+    CHANNEL_PAGE_SIZE,
+    FAILURES_KEY,
+    HANDLES_KEY,
+    NAMES_KEY,
+    QUEUED_KEY,
+    QUEUED_VIDEO_TTL,
+    REDIS_RETRIES,
+    UPDATE_DATETIMES_SCRIPT,
+    RedisSchema,
+    connection_kwargs,
+)
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabaseWrapper(RedisSchema):
+    """
+    The DatabaseWrapper API used by content discovery, on a redis.asyncio
+    client, for components running on an event loop. It shares the sync
+    wrapper's keys and encodings and pool settings, see connection_kwargs.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    # Instance variable annotations for Mypy
+    _host: str
+    _port: int
+    _redis: aredis.Redis
+
+    def __new__(cls, host: str, port: int):
+        if cls._instance is None:
+            with cls._lock:
+                instance = super().__new__(cls)
+                instance._host = host
+                instance._port = port
+                # Connections are only opened once used on the event loop.
+                pool = aredis.BlockingConnectionPool(
+                    **connection_kwargs(host, port),
+                    retry=Retry(ExponentialBackoff(), REDIS_RETRIES),
+                )
+                instance._redis = aredis.Redis(connection_pool=pool)
+                cls._instance = instance
+        return cls._instance
+
+    async def close(self) -> None:
+        logger.info("Closing async Redis connection.")
+        # The client doesn't own the pool, so closing it leaves the pool open.
+        await self._redis.connection_pool.disconnect()
+
+    async def get_channel(self, channel_id: str) -> dict:
+        """
+        Returns the channel's data, or an empty dict if it isn't in the DB.
+        """
+        return self._load_channel(await self._redis.hgetall(self._make_key(channel_id)))
+
+    async def get_channel_id(self, name: str) -> str | None:
+        """
+        Returns the ID of the channel with the name or handle (with or without
+        the @), ignoring case, or None if there isn't one.
+        """
+        name = self._normalise_name(name)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.hget(NAMES_KEY, name)
+            pipe.hget(HANDLES_KEY, name)
+            by_name, by_handle = await pipe.execute()
+        return by_name or by_handle
+
+    async def get_channels_by_id(
+        self,
+        channel_ids: list[str],
+        fields: tuple[str, ...] | None = None,
+        page_size: int = CHANNEL_PAGE_SIZE,
+    ) -> dict[str, dict]:
+        """
+        Returns channel ID -> the channel's data (only the given `fields`, if
+        any) for the channels that are in the DB, reading `page_size` channels
+        per round trip.
+        """
+        channels: dict[str, dict] = {}
+        for start in range(0, len(channel_ids), page_size):
+            channels.update(
+                await self._read_channels(
+                    channel_ids[start : start + page_size], fields
+                )
+            )
+        return channels
+
+    async def _read_channels(
+        self, channel_ids: list[str], fields: tuple[str, ...] | None = None
+    ) -> dict[str, dict]:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for channel_id in channel_ids:
+                if fields is None:
+                    pipe.hgetall(self._make_key(channel_id))
+                else:
+                    pipe.hmget(self._make_key(channel_id), fields)
+            results = await pipe.execute()
+
+        channels = {}
+        for channel_id, values in zip(channel_ids, results):
+            if fields is not None:
+                values = {
+                    field: value
+                    for field, value in zip(fields, values)
+                    if value is not None
+                }
+            if values:
+                channels[channel_id] = self._load_channel(values)
+        return channels
+
+    async def iter_channels(
+        self,
+        tag: str | None = None,
+        fields: tuple[str, ...] | None = None,
+        page_size: int = CHANNEL_PAGE_SIZE,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Yields all (or all tagged) channels an SSCAN page at a time, see
+        DatabaseWrapper.iter_channels.
+        """
+        key = self._make_index_key(tag)
+        seen: set[str] = set()
+        cursor = None
+        while cursor != 0:
+            cursor, channel_ids = await self._redis.sscan(
+                key, cursor or 0, count=page_size
+            )
+            page = [channel_id for channel_id in channel_ids if channel_id not in seen]
+            seen.update(page)
+            batch = list((await self._read_channels(page, fields)).values())
+            if batch:
+                yield batch
+
+    async def update_datetimes(
+        self, last_updates: dict[str, datetime], uploads: dict[str, int] | None = None
+    ) -> int:
+        """
+        Atomically moves each channel's last_update forwards in one round trip,
+        see DatabaseWrapper.update_datetimes.
+
+        Returns:
+            The number of channels updated.
+        """
+        if not last_updates:
+            return 0
+        return await self._redis.eval(
+            UPDATE_DATETIMES_SCRIPT, *self._update_datetimes_args(last_updates, uploads)
+        )
+
+    async def get_feed_validators(self, channel_id: str) -> dict:
+        return await self._redis.hgetall(self._make_feed_key(channel_id))
+
+    async def set_feed_validators(self, channel_id: str, validators: dict) -> None:
+        key = self._make_feed_key(channel_id)
+        validators = {k: v for k, v in validators.items() if v}
+        async with self._redis.pipeline() as pipe:
+            pipe.delete(key)
+            if validators:
+                pipe.hset(key, mapping=validators)
+            await pipe.execute()
+
+    async def get_short_verdict(self, video_id: str) -> bool | None:
+        verdict = await self._redis.get(self._make_short_key(video_id))
+        if verdict is None:
+            return None
+        return verdict == "1"
+
+    async def set_short_verdict(self, video_id: str, is_short: bool, ttl: int) -> None:
+        await self._redis.set(
+            self._make_short_key(video_id), "1" if is_short else "0", ex=ttl or None
+        )
+
+    async def add_pending_content(
+        self, tag: str | None, content: list[dict], max_age: int
+    ) -> None:
+        """
+        Appends to the list of videos waiting to be queued for the tag (None
+        for all channels), keeping the list for at least `max_age` seconds.
+        """
+        key = self._make_pending_key(tag)
+        async with self._redis.pipeline() as pipe:
+            if content:
+                pipe.rpush(key, *[self._dump_video(video) for video in content])
+            pipe.set(f"{key}.refreshed", datetime.now().isoformat(), ex=max_age)
+            pipe.expire(key, max_age)
+            await pipe.execute()
+        logger.info(f"Added {len(content)} pending videos to {key}")
+
+    async def pop_pending_content(self, tag: str | None) -> list[dict] | None:
+        """
+        Atomically takes the list of videos waiting to be queued for the tag,
+        or None if nothing is maintaining a list for it.
+        """
+        key = self._make_pending_key(tag)
+        async with self._redis.pipeline() as pipe:
+            pipe.get(f"{key}.refreshed")
+            pipe.lrange(key, 0, -1)
+            pipe.delete(key)
+            refreshed, items, _ = await pipe.execute()
+        if refreshed is None:
+            return None
+        return [self._load_video(item) for item in items]
+
+    async def get_channel_failures(
+        self, channel_ids: list[str] | None = None
+    ) -> dict[str, dict]:
+        if channel_ids is None:
+            items = list((await self._redis.hgetall(FAILURES_KEY)).items())
+        elif channel_ids:
+            items = list(
+                zip(channel_ids, await self._redis.hmget(FAILURES_KEY, channel_ids))
+            )
+        else:
+            return {}
+        return {
+            channel_id: json.loads(record) for channel_id, record in items if record
+        }
+
+    async def set_channel_failures(self, failures: dict[str, dict]) -> None:
+        if failures:
+            await self._redis.hset(
+                FAILURES_KEY,
+                mapping={
+                    channel_id: json.dumps(record)
+                    for channel_id, record in failures.items()
+                },
+            )
+
+    async def clear_channel_failures(self, channel_ids: list[str]) -> None:
+        if channel_ids:
+            await self._redis.hdel(FAILURES_KEY, *channel_ids)
+
+    async def mark_queued(
+        self, video_ids: list[str], ttl: int = QUEUED_VIDEO_TTL
+    ) -> None:
+        if not video_ids:
+            return
+        now = time.time()
+        async with self._redis.pipeline() as pipe:
+            pipe.zadd(QUEUED_KEY, {video_id: now + ttl for video_id in video_ids})
+            pipe.zremrangebyscore(QUEUED_KEY, "-inf", now)
+            await pipe.execute()
+
+    async def is_queued(self, video_id: str) -> bool:
+        expires = await self._redis.zscore(QUEUED_KEY, video_id)
+        return expires is not None and expires > time.time()
+
+    @property
+    def connection(self) -> aredis.Redis:
+        return self._redis
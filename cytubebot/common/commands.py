@@ -10,14 +10,16 @@ class Commands(Enum):
     ADMIN_COMMANDS = {
         "add": "Add channel to database, use channel username, ID, or URL.",
         "add_tags": "Add tags to an existing channel. Usage: `add_tags CHANNEL_ID TAG1 TAG2`",
-        "content": "Finds new content from all channels or tagged channels. Usage: `content` or `content TAG`",
+        "content": "Finds new content from all channels or tagged channels. Usage: `content` or `content TAG`, add `--within 20s` to stop searching after 20 seconds",
         "current": "",
+        "failing": "Lists channels that keep failing to be checked. Usage: `failing`",
         "christmas": "",
         "kill": "Kills the chat bot and the DB. Usage: `kill`",
         "random": "",
         "random_word": "",
         "remove": "",
         "remove_tags": "",
+        "stats": "Shows the latest content search's timings and slowest channels. Usage: `stats`",
         "xmas": "",
     }
 
@@ -1,16 +1,230 @@
 import json
 import logging
+import os
 import threading
+import time
+from datetime import datetime
+from typing import Callable, Iterator
 
 import requests
-from bs4 import BeautifulSoup as bs
+from lxml import etree
 
 import redis
+from cytubebot.common.request_guard import RequestGuard
+from cytubebot.content_searchers.feed_parser import iter_entries, parse_timestamp
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
 
+# Connection pool settings, for the sync and async clients alike. Callers wait
+# up to REDIS_POOL_TIMEOUT seconds for a free connection once all are in use.
+REDIS_MAX_CONNECTIONS = int(os.environ.get("REDIS_MAX_CONNECTIONS", 32))
+REDIS_POOL_TIMEOUT = int(os.environ.get("REDIS_POOL_TIMEOUT", 20))
+REDIS_SOCKET_KEEPALIVE = os.environ.get("REDIS_SOCKET_KEEPALIVE", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# Idle connections are pinged before reuse after this many seconds, so a
+# Redis restart doesn't fail the next command.
+REDIS_HEALTH_CHECK_INTERVAL = int(os.environ.get("REDIS_HEALTH_CHECK_INTERVAL", 30))
+REDIS_RETRY_ON_TIMEOUT = os.environ.get("REDIS_RETRY_ON_TIMEOUT", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+REDIS_RETRIES = int(os.environ.get("REDIS_RETRIES", 3))
+# Weight of the newest gap in a channel's moving average upload interval.
+UPLOAD_INTERVAL_SMOOTHING = 0.3
+SCHEDULE_KEY = "due@youtube.channel.schedule"
+# Channels read per page.
+CHANNEL_PAGE_SIZE = int(os.environ.get("CHANNEL_PAGE_SIZE", 500))
+# Channel hash fields stored as JSON, the rest are plain strings.
+CHANNEL_JSON_FIELDS = ("tags", "upload_interval")
+# Channels were stored as JSON strings under these keys before being moved to
+# hashes, see migrate_channels.
+LEGACY_CHANNEL_PATTERN = "*@youtube.channel.id"
+# Normalised channel name or handle -> channel ID, see _normalise_name.
+NAMES_KEY = "names@youtube.channel.lookup"
+HANDLES_KEY = "handles@youtube.channel.lookup"
+# Video ID -> unix timestamp it's forgotten at, for videos queued on CyTube.
+QUEUED_KEY = "videos@cytube.queued"
+QUEUED_VIDEO_TTL = int(os.environ.get("QUEUED_VIDEO_TTL", 6 * 60 * 60))
+# Discovered videos waiting to be queued, and the ones being queued right now.
+JOURNAL_KEY = "queue@content.journal"
+JOURNAL_INFLIGHT_KEY = "inflight@content.journal"
+# Channel ID -> JSON record of the channel's consecutive feed failures.
+FAILURES_KEY = "failures@youtube.channel"
+# Summaries of the latest discovery runs, newest first.
+RUNS_KEY = "runs@discovery.stats"
+# Discovery worker ID -> unix timestamp of its latest heartbeat.
+WORKERS_KEY = "workers@discovery"
+# Shard -> unix timestamp it was last discovered at.
+SHARD_RUNS_KEY = "runs@discovery.shard"
+# Only touches the lease while it's still held by the caller.
+RENEW_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+# KEYS are channel hashes, ARGV their new last_update, then the number of
+# uploads each covers, then the smoothing. Only moves a channel's last_update
+# forwards, comparing the instants so "T" or " " separated timestamps and any
+# UTC offset compare correctly.
+UPDATE_DATETIMES_SCRIPT = """
+local function to_epoch(ts)
+    local y, mo, d, h, mi, s, zone = string.match(
+        ts, "^(%d+)-(%d+)-(%d+)[T ](%d+):(%d+):([%d%.]+)(.*)$"
+    )
+    if not y then
+        return nil
+    end
+    y, mo = tonumber(y), tonumber(mo)
+    -- Days since 1970-01-01 in the proleptic Gregorian calendar.
+    if mo <= 2 then
+        y = y - 1
+    end
+    local era = math.floor(y / 400)
+    local yoe = y - era * 400
+    local doy = math.floor((153 * ((mo + 9) % 12) + 2) / 5) + tonumber(d) - 1
+    local doe = yoe * 365 + math.floor(yoe / 4) - math.floor(yoe / 100) + doy
+    local epoch = (era * 146097 + doe - 719468) * 86400
+        + tonumber(h) * 3600 + tonumber(mi) * 60 + tonumber(s)
+    local sign, oh, om = string.match(zone, "^([+-])(%d%d):?(%d*)$")
+    if sign then
+        local offset = tonumber(oh) * 3600 + (tonumber(om) or 0) * 60
+        if sign == "+" then
+            epoch = epoch - offset
+        else
+            epoch = epoch + offset
+        end
+    end
+    return epoch
+end
+
+local smoothing = tonumber(ARGV[2 * #KEYS + 1])
+local updated = 0
+for i, key in ipairs(KEYS) do
+    local uploads = math.max(1, tonumber(ARGV[#KEYS + i]) or 1)
+    local current = redis.call("HMGET", key, "last_update", "upload_interval")
+    local new_at = to_epoch(ARGV[i])
+    local old_at = current[1] and to_epoch(current[1])
+    if current[1] and new_at and (not old_at or new_at > old_at) then
+        redis.call("HSET", key, "last_update", ARGV[i])
+        if old_at then
+            -- Tracks the channel's upload cadence from its last_update history,
+            -- averaging in each of the uploads since the last one in turn.
+            local interval = tonumber(current[2])
+            local gap = (new_at - old_at) / uploads
+            if interval and interval > 0 then
+                gap = gap + (1 - smoothing) ^ uploads * (interval - gap)
+            end
+            redis.call("HSET", key, "upload_interval", tostring(gap))
+        end
+        updated = updated + 1
+    end
+end
+return updated
+"""
 logger = logging.getLogger(__name__)
 
 
-class DatabaseWrapper:
+def connection_kwargs(host: str, port: int) -> dict:
+    """
+    Returns the connection pool arguments for the sync and async clients,
+    other than the retry policy which each client library has its own of.
+    """
+    return {
+        "host": host,
+        "port": port,
+        "db": 0,
+        "decode_responses": True,
+        "max_connections": REDIS_MAX_CONNECTIONS,
+        "timeout": REDIS_POOL_TIMEOUT,
+        "socket_keepalive": REDIS_SOCKET_KEEPALIVE,
+        "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL,
+        "retry_on_timeout": REDIS_RETRY_ON_TIMEOUT,
+        # Reconnects when a pooled connection turns out to be dead.
+        "retry_on_error": [redis.exceptions.ConnectionError],
+    }
+
+
+class RedisSchema:
+    """
+    The key names and value encodings shared by the sync and async wrappers.
+    """
+
+    def _make_key(self, channel_id: str) -> str:
+        return f"{channel_id}@youtube.channel"
+
+    def _make_index_key(self, tag: str | None) -> str:
+        return f"{tag or 'ALL'}@youtube.channel.index"
+
+    def _make_feed_key(self, channel_id: str) -> str:
+        return f"{channel_id}@youtube.channel.feed"
+
+    def _make_short_key(self, video_id: str) -> str:
+        return f"{video_id}@youtube.video.short"
+
+    def _make_pending_key(self, tag: str | None) -> str:
+        return f"{tag or 'ALL'}@pending.content"
+
+    def _make_shard_key(self, shard: int) -> str:
+        return f"{shard}@discovery.shard"
+
+    def _make_run_key(self, run_id: str) -> str:
+        return f"{run_id}@discovery.stats"
+
+    def _normalise_name(self, name: str) -> str:
+        return name.strip().removeprefix("@").casefold()
+
+    def _dump_channel(self, data: dict) -> dict:
+        return {
+            field: json.dumps(value) if field in CHANNEL_JSON_FIELDS else value
+            for field, value in data.items()
+            if value is not None
+        }
+
+    def _load_channel(self, fields: dict) -> dict:
+        data = dict(fields)
+        for field in CHANNEL_JSON_FIELDS:
+            if field in data:
+                try:
+                    data[field] = json.loads(data[field])
+                except json.JSONDecodeError:
+                    logger.exception(f"Failed to decode {field} of {data}")
+                    del data[field]
+        return data
+
+    def _update_datetimes_args(
+        self, last_updates: dict[str, datetime], uploads: dict[str, int] | None
+    ) -> list:
+        channel_ids = list(last_updates)
+        uploads = uploads or {}
+        return [
+            len(channel_ids),
+            *[self._make_key(channel_id) for channel_id in channel_ids],
+            *[last_updates[channel_id].isoformat() for channel_id in channel_ids],
+            *[uploads.get(channel_id, 1) for channel_id in channel_ids],
+            UPLOAD_INTERVAL_SMOOTHING,
+        ]
+
+    def _dump_video(self, video: dict) -> str:
+        return json.dumps({**video, "datetime": video["datetime"].isoformat()})
+
+    def _load_video(self, item: str) -> dict:
+        video = json.loads(item)
+        video["datetime"] = datetime.fromisoformat(video["datetime"])
+        return video
+
+
+class DatabaseWrapper(RedisSchema):
     _instance = None
     _lock = threading.Lock()
 
@@ -25,9 +239,12 @@ class DatabaseWrapper:
                 instance = super().__new__(cls)
                 instance._host = host
                 instance._port = port
-                instance._redis = redis.Redis(
-                    host=host, port=port, db=0, decode_responses=True
+                # Blocks rather than failing when every connection is in use.
+                pool = redis.BlockingConnectionPool(
+                    **connection_kwargs(host, port),
+                    retry=Retry(ExponentialBackoff(), REDIS_RETRIES),
                 )
+                instance._redis = redis.Redis(connection_pool=pool)
                 cls._instance = instance
         return cls._instance
 
@@ -35,126 +252,704 @@ class DatabaseWrapper:
         logger.info("Closing Redis connection.")
         self._redis.close()
 
-    def _make_key(self, channel_id: str) -> str:
-        return f"{channel_id}@youtube.channel.id"
-
     def _load_channel_data(self, channel_id: str) -> dict:
-        key = self._make_key(channel_id)
-        data_str = self._redis.get(key)
-        if data_str and isinstance(data_str, str):
-            try:
-                logger.debug(f"Found {key}={data_str}")
-                return json.loads(data_str)
-            except json.JSONDecodeError:
-                logger.exception(f"Failed to decode JSON data for key: {key}")
-        return {}
+        return self._load_channel(self._redis.hgetall(self._make_key(channel_id)))
 
     def _save_channel_data(self, channel_id: str, data: dict) -> None:
+        """
+        Updates the given fields of the channel's hash, use _replace_channel
+        to change its tags.
+        """
         key = self._make_key(channel_id)
         logger.debug(f"Updating {key} with {data=}")
         try:
-            self._redis.set(key, json.dumps(data))
+            self._redis.hset(key, mapping=self._dump_channel(data))
         except Exception:
             logger.exception(f"Failed to save data for key: {key}")
 
+    def _replace_channel(
+        self, channel_id: str, update: Callable[[dict], dict | None]
+    ) -> dict | None:
+        """
+        Atomically replaces the channel's data with `update(current data)`,
+        keeping the channel and tag index sets in step. Retried if the channel
+        changes in the meantime.
+
+        Returns:
+            The new data, or None if `update` returned None and nothing was
+            changed.
+        """
+        key = self._make_key(channel_id)
+
+        def replace(pipe: redis.client.Pipeline) -> dict | None:
+            # Runs straight away while the pipeline is watching.
+            fields = pipe.hgetall(key)
+            current = self._load_channel(fields if isinstance(fields, dict) else {})
+            data = update(current)
+            if data is None:
+                return None
+
+            # Renamed channels shouldn't be found by their old name or handle,
+            # unless another channel shares it.
+            stale = []
+            for lookup_key, field in (
+                (NAMES_KEY, "channel_name"),
+                (HANDLES_KEY, "handle"),
+            ):
+                old, new = current.get(field), data.get(field)
+                if old and (
+                    not new or self._normalise_name(old) != self._normalise_name(new)
+                ):
+                    name = self._normalise_name(old)
+                    if pipe.hget(lookup_key, name) == channel_id:
+                        stale.append((lookup_key, name))
+
+            pipe.multi()
+            for tag in set(current.get("tags") or []) - set(data.get("tags") or []):
+                pipe.srem(self._make_index_key(tag), channel_id)
+            for lookup_key, name in stale:
+                pipe.hdel(lookup_key, name)
+            self._write_channel(pipe, channel_id, data)
+            return data
+
+        return self._redis.transaction(replace, key, value_from_callable=True)
+
+    def _write_channel(
+        self, pipe: redis.client.Pipeline, channel_id: str, data: dict
+    ) -> None:
+        key = self._make_key(channel_id)
+        pipe.delete(key)
+        pipe.hset(key, mapping=self._dump_channel(data))
+        for tag in [None, *(data.get("tags") or [])]:
+            pipe.sadd(self._make_index_key(tag), channel_id)
+        self._index_names(pipe, [data])
+
+    def _index_names(self, pipe: redis.client.Pipeline, channels: list[dict]) -> None:
+        for lookup_key, field in ((NAMES_KEY, "channel_name"), (HANDLES_KEY, "handle")):
+            names: dict = {
+                self._normalise_name(row[field]): row["channel_id"]
+                for row in channels
+                if row.get(field)
+            }
+            if names:
+                pipe.hset(lookup_key, mapping=names)
+
+    def _read_channels(
+        self, channel_ids: list[str], fields: tuple[str, ...] | None = None
+    ) -> dict[str, dict]:
+        """
+        Reads the channels in one round trip, channels that don't exist are
+        left out.
+        """
+        pipe = self._redis.pipeline(transaction=False)
+        for channel_id in channel_ids:
+            if fields is None:
+                pipe.hgetall(self._make_key(channel_id))
+            else:
+                pipe.hmget(self._make_key(channel_id), fields)
+
+        channels = {}
+        for channel_id, values in zip(channel_ids, pipe.execute()):
+            if fields is not None:
+                values = {
+                    field: value
+                    for field, value in zip(fields, values)
+                    if value is not None
+                }
+            if values:
+                channels[channel_id] = self._load_channel(values)
+        return channels
+
+    def get_channel(self, channel_id: str) -> dict:
+        """
+        Returns the channel's data, or an empty dict if it isn't in the DB.
+        """
+        return self._load_channel_data(channel_id)
+
+    def get_channel_id(self, name: str) -> str | None:
+        """
+        Returns the ID of the channel with the name or handle (with or without
+        the @), ignoring case, or None if there isn't one.
+        """
+        name = self._normalise_name(name)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hget(NAMES_KEY, name)
+        pipe.hget(HANDLES_KEY, name)
+        by_name, by_handle = pipe.execute()
+        return by_name or by_handle
+
+    def get_channels_by_id(
+        self,
+        channel_ids: list[str],
+        fields: tuple[str, ...] | None = None,
+        page_size: int = CHANNEL_PAGE_SIZE,
+    ) -> dict[str, dict]:
+        """
+        Returns channel ID -> the channel's data (only the given `fields`, if
+        any) for the channels that are in the DB, reading `page_size` channels
+        per round trip.
+        """
+        channels: dict[str, dict] = {}
+        for start in range(0, len(channel_ids), page_size):
+            channels.update(
+                self._read_channels(channel_ids[start : start + page_size], fields)
+            )
+        return channels
+
     def update_datetime(self, channel_id: str, new_dt: str) -> None:
-        data = self._load_channel_data(channel_id)
-        if not data:
-            logger.error(f"No channel found for ID: {channel_id}")
+        if self.update_datetimes({channel_id: parse_timestamp(new_dt)}):
+            logger.info(f"Updated datetime for channel {channel_id}")
+        else:
+            logger.info(f"Kept the newer datetime (if any) for channel {channel_id}")
+
+    def update_datetimes(
+        self, last_updates: dict[str, datetime], uploads: dict[str, int] | None = None
+    ) -> int:
+        """
+        Atomically sets each channel's last_update, and its upload_interval
+        from the gap since the previous one, in one round trip. A channel's
+        last_update is never moved backwards and channels that aren't in the
+        DB are skipped.
+
+        Params:
+            last_updates: Channel ID -> its newest upload.
+            uploads: Channel ID -> the number of uploads since the previous
+                last_update, the gap is split evenly between them. 1 if missing.
+
+        Returns:
+            The number of channels updated.
+        """
+        if not last_updates:
+            return 0
+        return self._redis.eval(
+            UPDATE_DATETIMES_SCRIPT, *self._update_datetimes_args(last_updates, uploads)
+        )
+
+    def get_feed_validators(self, channel_id: str) -> dict:
+        """
+        Returns the HTTP cache validators (`etag` and/or `last_modified`) stored
+        for the channel's RSS feed, or an empty dict if there are none.
+        """
+        return self._redis.hgetall(self._make_feed_key(channel_id))
+
+    def set_feed_validators(self, channel_id: str, validators: dict) -> None:
+        """
+        Replaces the channel's stored feed validators, empty or None values are
+        dropped so an empty dict clears them.
+        """
+        key = self._make_feed_key(channel_id)
+        validators = {k: v for k, v in validators.items() if v}
+        pipe = self._redis.pipeline()
+        pipe.delete(key)
+        if validators:
+            pipe.hset(key, mapping=validators)
+        pipe.execute()
+
+    def get_short_verdict(self, video_id: str) -> bool | None:
+        """
+        Returns whether the video was previously found to be a Shorts video, or
+        None if it hasn't been classified (or the verdict has expired).
+        """
+        verdict = self._redis.get(self._make_short_key(video_id))
+        if verdict is None:
+            return None
+        return verdict == "1"
+
+    def set_short_verdict(self, video_id: str, is_short: bool, ttl: int) -> None:
+        """
+        Stores the video's Shorts verdict, expiring after `ttl` seconds (a ttl
+        of 0 never expires).
+        """
+        self._redis.set(
+            self._make_short_key(video_id), "1" if is_short else "0", ex=ttl or None
+        )
+
+    def add_pending_content(
+        self, tag: str | None, content: list[dict], max_age: int
+    ) -> None:
+        """
+        Appends to the list of videos waiting to be queued for the tag (None
+        for all channels), keeping the list for at least `max_age` seconds.
+        """
+        key = self._make_pending_key(tag)
+        pipe = self._redis.pipeline()
+        self._push_pending_content(pipe, key, content, max_age)
+        pipe.execute()
+        logger.info(f"Added {len(content)} pending videos to {key}")
+
+    def merge_pending_content(
+        self, tag: str | None, content: list[dict], max_age: int
+    ) -> int:
+        """
+        Appends the videos that aren't already in the tag's pending list (None
+        for all channels), keeping the list for at least `max_age` seconds.
+
+        Returns:
+            The number of videos added.
+        """
+        key = self._make_pending_key(tag)
+
+        def merge(pipe: redis.client.Pipeline) -> int:
+            # Runs straight away while the pipeline is watching.
+            items = pipe.lrange(key, 0, -1)
+            pending = {
+                json.loads(item)["video_id"]
+                for item in (items if isinstance(items, list) else list[str]())
+            }
+            new = [video for video in content if video["video_id"] not in pending]
+            pipe.multi()
+            self._push_pending_content(pipe, key, new, max_age)
+            return len(new)
+
+        added = self._redis.transaction(merge, key, value_from_callable=True)
+        logger.info(f"Added {added} of {len(content)} pending videos to {key}")
+        return added
+
+    def _push_pending_content(
+        self, pipe: redis.client.Pipeline, key: str, content: list[dict], max_age: int
+    ) -> None:
+        if content:
+            pipe.rpush(key, *[self._dump_video(video) for video in content])
+        pipe.set(f"{key}.refreshed", datetime.now().isoformat(), ex=max_age)
+        pipe.expire(key, max_age)
+
+    def pop_pending_content(self, tag: str | None) -> list[dict] | None:
+        """
+        Atomically takes the list of videos waiting to be queued for the tag.
+
+        Returns:
+            The videos in the same form as ContentFinder.find_content, or None
+            if nothing is maintaining a list for the tag (or it has expired).
+        """
+        key = self._make_pending_key(tag)
+        pipe = self._redis.pipeline()
+        pipe.get(f"{key}.refreshed")
+        pipe.lrange(key, 0, -1)
+        pipe.delete(key)
+        refreshed, items, _ = pipe.execute()
+        if refreshed is None:
+            return None
+
+        logger.info(f"Took {len(items)} pending videos from {key} ({refreshed=})")
+        return [self._load_video(item) for item in items]
+
+    def push_journal(self, content: list[dict]) -> None:
+        """
+        Appends discovered videos to the content journal, which keeps them
+        until they've been queued even if the bot restarts.
+        """
+        if content:
+            self._redis.rpush(
+                JOURNAL_KEY, *[self._dump_video(video) for video in content]
+            )
+
+    def take_journal(self) -> tuple[str, dict] | None:
+        """
+        Atomically moves the oldest video in the content journal to the
+        in-flight list.
+
+        Returns:
+            The journal entry, to pass to ack_journal once the video has been
+            handled, and the video. None if the journal is empty.
+        """
+        entry = self._redis.lmove(JOURNAL_KEY, JOURNAL_INFLIGHT_KEY, "LEFT", "RIGHT")
+        if not isinstance(entry, str):
+            return None
+        return entry, self._load_video(entry)
+
+    def ack_journal(self, *entries: str) -> None:
+        """
+        Drops handled entries from the in-flight list.
+        """
+        if not entries:
             return
-        data["last_update"] = new_dt
-        self._save_channel_data(channel_id, data)
-        logger.info(f"Updated datetime for channel {channel_id}")
+        pipe = self._redis.pipeline()
+        for entry in entries:
+            pipe.lrem(JOURNAL_INFLIGHT_KEY, 1, entry)
+        pipe.execute()
+
+    def recover_journal(self) -> int:
+        """
+        Moves entries left in flight by an interrupted run back to the front
+        of the journal, in their original order.
+
+        Returns:
+            The number of videos waiting in the journal.
+        """
+        while self._redis.lmove(JOURNAL_INFLIGHT_KEY, JOURNAL_KEY, "RIGHT", "LEFT"):
+            pass
+        return self._redis.llen(JOURNAL_KEY)
+
+    def get_channel_failures(
+        self, channel_ids: list[str] | None = None
+    ) -> dict[str, dict]:
+        """
+        Returns channel ID -> failure record (see ChannelHealth) for the given
+        channels that are failing, or for every failing channel.
+        """
+        if channel_ids is None:
+            items = list(self._redis.hgetall(FAILURES_KEY).items())
+        elif channel_ids:
+            items = list(zip(channel_ids, self._redis.hmget(FAILURES_KEY, channel_ids)))
+        else:
+            return {}
+        return {
+            channel_id: json.loads(record) for channel_id, record in items if record
+        }
+
+    def set_channel_failures(self, failures: dict[str, dict]) -> None:
+        if failures:
+            self._redis.hset(
+                FAILURES_KEY,
+                mapping={
+                    channel_id: json.dumps(record)
+                    for channel_id, record in failures.items()
+                },
+            )
+
+    def clear_channel_failures(self, channel_ids: list[str]) -> None:
+        if channel_ids:
+            self._redis.hdel(FAILURES_KEY, *channel_ids)
+
+    def add_discovery_run(
+        self, run: dict, channels: dict[str, dict], max_runs: int, ttl: int
+    ) -> None:
+        """
+        Stores a discovery run's summary and per-channel records, dropping
+        the summaries and records of all but the latest `max_runs` runs. The
+        per-channel records expire after `ttl` seconds.
+        """
+        key = self._make_run_key(run["id"])
+
+        def add(pipe: redis.client.Pipeline) -> None:
+            # Runs straight away while the pipeline is watching, these are the
+            # summaries the push moves past `max_runs`.
+            items = pipe.lrange(RUNS_KEY, max_runs - 1, -1)
+            dropped = [
+                self._make_run_key(json.loads(item)["id"])
+                for item in (items if isinstance(items, list) else list[str]())
+            ]
+            pipe.multi()
+            if channels:
+                pipe.hset(
+                    key,
+                    mapping={
+                        channel_id: json.dumps(record)
+                        for channel_id, record in channels.items()
+                    },
+                )
+                pipe.expire(key, ttl)
+            pipe.lpush(RUNS_KEY, json.dumps(run))
+            pipe.ltrim(RUNS_KEY, 0, max_runs - 1)
+            if dropped:
+                pipe.delete(*dropped)
+
+        self._redis.transaction(add, RUNS_KEY)
+
+    def get_discovery_runs(self, count: int) -> list[dict]:
+        """
+        Returns the summaries of the latest `count` discovery runs, newest
+        first.
+        """
+        return [json.loads(run) for run in self._redis.lrange(RUNS_KEY, 0, count - 1)]
+
+    def get_discovery_run_channels(self, run_id: str) -> dict[str, dict]:
+        """
+        Returns channel ID -> the channel's record for the discovery run, empty
+        once the records have expired.
+        """
+        return {
+            channel_id: json.loads(record)
+            for channel_id, record in self._redis.hgetall(
+                self._make_run_key(run_id)
+            ).items()
+        }
+
+    def add_discovered_content(self, content: list[dict], max_age: int) -> int:
+        """
+        Appends videos found by a discovery worker to the pending lists of
+        their channel's tags (and the list for all channels), skipping videos
+        already in a list. Videos stay found until they're queued, so a list
+        that expired while every worker was down is filled again.
+
+        Returns:
+            The number of videos added to the list for all channels.
+        """
+        channel_ids = list({video["channel_id"] for video in content})
+        if not channel_ids:
+            return 0
+
+        channels = self.get_channels_by_id(channel_ids, fields=("tags",))
+        by_tag: dict[str | None, list[dict]] = {None: []}
+        for video in content:
+            tags = channels.get(video["channel_id"], {}).get("tags") or []
+            for tag in [None, *tags]:
+                by_tag.setdefault(tag, []).append(video)
+
+        added = {
+            tag: self.merge_pending_content(tag, videos, max_age)
+            for tag, videos in by_tag.items()
+        }
+        return added[None]
+
+    def register_worker(self, worker_id: str, ttl: int) -> int:
+        """
+        Records a heartbeat for the discovery worker, forgetting workers that
+        haven't sent one in `ttl` seconds.
+
+        Returns:
+            The number of live workers.
+        """
+        now = time.time()
+        pipe = self._redis.pipeline()
+        pipe.zadd(WORKERS_KEY, {worker_id: now})
+        pipe.zremrangebyscore(WORKERS_KEY, "-inf", now - ttl)
+        pipe.zcard(WORKERS_KEY)
+        return pipe.execute()[-1]
+
+    def acquire_shard(self, shard: int, worker_id: str, ttl: int) -> bool:
+        """
+        Leases the discovery shard to the worker for `ttl` seconds, if no other
+        worker holds it.
+        """
+        return bool(
+            self._redis.set(self._make_shard_key(shard), worker_id, nx=True, ex=ttl)
+        )
+
+    def renew_shard(self, shard: int, worker_id: str, ttl: int) -> bool:
+        """
+        Extends the worker's lease on the shard.
+
+        Returns:
+            False if the lease has expired or is held by another worker.
+        """
+        return bool(
+            self._redis.eval(
+                RENEW_LEASE_SCRIPT,
+                1,
+                self._make_shard_key(shard),
+                worker_id,
+                ttl * 1000,
+            )
+        )
+
+    def release_shard(self, shard: int, worker_id: str) -> None:
+        self._redis.eval(
+            RELEASE_LEASE_SCRIPT, 1, self._make_shard_key(shard), worker_id
+        )
+
+    def get_shard_run(self, shard: int) -> float | None:
+        """
+        Returns the unix timestamp the shard was last discovered at, by any
+        worker, or None if it never has been.
+        """
+        last_run = self._redis.hget(SHARD_RUNS_KEY, str(shard))
+        return None if last_run is None else float(last_run)
+
+    def set_shard_run(self, shard: int, timestamp: float) -> None:
+        self._redis.hset(SHARD_RUNS_KEY, str(shard), timestamp)
+
+    def get_next_due(self, channel_ids: list[str]) -> dict[str, float | None]:
+        """
+        Returns channel ID -> the unix timestamp the channel is next due to be
+        polled at, or None if the channel has never been scheduled.
+        """
+        if not channel_ids:
+            return {}
+        return dict(zip(channel_ids, self._redis.zmscore(SCHEDULE_KEY, channel_ids)))
+
+    def schedule_channels(self, due: dict[str, float]) -> None:
+        """
+        Sets the unix timestamp each channel ID is next due to be polled at.
+        """
+        if due:
+            self._redis.zadd(SCHEDULE_KEY, {k: v for k, v in due.items()})
+
+    def mark_queued(self, video_ids: list[str], ttl: int = QUEUED_VIDEO_TTL) -> None:
+        """
+        Records the videos as queued (or already on the playlist) for `ttl`
+        seconds.
+        """
+        if not video_ids:
+            return
+        now = time.time()
+        pipe = self._redis.pipeline()
+        pipe.zadd(QUEUED_KEY, {video_id: now + ttl for video_id in video_ids})
+        # Keeps the set around the size of the playlist.
+        pipe.zremrangebyscore(QUEUED_KEY, "-inf", now)
+        pipe.execute()
+
+    def is_queued(self, video_id: str) -> bool:
+        """
+        Returns True if the video was recently queued or seen on the playlist.
+        """
+        expires = self._redis.zscore(QUEUED_KEY, video_id)
+        return expires is not None and expires > time.time()
 
     def get_channels(self, tag: str | None = None) -> list:
-        channels = []
-        pattern = "*@youtube.channel.id"
-        # scan_iter instead of keys to be more production friendly
-        for key in self._redis.scan_iter(pattern):
-            data_str = self._redis.get(key)
-            if data_str and isinstance(data_str, str):
-                try:
-                    data = json.loads(data_str)
-                    if tag:
-                        if (
-                            "tags" in data
-                            and isinstance(data["tags"], list)
-                            and tag in data["tags"]
-                        ):
-                            channels.append(data)
-                    else:
-                        channels.append(data)
-                except json.JSONDecodeError:
-                    logger.exception(f"JSON decoding failed for key: {key}")
-        return channels
+        return [row for batch in self.iter_channels(tag) for row in batch]
+
+    def iter_channels(
+        self,
+        tag: str | None = None,
+        fields: tuple[str, ...] | None = None,
+        page_size: int = CHANNEL_PAGE_SIZE,
+    ) -> Iterator[list[dict]]:
+        """
+        Yields all (or all tagged) channels an SSCAN page of about `page_size`
+        channels at a time, each page read in one round trip, so callers can
+        start on the first channels before the rest have been read. Only the
+        given `fields` are read, if any.
+        """
+        key = self._make_index_key(tag)
+        seen: set[str] = set()
+        cursor = None
+        while cursor != 0:
+            cursor, channel_ids = self._redis.sscan(key, cursor or 0, count=page_size)
+            # SSCAN can return a member twice while the set is being resized.
+            page = [channel_id for channel_id in channel_ids if channel_id not in seen]
+            seen.update(page)
+            # Channels removed since they were scanned are left out.
+            batch = list(self._read_channels(page, fields).values())
+            if batch:
+                yield batch
 
-    def add_channel(self, channel_id: str, channel_name: str) -> None:
+    def add_channel(
+        self, channel_id: str, channel_name: str, handle: str | None = None
+    ) -> None:
         channel_url = (
             f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
         )
         try:
-            resp = requests.get(channel_url, timeout=60)
+            resp = RequestGuard().get(channel_url, timeout=60)
             resp.raise_for_status()
         except requests.RequestException:
             logger.exception(f"Failed to retrieve feed for channel_id: {channel_id}")
             return
 
-        soup = bs(resp.text, "lxml")
         try:
-            entry = soup.find_all("entry")[0]
-            published = entry.find_all("published")[0].text
-        except (IndexError, AttributeError):
+            entry = next(iter_entries(resp.content))
+            published = entry.published.isoformat()
+        except (StopIteration, ValueError, etree.XMLSyntaxError):
             logger.error(f"Failed to parse published date for channel_id: {channel_id}")
             return
 
-        data = {
-            "channelId": channel_id,
-            "name": channel_name,
+        data: dict = {
+            "channel_id": channel_id,
+            "channel_name": channel_name,
+            "handle": handle,
             "last_update": published,
             "tags": [],
         }
-        self._save_channel_data(channel_id, data)
+        self._replace_channel(channel_id, lambda _: data)
         logger.info(f"Added channel {channel_id} with name {channel_name}")
 
     def remove_channel(self, channel_name: str) -> None:
-        pattern = "*@youtube.channel.id"
-        for key in self._redis.scan_iter(pattern):
-            data_str = self._redis.get(key)
-            if data_str and isinstance(data_str, str):
-                try:
-                    data = json.loads(data_str)
-                    if data.get("name") == channel_name:
-                        self._redis.delete(key)
-                        logger.info(f"Removed channel with name {channel_name}")
-                        return
-                except json.JSONDecodeError:
-                    logger.exception(f"JSON decoding failed for key: {key}")
-        logger.warning(f"No channel found with name {channel_name}")
+        """
+        Removes the channel with the name or handle, see get_channel_id.
+        """
+        channel_id = self.get_channel_id(channel_name)
+        if channel_id is None:
+            logger.warning(f"No channel found with name {channel_name}")
+            return
+
+        row = self.get_channel(channel_id)
+        pipe = self._redis.pipeline()
+        pipe.delete(self._make_key(channel_id), self._make_feed_key(channel_id))
+        for tag in [None, *(row.get("tags") or [])]:
+            pipe.srem(self._make_index_key(tag), channel_id)
+        # Falls back to the given name if the lookup outlived the channel.
+        for lookup_key, field in ((NAMES_KEY, "channel_name"), (HANDLES_KEY, "handle")):
+            name = row.get(field) if row else channel_name
+            if name:
+                pipe.hdel(lookup_key, self._normalise_name(name))
+        pipe.zrem(SCHEDULE_KEY, channel_id)
+        pipe.hdel(FAILURES_KEY, channel_id)
+        pipe.execute()
+        logger.info(f"Removed channel {channel_id} with name {channel_name}")
 
     def add_tags(self, channel_id: str, new_tags: list) -> None:
-        data = self._load_channel_data(channel_id)
-        tags = data.get("tags", [])
-        if not isinstance(tags, list):
-            tags = []
-        for tag in new_tags:
-            if tag not in tags:
-                tags.append(tag)
-        data["tags"] = tags
-        self._save_channel_data(channel_id, data)
+        def add(data: dict) -> dict | None:
+            if not data:
+                return None
+            tags = data.get("tags")
+            if not isinstance(tags, list):
+                tags = []
+            return {**data, "tags": tags + [tag for tag in new_tags if tag not in tags]}
+
+        if self._replace_channel(channel_id, add) is None:
+            logger.error(f"No channel found for ID: {channel_id}")
+            return
         logger.info(f"Added tags {new_tags} to channel {channel_id}")
 
     def remove_tags(self, channel_id: str, tags_to_remove: list) -> None:
-        data = self._load_channel_data(channel_id)
-        if not data:
+        def remove(data: dict) -> dict | None:
+            if not data:
+                return None
+            tags = data.get("tags")
+            if not isinstance(tags, list):
+                tags = []
+            return {**data, "tags": [tag for tag in tags if tag not in tags_to_remove]}
+
+        if self._replace_channel(channel_id, remove) is None:
             logger.error(f"No channel found for ID: {channel_id}")
             return
-        tags = data.get("tags", [])
-        if not isinstance(tags, list):
-            tags = []
-        data["tags"] = [tag for tag in tags if tag not in tags_to_remove]
-        self._save_channel_data(channel_id, data)
         logger.info(f"Removed tags {tags_to_remove} from channel {channel_id}")
 
+    def migrate_channels(self) -> int:
+        """
+        Moves channels stored as JSON strings by older versions to hashes and
+        adds them to the channel and tag index sets. Older records' `channelId`
+        and `name` fields are renamed to `channel_id` and `channel_name`.
+
+        Returns:
+            The number of channels migrated.
+        """
+        migrated = 0
+        cursor = None
+        while cursor != 0:
+            cursor, keys = self._redis.scan(
+                cursor or 0, match=LEGACY_CHANNEL_PATTERN, count=CHANNEL_PAGE_SIZE
+            )
+            if not keys:
+                continue
+
+            # Each page is read with one MGET and moved in one transaction.
+            pipe = self._redis.pipeline()
+            for key, data_str in zip(keys, self._redis.mget(keys)):
+                if not data_str or not isinstance(data_str, str):
+                    continue
+                try:
+                    data = json.loads(data_str)
+                except json.JSONDecodeError:
+                    logger.exception(f"JSON decoding failed for key: {key}")
+                    continue
+
+                channel_id = key.removesuffix("@youtube.channel.id")
+                data["channel_id"] = data.pop(
+                    "channelId", data.get("channel_id", channel_id)
+                )
+                data["channel_name"] = data.pop("name", data.get("channel_name"))
+                if not isinstance(data.get("tags"), list):
+                    data["tags"] = []
+                self._write_channel(pipe, channel_id, data)
+                pipe.delete(key)
+                migrated += 1
+            pipe.execute()
+
+        if migrated:
+            logger.info(f"Migrated {migrated} channels to hashes")
+
+        # Channels stored as hashes before the lookups were added.
+        if not self._redis.exists(NAMES_KEY):
+            for batch in self.iter_channels(
+                fields=("channel_id", "channel_name", "handle")
+            ):
+                pipe = self._redis.pipeline()
+                self._index_names(pipe, batch)
+                pipe.execute()
+        return migrated
+
     def shutdown(self) -> None:
         logger.debug("Shutting down DB remotely...")
         self._redis.shutdown()
@@ -1,3 +1,6 @@
+import requests
+
+
 class MissingEnvVar(Exception):
     pass
 
@@ -12,3 +15,9 @@ class InvalidTagError(Exception):
 
 class InvalidBlackjackState(Exception):
     pass
+
+
+class CircuitOpenError(requests.RequestException):
+    """
+    Raised instead of making a request to a host that's currently failing.
+    """
@@ -0,0 +1,210 @@
+import bisect
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from typing import Callable, TypeVar
+
+HEDGE_REQUESTS = os.environ.get("HEDGE_REQUESTS", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", 95))
+# Max fraction of all requests that may be sent a second time.
+HEDGE_BUDGET = float(os.environ.get("HEDGE_BUDGET", 0.05))
+# Requests to observe before the percentile is trusted enough to hedge on.
+HEDGE_MIN_SAMPLES = 20
+# Latency bucket upper bounds in seconds, 10ms up to ~50s growing by 1.5x.
+LATENCY_BUCKETS = tuple(round(0.01 * 1.5**i, 3) for i in range(22)) + (float("inf"),)
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LatencyHistogram:
+    """
+    A thread safe histogram of request latencies with fixed buckets.
+    """
+
+    def __init__(self) -> None:
+        self._counts = [0] * len(LATENCY_BUCKETS)
+        self._total = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return self._total
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            self._total += 1
+            self._sum += seconds
+
+    def percentile(self, percentile: float) -> float | None:
+        """
+        Returns the upper bound of the bucket the percentile falls in, or None
+        if nothing has been observed.
+        """
+        with self._lock:
+            if not self._total:
+                return None
+            rank = self._total * percentile / 100
+            seen = 0
+            for bound, count in zip(LATENCY_BUCKETS, self._counts):
+                seen += count
+                if seen >= rank:
+                    return bound
+        return LATENCY_BUCKETS[-1]
+
+    def snapshot(self) -> dict:
+        """
+        Returns the histogram in an exportable form, with cumulative bucket
+        counts keyed by their upper bound in seconds.
+        """
+        with self._lock:
+            buckets = {}
+            seen = 0
+            for bound, count in zip(LATENCY_BUCKETS, self._counts):
+                seen += count
+                buckets[str(bound)] = seen
+            return {
+                "count": self._total,
+                "sum": round(self._sum, 3),
+                "buckets": buckets,
+            }
+
+
+class HedgeBudget:
+    """
+    Limits hedged requests to a fraction of all requests, across every Hedger.
+    """
+
+    def __init__(self, fraction: float = HEDGE_BUDGET) -> None:
+        self._fraction = fraction
+        self._requests = 0
+        self._hedges = 0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._requests += 1
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._hedges + 1 > self._fraction * self._requests:
+                return False
+            self._hedges += 1
+            return True
+
+
+_budget = HedgeBudget()
+
+
+class Hedger:
+    """
+    Records the latency of every request made through it and, if enabled,
+    hedges slow requests: when a request hasn't answered within the tracked
+    latency percentile a second identical request is sent, and whichever
+    finishes first wins.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        enabled: bool = HEDGE_REQUESTS,
+        percentile: float = HEDGE_PERCENTILE,
+        budget: HedgeBudget = _budget,
+    ) -> None:
+        self.name = name
+        self.enabled = enabled
+        self.histogram = LatencyHistogram()
+        self.hedged = 0
+        self._percentile = percentile
+        self._budget = budget
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def call(self, request: Callable[[], T]) -> T:
+        """
+        Makes the request, which must be safe to send twice, returning the
+        first successful response.
+        """
+        self._budget.record_request()
+        threshold = self._threshold()
+        if threshold is None:
+            return self._timed(request)
+
+        executor = self._get_executor()
+        primary = executor.submit(self._timed, request)
+        if wait([primary], timeout=threshold).done or not self._budget.try_spend():
+            return primary.result()
+
+        logger.debug(f"Hedging {self.name} request after {threshold}s")
+        with self._lock:
+            self.hedged += 1
+        backup = executor.submit(self._timed, request)
+
+        error: Exception | None = None
+        for future in as_completed([primary, backup]):
+            try:
+                return future.result()
+            except Exception as err:
+                error = err
+        assert error is not None
+        raise error
+
+    def _threshold(self) -> float | None:
+        if not self.enabled or self.histogram.count < HEDGE_MIN_SAMPLES:
+            return None
+        threshold = self.histogram.percentile(self._percentile)
+        # Failures and timeouts are observed too, so the percentile can land in
+        # the unbounded top bucket, where there's nothing sensible to wait for.
+        if threshold is None or not math.isfinite(threshold):
+            return None
+        return threshold
+
+    def _timed(self, request: Callable[[], T]) -> T:
+        start = time.monotonic()
+        try:
+            return request()
+        finally:
+            self.histogram.observe(time.monotonic() - start)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=32, thread_name_prefix=f"hedge-{self.name}"
+                )
+            return self._executor
+
+
+_hedgers: dict[str, Hedger] = {}
+_hedgers_lock = threading.Lock()
+
+
+def get_hedger(name: str) -> Hedger:
+    """
+    Returns the process wide Hedger for a kind of request, e.g. "feed".
+    """
+    with _hedgers_lock:
+        if name not in _hedgers:
+            _hedgers[name] = Hedger(name)
+        return _hedgers[name]
+
+
+def latency_histograms() -> dict[str, dict]:
+    """
+    Returns a snapshot of every Hedger's latency histogram, by name.
+    """
+    with _hedgers_lock:
+        hedgers = list(_hedgers.values())
+    return {
+        hedger.name: {**hedger.histogram.snapshot(), "hedged": hedger.hedged}
+        for hedger in hedgers
+    }
@@ -0,0 +1,59 @@
+import logging
+import os
+import threading
+from collections import Counter
+from datetime import datetime
+
+from cytubebot.common.database_wrapper import DatabaseWrapper
+
+# Videos queued between writes of their channels' last_update.
+LAST_UPDATE_BATCH_SIZE = int(os.environ.get("LAST_UPDATE_BATCH_SIZE", 50))
+logger = logging.getLogger(__name__)
+
+
+class LastUpdateBuffer:
+    """
+    Holds the channels' last_update writes in memory, keeping the newest
+    datetime and the number of uploads per channel, until they're flushed to
+    Redis together in one round trip. See DatabaseWrapper.update_datetimes.
+    """
+
+    def __init__(self) -> None:
+        self._db = DatabaseWrapper("", 0)
+        self._pending: dict[str, datetime] = {}
+        self._uploads: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def record(self, channel_id: str, dt: datetime, uploads: int = 1) -> None:
+        with self._lock:
+            if channel_id not in self._pending or dt > self._pending[channel_id]:
+                self._pending[channel_id] = dt
+            self._uploads[channel_id] += uploads
+
+    def flush(self) -> int:
+        """
+        Writes the buffered datetimes. They're kept for the next flush if the
+        write fails.
+
+        Returns:
+            The number of channels whose last_update moved forwards.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            uploads, self._uploads = self._uploads, Counter()
+        if not pending:
+            return 0
+
+        try:
+            updated = self._db.update_datetimes(pending, dict(uploads))
+        except Exception:
+            for channel_id, dt in pending.items():
+                self.record(channel_id, dt, uploads[channel_id])
+            raise
+
+        logger.info(f"Updated datetime for {updated} of {len(pending)} channels")
+        return updated
@@ -0,0 +1,224 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable
+from urllib.parse import urlsplit
+
+import requests
+
+from cytubebot.common.exceptions import CircuitOpenError
+
+YOUTUBE_RATE_LIMIT = float(os.environ.get("YOUTUBE_RATE_LIMIT", 10))
+YOUTUBE_RATE_BURST = int(os.environ.get("YOUTUBE_RATE_BURST", 20))
+# Share the rate limit between every bot/worker process using the same Redis.
+RATE_LIMIT_REDIS = os.environ.get("RATE_LIMIT_REDIS", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RESET_TIMEOUT = float(os.environ.get("BREAKER_RESET_TIMEOUT", 30))
+logger = logging.getLogger(__name__)
+
+# Takes a token from the bucket in KEYS[1] if there is one. Returns 0, or the
+# number of seconds until a token will be available.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+if tokens < 1 then
+    return tostring((1 - tokens) / rate)
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens - 1), "ts", tostring(now))
+redis.call("PEXPIRE", KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return "0"
+"""
+
+
+class TokenBucket:
+    """
+    An in-process token bucket, refilling at `rate` tokens a second up to
+    `burst` tokens.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self._rate = rate
+        self._burst = max(1, burst)
+        self._tokens = float(self._burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Blocks until a token is available and takes it.
+        """
+        while (wait := self._try_take()) > 0:
+            time.sleep(wait)
+
+    def _try_take(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self._burst, self._tokens + (now - self._updated) * self._rate
+            )
+            self._updated = now
+            if self._tokens < 1:
+                return (1 - self._tokens) / self._rate
+            self._tokens -= 1
+            return 0
+
+
+class RedisTokenBucket(TokenBucket):
+    """
+    A token bucket kept in Redis, shared by every process using the same key.
+    """
+
+    def __init__(self, rate: float, burst: int, key: str) -> None:
+        super().__init__(rate, burst)
+        # Imported here, the DatabaseWrapper makes requests through the guard.
+        from cytubebot.common.database_wrapper import DatabaseWrapper
+
+        self._key = key
+        self._script = DatabaseWrapper("", 0).connection.register_script(
+            TOKEN_BUCKET_SCRIPT
+        )
+
+    def _try_take(self) -> float:
+        return float(self._script(keys=[self._key], args=[self._rate, self._burst]))
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures, failing every call
+    fast for `reset_timeout` seconds. After that one trial call is let through,
+    its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self._failure_threshold = max(1, failure_threshold)
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def before_call(self) -> None:
+        """
+        Raises:
+            CircuitOpenError if the call shouldn't be made.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if (
+                time.monotonic() - self._opened_at < self._reset_timeout
+                or self._trial_running
+            ):
+                raise CircuitOpenError("Circuit is open, host is failing.")
+            self._trial_running = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit closed.")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or (
+                self._failures >= self._failure_threshold
+            ):
+                logger.warning(f"Circuit opened after {self._failures} failures.")
+                self._opened_at = time.monotonic()
+
+
+class RequestGuard:
+    """
+    Process wide rate limiting and circuit breaking per host. Every request to
+    YouTube should go through here so a throttling episode is backed off from
+    together, rather than every caller running into its own timeouts.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    # Instance variable annotations for Mypy
+    _limiters: dict[str, TokenBucket]
+    _breakers: dict[str, CircuitBreaker]
+    _hosts_lock: threading.Lock
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                instance = super().__new__(cls)
+                instance._limiters = {}
+                instance._breakers = {}
+                instance._hosts_lock = threading.Lock()
+                cls._instance = instance
+        return cls._instance
+
+    def get(
+        self, url: str, session: requests.Session | None = None, **kwargs
+    ) -> requests.Response:
+        return self._guarded(url, lambda: (session or requests).get(url, **kwargs))
+
+    def head(
+        self, url: str, session: requests.Session | None = None, **kwargs
+    ) -> requests.Response:
+        return self._guarded(url, lambda: (session or requests).head(url, **kwargs))
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).hostname or ""
+        with self._hosts_lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(
+                    BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT
+                )
+            return self._breakers[host]
+
+    def limiter(self, url: str) -> TokenBucket:
+        host = urlsplit(url).hostname or ""
+        with self._hosts_lock:
+            if host not in self._limiters:
+                self._limiters[host] = (
+                    RedisTokenBucket(
+                        YOUTUBE_RATE_LIMIT, YOUTUBE_RATE_BURST, f"{host}@ratelimit"
+                    )
+                    if RATE_LIMIT_REDIS
+                    else TokenBucket(YOUTUBE_RATE_LIMIT, YOUTUBE_RATE_BURST)
+                )
+            return self._limiters[host]
+
+    def _guarded(
+        self, url: str, request: Callable[[], requests.Response]
+    ) -> requests.Response:
+        breaker = self.breaker(url)
+        breaker.before_call()
+
+        try:
+            self.limiter(url).acquire()
+            resp = request()
+        except Exception:
+            breaker.record_failure()
+            raise
+
+        # Anything else, e.g. a 404 for a deleted channel, says the host is fine.
+        if resp.status_code == 429 or resp.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return resp
@@ -0,0 +1,107 @@
+import logging
+import os
+import time
+
+from cytubebot.common.database_wrapper import DatabaseWrapper
+
+CHANNEL_RETRY_BASE = int(os.environ.get("CHANNEL_RETRY_BASE", 15 * 60))
+CHANNEL_RETRY_MAX = int(os.environ.get("CHANNEL_RETRY_MAX", 7 * 24 * 60 * 60))
+# Failures in a row before a channel is reported as dead.
+CHANNEL_DEAD_AFTER = int(os.environ.get("CHANNEL_DEAD_AFTER", 5))
+logger = logging.getLogger(__name__)
+
+
+class ChannelHealth:
+    """
+    Tracks channels whose feeds fail to fetch or parse, e.g. deleted or
+    renamed channels. A failing channel is skipped until its retry time, which
+    doubles with every failure in a row from `retry_base` up to `retry_max`,
+    and is forgotten as soon as it's checked successfully.
+    """
+
+    def __init__(
+        self,
+        retry_base: int = CHANNEL_RETRY_BASE,
+        retry_max: int = CHANNEL_RETRY_MAX,
+        dead_after: int = CHANNEL_DEAD_AFTER,
+    ) -> None:
+        self._db = DatabaseWrapper("", 0)
+        self._retry_base = retry_base
+        self._retry_max = max(retry_base, retry_max)
+        self._dead_after = dead_after
+
+    def select(self, channels: list[dict]) -> list[dict]:
+        """
+        Returns the channels that aren't waiting to be retried, in their given
+        order.
+        """
+        now = time.time()
+        failures = self._db.get_channel_failures(
+            [row["channel_id"] for row in channels]
+        )
+        selected = [
+            row
+            for row in channels
+            if (failure := failures.get(row["channel_id"])) is None
+            or failure["retry_at"] <= now
+        ]
+        if len(selected) < len(channels):
+            logger.info(
+                f"Skipping {len(channels) - len(selected)} failing channels until "
+                "their retry time."
+            )
+        return selected
+
+    def record_failures(self, failures: dict[str, str]) -> None:
+        """
+        Params:
+            failures: A dict of channel ID -> the error it failed with.
+        """
+        if not failures:
+            return
+
+        now = time.time()
+        previous = self._db.get_channel_failures(list(failures))
+        records = {}
+        for channel_id, error in failures.items():
+            count = previous.get(channel_id, {}).get("count", 0) + 1
+            retry_in = min(self._retry_base * 2 ** (count - 1), self._retry_max)
+            records[channel_id] = {
+                "count": count,
+                "retry_at": now + retry_in,
+                "error": error,
+            }
+            if count == self._dead_after:
+                logger.warning(f"{channel_id} has failed {count} times in a row.")
+        self._db.set_channel_failures(records)
+
+    def record_successes(self, channel_ids: list[str]) -> None:
+        self._db.clear_channel_failures(channel_ids)
+
+    def report(self) -> str:
+        """
+        Returns a summary of the failing channels, chronically failing first.
+        """
+        failures = self._db.get_channel_failures()
+        if not failures:
+            return "No channels are failing."
+
+        dead = sorted(
+            (
+                (failure["count"], channel_id)
+                for channel_id, failure in failures.items()
+                if failure["count"] >= self._dead_after
+            ),
+            reverse=True,
+        )
+        msg = f"{len(failures)} channels are failing"
+        if dead:
+            msg += (
+                f", {len(dead)} have failed {self._dead_after}+ times in a row: "
+                + ", ".join(
+                    f"{channel_id} ({failures[channel_id]['error']})"
+                    for _, channel_id in dead[:10]
+                )
+                + (" ..." if len(dead) > 10 else "")
+            )
+        return msg + "."
@@ -0,0 +1,109 @@
+import logging
+import os
+import random
+import time
+from datetime import datetime, timezone
+
+from cytubebot.common.database_wrapper import DatabaseWrapper
+from cytubebot.content_searchers.feed_parser import parse_timestamp
+
+ADAPTIVE_POLLING = os.environ.get("ADAPTIVE_POLLING", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+POLL_MIN_INTERVAL = int(os.environ.get("POLL_MIN_INTERVAL", 15 * 60))
+POLL_MAX_INTERVAL = int(os.environ.get("POLL_MAX_INTERVAL", 7 * 24 * 60 * 60))
+POLL_EXPLORATION_FRACTION = float(os.environ.get("POLL_EXPLORATION_FRACTION", 0.05))
+# How many times per expected upload interval a channel is polled.
+POLLS_PER_UPLOAD = 4
+logger = logging.getLogger(__name__)
+
+
+class ChannelScheduler:
+    """
+    Decides which channels are due to be polled, based on how often each one
+    uploads. Channels are polled a few times per expected upload interval,
+    bounded by POLL_MIN_INTERVAL and POLL_MAX_INTERVAL, and a small random
+    fraction of channels that aren't due yet are polled anyway in case their
+    cadence has changed.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = ADAPTIVE_POLLING,
+        min_interval: int = POLL_MIN_INTERVAL,
+        max_interval: int = POLL_MAX_INTERVAL,
+        exploration_fraction: float = POLL_EXPLORATION_FRACTION,
+    ) -> None:
+        self._db = DatabaseWrapper("", 0)
+        self.enabled = enabled
+        self._min_interval = min_interval
+        self._max_interval = max(min_interval, max_interval)
+        self._exploration_fraction = exploration_fraction
+
+    def select(self, channels: list[dict]) -> list[dict]:
+        """
+        Returns the channels that should be polled now, in their given order.
+        """
+        if not self.enabled:
+            return channels
+
+        now = time.time()
+        next_due = self._db.get_next_due([row["channel_id"] for row in channels])
+        selected = [
+            row
+            for row in channels
+            if (due := next_due.get(row["channel_id"])) is None
+            or due <= now
+            or random.random() < self._exploration_fraction
+        ]
+        logger.info(f"{len(selected)} of {len(channels)} channels are due.")
+        return selected
+
+    def reschedule(
+        self, channels: list[dict], newest_uploads: dict[str, datetime] | None = None
+    ) -> None:
+        """
+        Sets when each of the (just polled) channels is next due.
+
+        Params:
+            channels: The polled channels' rows.
+            newest_uploads: Channel ID -> the newest upload found in its feed,
+                for channels whose feed had videos since their last_update.
+        """
+        if not self.enabled:
+            return
+
+        now = time.time()
+        newest_uploads = newest_uploads or {}
+        self._db.schedule_channels(
+            {
+                row["channel_id"]: now
+                + self._next_interval(row, newest_uploads.get(row["channel_id"]))
+                for row in channels
+            }
+        )
+
+    def _next_interval(self, row: dict, newest_upload: datetime | None = None) -> float:
+        """
+        Returns the number of seconds until the channel should be polled again.
+        """
+        expected = row.get("upload_interval")
+        try:
+            # last_update is the newest video queued, a newer upload that
+            # hasn't been queued yet still counts.
+            last_upload = parse_timestamp(row["last_update"])
+            if newest_upload is not None:
+                last_upload = max(last_upload, newest_upload)
+            # A channel that's gone quiet for longer than usual is polled less.
+            since_upload = (datetime.now(timezone.utc) - last_upload).total_seconds()
+            expected = max(expected or 0, since_upload)
+        except (KeyError, TypeError, ValueError):
+            pass
+
+        if not expected:
+            return self._min_interval
+        return min(
+            max(expected / POLLS_PER_UPLOAD, self._min_interval), self._max_interval
+        )
@@ -0,0 +1,151 @@
+import json
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from cytubebot.content_searchers.feed_parser import FeedEntry
+
+# Path to a JSON file of filter rules, no filtering when empty.
+CONTENT_FILTER_RULES = os.environ.get("CONTENT_FILTER_RULES", "")
+logger = logging.getLogger(__name__)
+
+
+class _CompiledRules:
+    def __init__(self, rules: list[dict]) -> None:
+        keywords = [
+            re.escape(keyword)
+            for rule in rules
+            for keyword in rule.get("exclude_keywords", [])
+        ]
+        # One pass over the title for every keyword. Patterns are compiled on
+        # their own, joined up their group names could clash and their
+        # backreferences would point at the wrong groups.
+        self.exclude = (
+            [re.compile("|".join(keywords), re.IGNORECASE)] if keywords else []
+        )
+        self.exclude += [
+            re.compile(pattern, re.IGNORECASE)
+            for rule in rules
+            for pattern in rule.get("exclude_patterns", [])
+        ]
+        self.min_age = max((rule.get("min_age", 0) for rule in rules), default=0)
+        limits = [rule["max_videos"] for rule in rules if rule.get("max_videos")]
+        self.max_videos = min(limits) if limits else None
+
+
+class ContentFilter:
+    """
+    Drops videos by title and age before they cost a Shorts check, and caps
+    how many videos a channel can add per run, using rules loaded from a JSON
+    file:
+
+        {
+            "default": {"exclude_keywords": ["live stream"]},
+            "tags": {"MUSIC": {"exclude_patterns": ["\\\\(teaser\\\\)$"]}},
+            "channels": {"UC123": {"min_age": 3600, "max_videos": 3}}
+        }
+
+    A channel gets the default rules plus those of its tags and its ID. Titles
+    matching any `exclude_keywords` (case insensitive) or `exclude_patterns`
+    (regexes) are dropped. Videos younger than `min_age` seconds are left for a
+    later run, and only the newest `max_videos` videos are kept, the rest are
+    skipped. The rules are compiled once per combination of tags and channel,
+    every pattern is checked up front so a bad one fails at startup.
+    """
+
+    def __init__(self, rules_path: str = CONTENT_FILTER_RULES) -> None:
+        self._rules: dict = {}
+        if rules_path:
+            with open(rules_path) as file:
+                self._rules = json.load(file)
+            logger.info(f"Loaded content filter rules from {rules_path}")
+            self._validate()
+        self._compiled: dict[tuple, _CompiledRules] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._rules)
+
+    def filter(
+        self, row: dict, entries: list[FeedEntry], stats: Counter[str] | None = None
+    ) -> list[FeedEntry]:
+        """
+        Returns the channel's entries that pass its title and age rules.
+
+        Params:
+            stats: Optionally counts the entries "excluded" by title, for good,
+                and those "held" back by min_age until a later run.
+        """
+        if not self.enabled:
+            return entries
+
+        rules = self._rules_for(row)
+        newest = datetime.now(timezone.utc) - timedelta(seconds=rules.min_age)
+        kept = []
+        for entry in entries:
+            if any(pattern.search(entry.title) for pattern in rules.exclude):
+                if stats is not None:
+                    stats["excluded"] += 1
+            elif entry.published > newest:
+                if stats is not None:
+                    stats["held"] += 1
+            else:
+                kept.append(entry)
+        if len(kept) < len(entries):
+            logger.debug(
+                f"Filtered {len(entries) - len(kept)} videos from {row['channel_id']}"
+            )
+        return kept
+
+    def limit(self, row: dict, videos: list[dict]) -> list[dict]:
+        """
+        Returns the newest `max_videos` of the channel's videos, given in feed
+        (newest first) order.
+        """
+        if not self.enabled:
+            return videos
+        max_videos = self._rules_for(row).max_videos
+        return videos if max_videos is None else videos[:max_videos]
+
+    def _validate(self) -> None:
+        """
+        Raises:
+            ValueError if any of the rules has an invalid exclude pattern.
+        """
+        sources = [("default", self._rules.get("default", {}))]
+        sources += [
+            (f"tag {tag}", rule) for tag, rule in self._rules.get("tags", {}).items()
+        ]
+        sources += [
+            (f"channel {channel_id}", rule)
+            for channel_id, rule in self._rules.get("channels", {}).items()
+        ]
+        for source, rule in sources:
+            for pattern in rule.get("exclude_patterns", []):
+                try:
+                    re.compile(pattern, re.IGNORECASE)
+                except re.error as err:
+                    raise ValueError(
+                        f"Invalid exclude pattern {pattern!r} for {source}: {err}"
+                    ) from err
+
+    def _rules_for(self, row: dict) -> _CompiledRules:
+        channel_id = row["channel_id"]
+        tags = tuple(
+            sorted(set(row.get("tags") or []) & set(self._rules.get("tags", {})))
+        )
+        has_own = channel_id in self._rules.get("channels", {})
+        key = (channel_id if has_own else None, tags)
+
+        with self._lock:
+            if key not in self._compiled:
+                rules = [self._rules.get("default", {})]
+                rules += [self._rules["tags"][tag] for tag in tags]
+                if has_own:
+                    rules.append(self._rules["channels"][channel_id])
+                self._compiled[key] = _CompiledRules(rules)
+            return self._compiled[key]
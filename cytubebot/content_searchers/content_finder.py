@@ -1,21 +1,133 @@
+import heapq
+import itertools
 import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 from operator import itemgetter
+from typing import Callable, Iterator
 
 import requests
-from bs4 import BeautifulSoup as bs
+from lxml import etree
 
 from cytubebot.common.database_wrapper import DatabaseWrapper
+from cytubebot.common.hedging import get_hedger, latency_histograms
+from cytubebot.common.request_guard import RequestGuard
+from cytubebot.content_searchers.channel_health import ChannelHealth
+from cytubebot.content_searchers.channel_scheduler import ChannelScheduler
+from cytubebot.content_searchers.content_filter import ContentFilter
+from cytubebot.content_searchers.discovery_stats import DiscoveryStats
+from cytubebot.content_searchers.feed_parser import (
+    FeedEntry,
+    parse_entries,
+    parse_timestamp,
+)
+from cytubebot.content_searchers.shorts_classifier import ShortsClassifier
 
+FETCH_WORKERS = int(os.environ.get("CONTENT_FETCH_WORKERS", 8))
+# Max videos discovery may get ahead of whatever is consuming iter_content.
+CONTENT_QUEUE_SIZE = int(os.environ.get("CONTENT_QUEUE_SIZE", 50))
+# The channel fields discovery reads.
+DISCOVERY_FIELDS = (
+    "channel_id",
+    "channel_name",
+    "last_update",
+    "tags",
+    "upload_interval",
+)
+# Processes to parse feeds in, off the bot's GIL. 0 parses in the fetching thread.
+PARSE_PROCESSES = int(os.environ.get("CONTENT_PARSE_PROCESSES", 0))
+# Feed statuses that mean the channel itself is gone, rather than YouTube failing.
+CHANNEL_ERROR_STATUSES = (404, 410)
+FEED_URL = "https://www.youtube.com/feeds/videos.xml?channel_id={}"
 logger = logging.getLogger(__name__)
 
+# Marks the end of iter_content's queue.
+_DONE = object()
+
+# Number of processes -> the pool shared by every ContentFinder of that size.
+_parse_pools: dict[int, ProcessPoolExecutor] = {}
+_parse_pool_lock = threading.Lock()
+
+
+def _get_parse_pool(processes: int) -> ProcessPoolExecutor:
+    """
+    Returns the process pool with `processes` workers shared by every
+    ContentFinder, created on first use.
+    """
+    with _parse_pool_lock:
+        if processes not in _parse_pools:
+            # Forking a process with running threads (socket.io, fetchers) isn't
+            # safe, start the workers fresh.
+            _parse_pools[processes] = ProcessPoolExecutor(
+                max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _parse_pools[processes]
+
+
+def _reset_parse_pool(processes: int, pool: ProcessPoolExecutor) -> None:
+    """
+    Drops a broken pool, so the next _get_parse_pool call starts a new one.
+    """
+    with _parse_pool_lock:
+        if _parse_pools.get(processes) is pool:
+            del _parse_pools[processes]
+    pool.shutdown(wait=False)
+
 
 class ContentFinder:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        workers: int = FETCH_WORKERS,
+        queue_size: int = CONTENT_QUEUE_SIZE,
+        parse_processes: int = PARSE_PROCESSES,
+    ) -> None:
         self._db = DatabaseWrapper("", 0)
+        self._shorts_classifier = ShortsClassifier()
+        self._scheduler = ChannelScheduler()
+        self._health = ChannelHealth()
+        self._stats = DiscoveryStats()
+        self._filter = ContentFilter()
+        self._hedger = get_hedger("feed")
+        self._guard = RequestGuard()
+        self._workers = max(1, workers)
+        self._queue_size = max(1, queue_size)
+        self._parse_processes = parse_processes
+        self.failed_channels: list[str] = []
+        # Channels the latest run ran out of time to check.
+        self.unreached_channels: list[str] = []
+        # False if the latest run stopped before it had read every channel, so
+        # channels beyond those in unreached_channels went unchecked too.
+        self.scan_complete = True
+        # HTTP status code -> count for the feed requests of the latest run.
+        self.feed_responses: Counter[int] = Counter()
+        # Channel ID -> the channel's DiscoveryStats record for the latest run.
+        self.channel_stats: dict[str, dict] = {}
+        # Channel ID -> the newest upload in its feed, for the latest run.
+        self.newest_uploads: dict[str, datetime] = {}
+        self._stats_lock = threading.Lock()
 
-    def find_content(self, tag: str | None = None) -> list[dict]:
+    def find_content(
+        self,
+        tag: str | None = None,
+        channels: list[dict] | None = None,
+        within: float | None = None,
+    ) -> list[dict]:
         """
+        Collects everything iter_content yields.
+
         returns:
             A list of dicts, each video comes in a dict.
             Comes in the form:
@@ -27,62 +139,467 @@ class ContentFinder:
                 }
             ]
         """
-        content = []
-        channels = self._db.get_channels(tag)
+        return list(self.iter_content(tag, channels, within))
+
+    def iter_content(
+        self,
+        tag: str | None = None,
+        channels: list[dict] | None = None,
+        within: float | None = None,
+        journal: bool = False,
+    ) -> Iterator[dict]:
+        """
+        Yields the new videos of all (or all tagged) channels, oldest first, in
+        the same form and order as find_content returns them. If `channels`
+        is given only those channel rows are checked instead.
 
-        for row in channels:
-            logger.debug(f"{row=}")
-            channel_id = row["channel_id"]
-            name = row["channel_name"]
-            dt = datetime.fromisoformat(row["last_update"])
-            logger.info(f"Getting content for: {name}")
+        If `within` seconds pass before every channel has been checked, the
+        videos found so far are yielded, in order, and the remaining channels
+        are recorded in `unreached_channels`. Their last_update is untouched,
+        so they're checked by the next run. If the channels hadn't all been
+        read from the DB by then, `scan_complete` is False.
 
-            channel = (
-                f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
-            )
-            resp = requests.get(channel, timeout=60)
-            page = resp.text
-            soup = bs(page, "lxml")
+        The feeds are fetched concurrently, using up to `workers` threads, in a
+        background thread. A channel that fails to fetch or parse is logged and
+        recorded in `failed_channels` rather than aborting the run. With
+        adaptive polling enabled only the channels the ChannelScheduler
+        considers due are fetched.
 
-            for item in soup.find_all("entry"):
-                published = item.find_all("published")[0].text
-                published = datetime.fromisoformat(published)
+        A video is yielded as soon as no unfetched channel can have an earlier
+        one, i.e. once it's older than every remaining channel's last_update.
+        Discovery pauses while `queue_size` videos are waiting to be consumed.
 
-                if published < dt or published == dt:
-                    logger.info(f"No more new videos for {name}")
-                    break
+        With `journal`, each video is pushed to the content journal as it's
+        discovered, before it's yielded, so videos waiting in the queue aren't
+        lost if the consumer is interrupted.
+        """
+        videos: queue.Queue = queue.Queue(maxsize=self._queue_size)
+        stop = threading.Event()
+        deadline = None if within is None else time.monotonic() + within
 
-                title = item.find_all("title")[0].text.casefold()
-                video_id = item.find_all("yt:videoid")[0].text
+        def emit(item: object) -> bool:
+            while not stop.is_set():
+                try:
+                    videos.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
 
-                if not self._is_short(title, video_id):
-                    c = {
-                        "channel_id": channel_id,
-                        "datetime": published,
-                        "video_id": video_id,
-                    }
-                    content.append(c)
+        def emit_video(video: dict) -> bool:
+            if stop.is_set():
+                return False
+            if journal:
+                self._db.push_journal([video])
+            return emit(video)
 
-        content = sorted(content, key=itemgetter("datetime"))
+        def discover() -> None:
+            try:
+                self._merge_channels(tag, emit_video, channels, deadline)
+                emit(_DONE)
+            except Exception as err:
+                logger.exception("Content discovery failed.")
+                emit(err)
 
-        return content
+        threading.Thread(target=discover, name="content-discovery", daemon=True).start()
+        try:
+            while (item := videos.get()) is not _DONE:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Unblocks discovery if the consumer stops early.
+            stop.set()
 
-    def _is_short(self, title: str, id: str) -> bool:
+    def _merge_channels(
+        self,
+        tag: str | None,
+        emit: Callable[[dict], bool],
+        rows: list[dict] | None = None,
+        deadline: float | None = None,
+    ) -> None:
         """
-        Returns True if video id is a YT Shorts video.
+        Fetches every channel and k-way merges their videos through a heap,
+        passing each video to `emit` as soon as ordering allows. Stops early if
+        `emit` returns False, or once the `deadline` (a time.monotonic value)
+        has passed.
         """
-        if "#shorts" in title:
+        failed: list[str] = []
+        # Channel ID -> error, for channels whose own feed is failing.
+        errors: dict[str, str] = {}
+        # Channel ID -> error, for feeds that got a 5xx.
+        server_errors: dict[str, str] = {}
+        unreached: list[str] = []
+        polled: list[dict] = []
+        # Heap of (datetime, channel index, feed position, video), the indexes
+        # break ties the same way a stable sort of all channels' videos would.
+        ready: list[tuple[datetime, int, int, dict]] = []
+        # Channel index -> last_update, for channels that haven't been fetched.
+        lower_bounds: dict[int, datetime] = {}
+        # Channel index -> row, dropped once the channel has been fetched.
+        channels: dict[int, dict] = {}
+        # Heap of (last_update, channel index) waiting to be fetched, channels
+        # with the oldest last_update hold back the merge so go first.
+        pending: list[tuple[datetime, int]] = []
+        batches = (
+            self._db.iter_channels(tag, fields=DISCOVERY_FIELDS)
+            if rows is None
+            else iter([rows])
+        )
+        scanned = False
+        candidates = 0
+        indexes = itertools.count()
+        started = datetime.now()
+        start = time.monotonic()
+        self.feed_responses = Counter()
+        self.channel_stats = {}
+        self.newest_uploads = {}
+
+        def load_batch() -> None:
+            nonlocal scanned, candidates
+            batch = next(batches, None)
+            if batch is None:
+                scanned = True
+                return
+
+            candidates += len(batch)
+            for row in self._health.select(self._scheduler.select(batch)):
+                index = next(indexes)
+                try:
+                    lower_bounds[index] = parse_timestamp(row["last_update"])
+                except Exception:
+                    name = row.get("channel_name") or row["channel_id"]
+                    logger.exception(f"Invalid last_update for: {name}")
+                    failed.append(name)
+                    continue
+                channels[index] = row
+                heapq.heappush(pending, (lower_bounds[index], index))
+
+        def flush(watermark: datetime | None) -> bool:
+            while ready and (watermark is None or ready[0][0] <= watermark):
+                if not emit(heapq.heappop(ready)[-1]):
+                    logger.info("Content consumer stopped, ending discovery.")
+                    return False
             return True
 
-        shorts_url = f"https://www.youtube.com/shorts/{id}"
-        resp = requests.head(
-            shorts_url, cookies={"CONSENT": "YES+1"}, timeout=60, allow_redirects=False
+        in_flight: dict[Future, int] = {}
+        executor = ThreadPoolExecutor(
+            max_workers=self._workers, thread_name_prefix="content"
         )
-        if resp.status_code == 303 or resp.status_code == 302:
-            return False
-        # Assume any 2XX successfully reached a shorts page
-        elif 200 <= resp.status_code <= 299:
-            return True
+
+        try:
+            while not scanned or in_flight:
+                # Fetching starts with the first page, the rest of the scan is
+                # read between fetches.
+                if not scanned:
+                    load_batch()
+                    # Videos fetched during the scan were held back for it, don't
+                    # leave them waiting on the next fetch to finish.
+                    if scanned and not flush(min(lower_bounds.values(), default=None)):
+                        return
+                while pending and len(in_flight) < self._workers:
+                    index = heapq.heappop(pending)[1]
+                    in_flight[
+                        executor.submit(self._discover_channel, channels[index])
+                    ] = index
+                if not in_flight:
+                    continue
+
+                if not scanned:
+                    timeout: float | None = 0
+                elif deadline is None:
+                    timeout = None
+                else:
+                    timeout = max(0, deadline - time.monotonic())
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done and deadline is not None and time.monotonic() >= deadline:
+                    unreached = [
+                        channels[index].get("channel_name")
+                        or channels[index]["channel_id"]
+                        for index in lower_bounds
+                    ]
+                    # The scan may have just been one page short of done.
+                    if not scanned and next(batches, None) is None:
+                        scanned = True
+                    logger.info(
+                        f"Deadline reached, {len(unreached)} channels unchecked"
+                        + ("." if scanned else " and the scan is incomplete.")
+                    )
+                    break
+
+                for future in done:
+                    index = in_flight.pop(future)
+                    del lower_bounds[index]
+                    row = channels.pop(index)
+                    try:
+                        for position, video in enumerate(future.result()):
+                            heapq.heappush(
+                                ready, (video["datetime"], index, position, video)
+                            )
+                        polled.append(row)
+                    except Exception as err:
+                        name = row.get("channel_name") or row["channel_id"]
+                        logger.exception(f"Failed to get content for: {name}")
+                        failed.append(name)
+                        error = self._describe_error(err)
+                        with self._stats_lock:
+                            self.channel_stats.setdefault(row["channel_id"], {})[
+                                "error"
+                            ] = error
+                        # Only back off channels for errors they cause, YouTube
+                        # or the network failing isn't the channel's fault.
+                        if self._is_channel_error(err):
+                            errors[row["channel_id"]] = error
+                        elif self._is_server_error(err):
+                            server_errors[row["channel_id"]] = error
+
+                # Until the scan is done an unseen channel could hold any video.
+                if scanned and not flush(min(lower_bounds.values(), default=None)):
+                    return
+
+            # Whatever's left can't be held back any more, e.g. at the deadline.
+            if not flush(None):
+                return
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            # A 5xx is only down to the channel while the rest of YouTube is
+            # answering, i.e. other feeds succeeded and the breaker is closed.
+            if polled and not self._guard.breaker(FEED_URL).is_open:
+                errors.update(server_errors)
+            # Failed channels aren't rescheduled so they're retried next run.
+            self._scheduler.reschedule(polled, dict(self.newest_uploads))
+            self._health.record_successes([row["channel_id"] for row in polled])
+            self._health.record_failures(errors)
+            self.failed_channels = failed
+            self.unreached_channels = unreached
+            self.scan_complete = scanned
+            self._record_stats(
+                started, time.monotonic() - start, candidates, len(failed)
+            )
+
+        not_modified = self.feed_responses[304]
+        fetched = self.feed_responses[200]
+        if not_modified + fetched:
+            logger.info(
+                f"Feed responses: {not_modified} not modified, {fetched} fetched "
+                f"({not_modified / (not_modified + fetched):.0%} cache hit rate)"
+            )
+        shorts_cache = self._shorts_classifier.cache
+        logger.info(
+            f"Shorts cache: {shorts_cache.hits} hits, {shorts_cache.misses} misses"
+        )
+        histogram = self._hedger.histogram
+        logger.info(
+            f"Feed latency: p50<={histogram.percentile(50)}s, "
+            f"p95<={histogram.percentile(95)}s, {self._hedger.hedged} hedged"
+        )
+
+    def _record_stats(
+        self, started: datetime, duration: float, channels: int, failed: int
+    ) -> None:
+        with self._stats_lock:
+            records = dict(self.channel_stats)
+        histogram = self._hedger.histogram
+        run = {
+            "id": f"{started.timestamp():.3f}",
+            "started": started.isoformat(),
+            "duration": round(duration, 3),
+            "channels": channels,
+            "checked": len(records),
+            "fetch": round(sum(r.get("fetch", 0) for r in records.values()), 3),
+            "shorts": round(sum(r.get("shorts", 0) for r in records.values()), 3),
+            "not_modified": self.feed_responses[304],
+            "failed": failed,
+            "unreached": len(self.unreached_channels),
+            "scan_complete": self.scan_complete,
+            "videos": sum(r.get("new", 0) for r in records.values()),
+            "feed_p50": histogram.percentile(50),
+            "feed_p95": histogram.percentile(95),
+            # The process's request latencies so far, for the stats CLI.
+            "latency": latency_histograms(),
+        }
+        self._stats.record(run, records)
+
+    def take_pending_content(self, tag: str | None = None) -> list[dict] | None:
+        """
+        Returns the videos pre-computed by the ContentPoller or pushed by the
+        WebSubReceiver for the tag, minus any that have been added since (e.g.
+        by a run for another tag), or None if there's no pending list to use.
+        """
+        pending = self._db.pop_pending_content(tag)
+        if pending is None:
+            return None
+
+        # Only the pending videos' channels, not the whole tag.
+        rows = self._db.get_channels_by_id(
+            list({video["channel_id"] for video in pending}), fields=("last_update",)
+        )
+        last_updates = {
+            channel_id: parse_timestamp(row["last_update"])
+            for channel_id, row in rows.items()
+        }
+        # Lists can be appended to out of order, and with repeats, by the
+        # WebSubReceiver.
+        content = {
+            video["video_id"]: video
+            for video in pending
+            if video["channel_id"] in last_updates
+            and video["datetime"] > last_updates[video["channel_id"]]
+        }
+        return sorted(content.values(), key=itemgetter("datetime"))
+
+    def _describe_error(self, err: Exception) -> str:
+        """
+        Returns a short description of why a channel failed, for reports.
+        """
+        if isinstance(err, requests.HTTPError) and err.response is not None:
+            return f"HTTP {err.response.status_code}"
+        return type(err).__name__
+
+    def _is_channel_error(self, err: Exception) -> bool:
+        """
+        Returns whether the error is down to the channel, i.e. its feed is gone
+        or can't be parsed, rather than rate limiting, timeouts or connection
+        errors. Server errors depend on the rest of the run, see _merge_channels.
+        """
+        if isinstance(err, requests.HTTPError):
+            return (
+                err.response is not None
+                and err.response.status_code in CHANNEL_ERROR_STATUSES
+            )
+        return isinstance(err, (etree.XMLSyntaxError, ValueError))
+
+    def _is_server_error(self, err: Exception) -> bool:
+        return (
+            isinstance(err, requests.HTTPError)
+            and err.response is not None
+            and err.response.status_code >= 500
+        )
+
+    def _discover_channel(self, row: dict) -> list[dict]:
+        """
+        Returns the channel's new non-Shorts videos, in feed order.
+        """
+        channel_id = row["channel_id"]
+        record: dict = {"name": row.get("channel_name")}
+        with self._stats_lock:
+            self.channel_stats[channel_id] = record
+
+        entries, validators = self._fetch_channel(row, record)
+        if entries:
+            # Whether or not they're queued, the scheduler follows real uploads.
+            with self._stats_lock:
+                self.newest_uploads[channel_id] = max(
+                    entry.published for entry in entries
+                )
+        # Filtered videos never need a Shorts check.
+        filter_stats: Counter[str] = Counter()
+        filtered = self._filter.filter(row, entries, filter_stats)
+        record["filtered"] = len(entries) - len(filtered)
+        record["held"] = filter_stats["held"]
+        entries = filtered
+
+        start = time.monotonic()
+        checks: Counter[str] = Counter()
+        verdicts = (
+            self._shorts_classifier.classify(
+                {entry.video_id: entry.title.casefold() for entry in entries}, checks
+            )
+            if entries
+            else {}
+        )
+        record["shorts"] = round(time.monotonic() - start, 3)
+        record["shorts_checked"] = checks["checked"]
+        record["shorts_unresolved"] = checks["unresolved"]
+        videos = [
+            {
+                "channel_id": channel_id,
+                "datetime": entry.published,
+                "video_id": entry.video_id,
+            }
+            for entry in entries
+            if not verdicts[entry.video_id]
+        ]
+        videos = self._filter.limit(row, videos)
+        record["new"] = len(videos)
+
+        # Only keep the validators once there's nothing left to queue from this
+        # feed, otherwise videos from an interrupted run (held back by a
+        # min_age filter, or whose Shorts check failed) would be hidden behind
+        # a 304 until the channel next uploads. Excluded videos are never
+        # queued, so they don't count.
+        if videos or record["held"] or checks["unresolved"]:
+            self._db.set_feed_validators(channel_id, {})
+        elif validators is not None:
+            self._db.set_feed_validators(channel_id, validators)
+
+        return videos
+
+    def _fetch_channel(
+        self, row: dict, record: dict | None = None
+    ) -> tuple[list[FeedEntry], dict | None]:
+        """
+        Returns the entries published since the channel's last_update and the
+        feed's cache validators, or None if the feed was unchanged (304). The
+        fetch's stats are added to `record`, if given.
+        """
+        if record is None:
+            record = {}
+        logger.debug(f"{row=}")
+        channel_id = row["channel_id"]
+        name = row["channel_name"]
+        dt = parse_timestamp(row["last_update"])
+        logger.info(f"Getting content for: {name}")
+
+        channel = FEED_URL.format(channel_id)
+        validators = self._db.get_feed_validators(channel_id)
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        start = time.monotonic()
+        resp = self._hedger.call(
+            lambda: self._guard.get(channel, headers=headers, timeout=60)
+        )
+        record["fetch"] = round(time.monotonic() - start, 3)
+        record["status"] = resp.status_code
+        record["bytes"] = len(resp.content)
+        with self._stats_lock:
+            self.feed_responses[resp.status_code] += 1
+
+        if resp.status_code == 304:
+            logger.info(f"Feed unchanged for: {name}")
+            return [], None
+        resp.raise_for_status()
+
+        if self._parse_processes > 0:
+            entries = self._parse_in_pool(resp.content, dt)
         else:
-            logger.info(f"Received {resp.status_code=} from {shorts_url}")
-            return True
+            entries = parse_entries(resp.content, dt)
+        record["entries"] = len(entries)
+        if not entries:
+            logger.info(f"No new videos for {name}")
+
+        return entries, {
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+        }
+
+    def _parse_in_pool(self, feed: bytes, since: datetime) -> list[FeedEntry]:
+        """
+        Parses the feed in the process pool. If a worker died the pool is
+        broken for good, so it's replaced and the parse tried once more.
+        """
+        pool = _get_parse_pool(self._parse_processes)
+        try:
+            return pool.submit(parse_entries, feed, since).result()
+        except BrokenProcessPool:
+            logger.warning("Feed parsing pool is broken, restarting it.")
+            _reset_parse_pool(self._parse_processes, pool)
+        return (
+            _get_parse_pool(self._parse_processes)
+            .submit(parse_entries, feed, since)
+            .result()
+        )
@@ -0,0 +1,79 @@
+import logging
+import os
+import random
+import threading
+
+from cytubebot.common.database_wrapper import DatabaseWrapper
+from cytubebot.content_searchers.content_finder import ContentFinder
+
+POLL_INTERVAL = int(os.environ.get("CONTENT_POLL_INTERVAL", 0))
+POLL_JITTER = int(os.environ.get("CONTENT_POLL_JITTER", 60))
+# "ALL" pre-warms the untagged run over every channel.
+POLL_TAGS = os.environ.get("CONTENT_POLL_TAGS", "ALL").upper().split()
+logger = logging.getLogger(__name__)
+
+
+class ContentPoller:
+    """
+    Runs content discovery in a background thread every `interval` (+/-
+    `jitter`) seconds and stores the results in Redis as a pending list per
+    tag, so `content` only has to queue what's already been found.
+    """
+
+    def __init__(
+        self,
+        interval: int = POLL_INTERVAL,
+        jitter: int = POLL_JITTER,
+        tags: list[str] = POLL_TAGS,
+    ) -> None:
+        self._db = DatabaseWrapper("", 0)
+        self._content_finder = ContentFinder()
+        self._interval = interval
+        self._jitter = min(jitter, interval)
+        self._tags: list[str | None] = [
+            None if tag == "ALL" else tag for tag in tags
+        ] or [None]
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._interval > 0
+
+    def start(self) -> None:
+        if not self.enabled or self._thread is not None:
+            return
+
+        logger.info(
+            f"Starting content poller every {self._interval}s (+/-{self._jitter}s) "
+            f"for tags {self._tags}"
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="content-poller", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def poll(self) -> None:
+        """
+        Adds newly found videos to the pending list of every configured tag.
+        """
+        # Outlive a single missed poll, but not a dead poller.
+        max_age = 2 * self._interval + self._jitter
+        for tag in self._tags:
+            content = self._content_finder.find_content(tag)
+            # Merged rather than replaced, a poll skips channels that aren't due
+            # and the WebSubReceiver adds to the same lists.
+            self._db.merge_pending_content(tag, content, max_age)
+
+    def _run(self) -> None:
+        # Spread the first poll out so replicas don't all start together.
+        delay = random.uniform(0, self._jitter)
+        while not self._stop.wait(delay):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Content poll failed.")
+            delay = max(0, self._interval + random.uniform(-self._jitter, self._jitter))
@@ -0,0 +1,98 @@
+import logging
+import os
+
+from cytubebot.common.database_wrapper import DatabaseWrapper
+
+# Discovery runs whose stats are kept, and for how long at most.
+STATS_RETENTION_RUNS = int(os.environ.get("STATS_RETENTION_RUNS", 50))
+STATS_RETENTION_SECONDS = int(
+    os.environ.get("STATS_RETENTION_SECONDS", 7 * 24 * 60 * 60)
+)
+logger = logging.getLogger(__name__)
+
+
+class DiscoveryStats:
+    """
+    Stores a summary of every discovery run and a record per channel checked
+    in it (fetch time, response size, entries, new videos, Shorts checks and
+    errors), keeping only the latest `retention_runs` runs.
+    """
+
+    def __init__(
+        self,
+        retention_runs: int = STATS_RETENTION_RUNS,
+        retention_seconds: int = STATS_RETENTION_SECONDS,
+    ) -> None:
+        self._db = DatabaseWrapper("", 0)
+        self._retention_runs = max(1, retention_runs)
+        self._retention_seconds = retention_seconds
+
+    def record(self, run: dict, channels: dict[str, dict]) -> None:
+        """
+        Params:
+            run: The run's summary, must include a unique "id".
+            channels: A dict of channel ID -> the channel's record for the run.
+        """
+        try:
+            self._db.add_discovery_run(
+                run, channels, self._retention_runs, self._retention_seconds
+            )
+        except Exception:
+            # Stats are never worth failing a run over.
+            logger.exception("Failed to store discovery stats.")
+
+    def slowest_channels(self, runs: int = 10, count: int = 5) -> list[dict]:
+        """
+        Returns the `count` channels with the highest mean fetch time over the
+        latest `runs` runs, slowest first.
+        """
+        totals: dict[str, dict] = {}
+        for run in self._db.get_discovery_runs(runs):
+            for channel_id, record in self._db.get_discovery_run_channels(
+                run["id"]
+            ).items():
+                total = totals.setdefault(
+                    channel_id,
+                    {"channel_id": channel_id, "name": record.get("name"), "runs": 0},
+                )
+                total["runs"] += 1
+                for field in ("fetch", "bytes", "shorts_checked"):
+                    total[field] = total.get(field, 0) + record.get(field, 0)
+                if record.get("error"):
+                    total["errors"] = total.get("errors", 0) + 1
+
+        for total in totals.values():
+            total["fetch"] = round(total["fetch"] / total["runs"], 3)
+        return sorted(totals.values(), key=lambda t: t["fetch"], reverse=True)[:count]
+
+    def dump(self, runs: int = 10, count: int = 20) -> dict:
+        """
+        Returns the latest run summaries and slowest channels, for the CLI.
+        """
+        return {
+            "runs": self._db.get_discovery_runs(runs),
+            "slowest_channels": self.slowest_channels(runs, count),
+        }
+
+    def report(self) -> str:
+        """
+        Returns a chat sized summary of the latest run and slowest channels.
+        """
+        latest = self._db.get_discovery_runs(1)
+        if not latest:
+            return "No discovery runs recorded yet."
+
+        run = latest[0]
+        msg = (
+            f"Last run: {run['checked']} of {run['channels']} channels in "
+            f"{run['duration']}s (fetching {run['fetch']}s, Shorts checks "
+            f"{run['shorts']}s in total), {run['not_modified']} unchanged, "
+            f"{run['failed']} failed, {run['videos']} new videos."
+        )
+        slowest = self.slowest_channels()
+        if slowest:
+            msg += " Slowest: " + ", ".join(
+                f"{total['name'] or total['channel_id']} {total['fetch']}s"
+                for total in slowest
+            )
+        return msg
@@ -0,0 +1,166 @@
+import logging
+import math
+import os
+import random
+import socket
+import threading
+import time
+import zlib
+
+from cytubebot.common.database_wrapper import DatabaseWrapper
+from cytubebot.content_searchers.content_finder import DISCOVERY_FIELDS, ContentFinder
+
+DISCOVERY_SHARDS = int(os.environ.get("DISCOVERY_SHARDS", 16))
+DISCOVERY_INTERVAL = int(os.environ.get("DISCOVERY_INTERVAL", 15 * 60))
+# A worker that hasn't renewed its leases for this long is considered dead.
+SHARD_LEASE_TTL = int(os.environ.get("SHARD_LEASE_TTL", 60))
+logger = logging.getLogger(__name__)
+
+
+def shard_of(channel_id: str, shards: int) -> int:
+    """
+    Returns the shard the channel belongs to, the same in every process.
+    """
+    return zlib.crc32(channel_id.encode()) % shards
+
+
+class DiscoveryWorker:
+    """
+    Discovers content for a share of the channels, so discovery can be split
+    across several processes or hosts.
+
+    The channels are split into `shards` by channel ID. Each worker leases an
+    even share of the shards in Redis and renews the leases from a heartbeat
+    thread, a dead worker's leases expire and are picked up by the others.
+    Every shard is discovered once per `interval` and the new videos are added
+    to the pending lists that `content` takes from.
+    """
+
+    def __init__(
+        self,
+        shards: int = DISCOVERY_SHARDS,
+        interval: int = DISCOVERY_INTERVAL,
+        lease_ttl: int = SHARD_LEASE_TTL,
+    ) -> None:
+        self._db = DatabaseWrapper("", 0)
+        self._content_finder = ContentFinder()
+        self._shards = max(1, shards)
+        self._interval = interval
+        self._lease_ttl = lease_ttl
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._held: set[int] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    @property
+    def shards(self) -> set[int]:
+        with self._lock:
+            return set(self._held)
+
+    def run(self) -> None:
+        """
+        Discovers the worker's shards as they become due, until stopped.
+        """
+        logger.info(f"Starting discovery worker {self.worker_id}")
+        self.rebalance()
+        threading.Thread(
+            target=self._heartbeat, name="discovery-heartbeat", daemon=True
+        ).start()
+
+        try:
+            while not self._stop.is_set():
+                due = [shard for shard in sorted(self.shards) if self._is_due(shard)]
+                if due:
+                    self.discover(*due)
+                self._stop.wait(min(self._lease_ttl / 3, self._interval))
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """
+        Stops the worker and hands its shards back straight away.
+        """
+        self._stop.set()
+        with self._lock:
+            for shard in self._held:
+                self._db.release_shard(shard, self.worker_id)
+            self._held.clear()
+
+    def rebalance(self) -> None:
+        """
+        Renews the worker's leases and takes or gives up shards so every live
+        worker holds an even share.
+        """
+        workers = self._db.register_worker(self.worker_id, self._lease_ttl)
+        share = math.ceil(self._shards / max(1, workers))
+
+        with self._lock:
+            for shard in list(self._held):
+                if not self._db.renew_shard(shard, self.worker_id, self._lease_ttl):
+                    logger.warning(f"Lost the lease on shard {shard}")
+                    self._held.discard(shard)
+
+            for shard in sorted(self._held)[share:]:
+                self._db.release_shard(shard, self.worker_id)
+                self._held.discard(shard)
+
+            free = [shard for shard in range(self._shards) if shard not in self._held]
+            # Workers starting together shouldn't all race for the same shards.
+            random.shuffle(free)
+            for shard in free:
+                if len(self._held) >= share:
+                    break
+                if self._db.acquire_shard(shard, self.worker_id, self._lease_ttl):
+                    self._held.add(shard)
+
+        logger.debug(f"Holding shards {sorted(self._held)} of {workers} workers")
+
+    def discover(self, *shards: int) -> None:
+        """
+        Finds the shards' new videos and adds them to the pending lists, one
+        shard at a time. The channels are read in a single scan for all the
+        shards.
+        """
+        rows: dict[int, list[dict]] = {shard: [] for shard in shards}
+        for batch in self._db.iter_channels(fields=DISCOVERY_FIELDS):
+            for row in batch:
+                shard = shard_of(row["channel_id"], self._shards)
+                if shard in rows:
+                    rows[shard].append(row)
+
+        for shard in shards:
+            if self._stop.is_set():
+                break
+            self._discover_shard(shard, rows[shard])
+
+    def _discover_shard(self, shard: int, rows: list[dict]) -> None:
+        # Outlive a missed run, but not the whole worker pool going down.
+        max_age = 2 * self._interval + self._lease_ttl
+
+        try:
+            content = self._content_finder.find_content(channels=rows)
+            added = self._db.add_discovered_content(content, max_age)
+        except Exception:
+            logger.exception(f"Failed to discover shard {shard}")
+            return
+
+        # Lets `content` use the pending lists rather than polling every feed.
+        tags = {None, *(tag for row in rows for tag in row.get("tags") or [])}
+        for tag in tags:
+            self._db.add_pending_content(tag, [], max_age)
+
+        self._db.set_shard_run(shard, time.time())
+        logger.info(
+            f"Discovered shard {shard}: {len(rows)} channels, {added} new videos"
+        )
+
+    def _is_due(self, shard: int) -> bool:
+        last_run = self._db.get_shard_run(shard)
+        return last_run is None or time.time() - last_run >= self._interval
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(self._lease_ttl / 3):
+            try:
+                self.rebalance()
+            except Exception:
+                logger.exception("Failed to renew shard leases.")
@@ -0,0 +1,70 @@
+import logging
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import Iterator, NamedTuple
+
+from lxml import etree
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+YT_NS = "{http://www.youtube.com/xml/schemas/2015}"
+logger = logging.getLogger(__name__)
+
+
+class FeedEntry(NamedTuple):
+    video_id: str
+    title: str
+    published: datetime
+
+
+def parse_timestamp(value: str) -> datetime:
+    """
+    Parses an ISO 8601 timestamp (e.g. a channel's last_update), assuming UTC
+    if it has no timezone so it can be compared with feed timestamps.
+    """
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def iter_entries(feed: bytes, since: datetime | None = None) -> Iterator[FeedEntry]:
+    """
+    Incrementally parses a YouTube channel feed (videos.xml), yielding one
+    entry at a time in feed order, i.e. newest first.
+
+    Parsing stops at the first entry published at or before `since`, the
+    rest of the document is never read. Entries are cleared once yielded so
+    memory use stays flat regardless of the feed size.
+
+    Raises:
+        ValueError if an entry is missing its video ID or published date.
+        lxml.etree.XMLSyntaxError if the feed isn't valid XML.
+    """
+    context = etree.iterparse(
+        BytesIO(feed), events=("end",), tag=f"{ATOM_NS}entry", resolve_entities=False
+    )
+    for _, elem in context:
+        video_id = elem.findtext(f"{YT_NS}videoId")
+        published_str = elem.findtext(f"{ATOM_NS}published")
+        if not video_id or not published_str:
+            raise ValueError("Feed entry is missing its videoId or published date.")
+
+        published = datetime.fromisoformat(published_str)
+        if since is not None and published <= since:
+            logger.debug(f"Reached {published=} at or before {since=}, stopping.")
+            return
+
+        yield FeedEntry(video_id, elem.findtext(f"{ATOM_NS}title") or "", published)
+
+        # Free the entry and any siblings already processed.
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+
+def parse_entries(feed: bytes, since: datetime | None = None) -> list[FeedEntry]:
+    """
+    Parses every entry iter_entries would yield in one go. Module level and
+    returning plain tuples so it can be run in a worker process.
+    """
+    return list(iter_entries(feed, since=since))
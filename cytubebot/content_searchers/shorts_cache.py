@@ -0,0 +1,59 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from cytubebot.common.database_wrapper import DatabaseWrapper
+
+SHORTS_CACHE_TTL = int(os.environ.get("SHORTS_CACHE_TTL", 60 * 60 * 24 * 30))
+SHORTS_CACHE_SIZE = int(os.environ.get("SHORTS_CACHE_SIZE", 4096))
+logger = logging.getLogger(__name__)
+
+
+class ShortsCache:
+    """
+    Caches whether a video is a YT Shorts video. A bounded in-process LRU sits
+    in front of Redis, which shares verdicts across runs and bot instances.
+    """
+
+    def __init__(
+        self, ttl: int = SHORTS_CACHE_TTL, max_size: int = SHORTS_CACHE_SIZE
+    ) -> None:
+        self._db = DatabaseWrapper("", 0)
+        self._ttl = ttl
+        self._max_size = max(1, max_size)
+        self._lru: OrderedDict[str, bool] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, video_id: str) -> bool | None:
+        """
+        Returns the cached verdict for the video, or None if it's unknown.
+        """
+        with self._lock:
+            if video_id in self._lru:
+                self._lru.move_to_end(video_id)
+                self.hits += 1
+                return self._lru[video_id]
+
+        verdict = self._db.get_short_verdict(video_id)
+
+        with self._lock:
+            if verdict is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._remember(video_id, verdict)
+        return verdict
+
+    def set(self, video_id: str, is_short: bool) -> None:
+        self._db.set_short_verdict(video_id, is_short, self._ttl)
+        with self._lock:
+            self._remember(video_id, is_short)
+
+    def _remember(self, video_id: str, is_short: bool) -> None:
+        self._lru[video_id] = is_short
+        self._lru.move_to_end(video_id)
+        while len(self._lru) > self._max_size:
+            self._lru.popitem(last=False)
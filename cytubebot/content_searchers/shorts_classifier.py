@@ -0,0 +1,120 @@
+import logging
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cytubebot.common.hedging import get_hedger
+from cytubebot.common.request_guard import RequestGuard
+from cytubebot.content_searchers.shorts_cache import ShortsCache
+
+SHORTS_CHECK_CONCURRENCY = int(os.environ.get("SHORTS_CHECK_CONCURRENCY", 8))
+logger = logging.getLogger(__name__)
+
+
+class ShortsClassifier:
+    """
+    Decides which videos are YT Shorts videos, in batches. Videos that can't
+    be classified from their title or the ShortsCache are checked concurrently
+    over a shared keep-alive connection pool. The worker threads are shared
+    by every batch, so concurrent batches stay within the concurrency cap.
+    """
+
+    def __init__(self, concurrency: int = SHORTS_CHECK_CONCURRENCY) -> None:
+        self._concurrency = max(1, concurrency)
+        self._cache = ShortsCache()
+        self._session = requests.Session()
+        self._session.mount(
+            "https://",
+            HTTPAdapter(pool_connections=1, pool_maxsize=self._concurrency),
+        )
+        self._hedger = get_hedger("shorts")
+        self._guard = RequestGuard()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._concurrency, thread_name_prefix="shorts"
+        )
+
+    @property
+    def cache(self) -> ShortsCache:
+        return self._cache
+
+    def classify(
+        self, videos: dict[str, str], stats: Counter[str] | None = None
+    ) -> dict[str, bool]:
+        """
+        Params:
+            videos: A dict of video ID -> casefolded video title.
+            stats: Optionally counts the videos that had to be "checked" online,
+                and those whose check failed as "unresolved".
+
+        Returns:
+            A dict of video ID -> True if the video is a YT Shorts video. Videos
+            that couldn't be checked are treated as Shorts, so they're skipped
+            rather than queued blind.
+        """
+        verdicts: dict[str, bool] = {}
+        to_check = []
+
+        for video_id, title in videos.items():
+            if "#shorts" in title:
+                verdicts[video_id] = True
+                continue
+
+            is_short = self._cache.get(video_id)
+            if is_short is None:
+                to_check.append(video_id)
+            else:
+                verdicts[video_id] = is_short
+
+        unresolved = 0
+        for video_id, checked in zip(
+            to_check, self._executor.map(self._check, to_check)
+        ):
+            if checked is None:
+                unresolved += 1
+            verdicts[video_id] = True if checked is None else checked
+        if stats is not None:
+            stats["checked"] += len(to_check)
+            stats["unresolved"] += unresolved
+
+        logger.debug(
+            f"Classified {len(videos)} videos, {len(to_check)} needed checking. "
+            f"Shorts cache: {self._cache.hits} hits, {self._cache.misses} misses"
+        )
+        return verdicts
+
+    def _check(self, video_id: str) -> bool | None:
+        """
+        Returns True if video id is a YT Shorts video, or None if it couldn't
+        be told.
+        """
+        shorts_url = f"https://www.youtube.com/shorts/{video_id}"
+        try:
+            resp = self._hedger.call(
+                lambda: self._guard.head(
+                    shorts_url,
+                    session=self._session,
+                    cookies={"CONSENT": "YES+1"},
+                    timeout=60,
+                    allow_redirects=False,
+                )
+            )
+        except requests.RequestException:
+            # Not cached, so the next run asks again.
+            logger.exception(f"Failed to check {shorts_url}")
+            return None
+
+        if resp.status_code == 303 or resp.status_code == 302:
+            is_short = False
+        # Assume any 2XX successfully reached a shorts page
+        elif 200 <= resp.status_code <= 299:
+            is_short = True
+        else:
+            # Not cached, so the next run asks again.
+            logger.info(f"Received {resp.status_code=} from {shorts_url}")
+            return None
+
+        self._cache.set(video_id, is_short)
+        return is_short
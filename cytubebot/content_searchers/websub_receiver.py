@@ -0,0 +1,322 @@
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import requests
+from lxml import etree
+
+from cytubebot.common.database_wrapper import DatabaseWrapper
+from cytubebot.content_searchers.content_filter import ContentFilter
+from cytubebot.content_searchers.feed_parser import iter_entries, parse_timestamp
+from cytubebot.content_searchers.shorts_classifier import ShortsClassifier
+
+# Public URL the hub sends requests to, the receiver is disabled when empty.
+# Notifications must be signed, so the receiver also needs the secret.
+WEBSUB_CALLBACK_URL = os.environ.get("WEBSUB_CALLBACK_URL", "")
+WEBSUB_LISTEN_HOST = os.environ.get("WEBSUB_LISTEN_HOST", "0.0.0.0")
+WEBSUB_LISTEN_PORT = int(os.environ.get("WEBSUB_LISTEN_PORT", 8080))
+WEBSUB_HUB_URL = os.environ.get(
+    "WEBSUB_HUB_URL", "https://pubsubhubbub.appspot.com/subscribe"
+)
+WEBSUB_SECRET = os.environ.get("WEBSUB_SECRET", "")
+WEBSUB_LEASE_SECONDS = int(os.environ.get("WEBSUB_LEASE_SECONDS", 5 * 24 * 60 * 60))
+# Seconds between the polling sweeps that catch missed notifications, used
+# when CONTENT_POLL_INTERVAL isn't set.
+WEBSUB_RECONCILE_INTERVAL = int(os.environ.get("WEBSUB_RECONCILE_INTERVAL", 60 * 60))
+# How often subscriptions are checked for renewal and newly added channels.
+RENEW_CHECK_INTERVAL = 10 * 60
+# The pending lists are only trusted while the receiver keeps renewing them.
+PENDING_MAX_AGE = 2 * RENEW_CHECK_INTERVAL
+MAX_NOTIFICATION_SIZE = 1024 * 1024
+TOPIC_URL = "https://www.youtube.com/feeds/videos.xml?channel_id={}"
+logger = logging.getLogger(__name__)
+
+
+class _WebSubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    receiver: "WebSubReceiver"
+
+
+class _WebSubHandler(BaseHTTPRequestHandler):
+    server: _WebSubServer
+
+    def do_GET(self) -> None:
+        """
+        Subscription verification requests from the hub.
+        """
+        query = parse_qs(urlsplit(self.path).query)
+        params = {key: values[0] for key, values in query.items()}
+        challenge = self.server.receiver.verify(params)
+        if challenge is None:
+            self._respond(404)
+        else:
+            self._respond(200, challenge.encode())
+
+    def do_POST(self) -> None:
+        """
+        Content notifications from the hub.
+        """
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._respond(400)
+            return
+        if length > MAX_NOTIFICATION_SIZE:
+            self._respond(413)
+            return
+
+        body = self.rfile.read(length)
+        channel_id = parse_qs(urlsplit(self.path).query).get("channel_id", [""])[0]
+        try:
+            self.server.receiver.notify(
+                channel_id, body, self.headers.get("X-Hub-Signature", "")
+            )
+        except Exception:
+            logger.exception(f"Failed to handle notification for {channel_id}")
+        # Always acknowledge, the hub would only redeliver the same payload.
+        self._respond(204)
+
+    def _respond(self, status: int, body: bytes = b"") -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(format % args)
+
+
+class WebSubReceiver:
+    """
+    Subscribes to the WebSub (PubSubHubbub) hub for every channel's feed and
+    runs an HTTP server that receives the hub's push notifications. New
+    non-Shorts uploads are appended to the pending content lists, so polling
+    feeds is only needed as a slow reconciliation sweep.
+    """
+
+    def __init__(
+        self,
+        callback_url: str = WEBSUB_CALLBACK_URL,
+        host: str = WEBSUB_LISTEN_HOST,
+        port: int = WEBSUB_LISTEN_PORT,
+        hub_url: str = WEBSUB_HUB_URL,
+        secret: str = WEBSUB_SECRET,
+        lease_seconds: int = WEBSUB_LEASE_SECONDS,
+    ) -> None:
+        self._db = DatabaseWrapper("", 0)
+        self._shorts_classifier = ShortsClassifier()
+        self._filter = ContentFilter()
+        self._callback_url = callback_url
+        self._host = host
+        self._port = port
+        self._hub_url = hub_url
+        self._secret = secret
+        self._lease_seconds = lease_seconds
+        self._server: _WebSubServer | None = None
+        self._stop = threading.Event()
+        # Channel ID -> unix timestamp its subscription expires at.
+        self._leases: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._callback_url and self._secret)
+
+    @property
+    def server_address(self) -> tuple[str, int]:
+        if self._server is None:
+            raise RuntimeError("WebSub receiver isn't running.")
+        host, port = self._server.server_address[:2]
+        return str(host), port
+
+    def start(self, subscribe: bool = True) -> None:
+        """
+        Starts the HTTP server and, if `subscribe`, a thread that keeps every
+        channel's subscription renewed.
+        """
+        if self._callback_url and not self._secret:
+            logger.error("WEBSUB_SECRET isn't set, the WebSub receiver is disabled.")
+        if not self.enabled or self._server is not None:
+            return
+
+        self._server = _WebSubServer((self._host, self._port), _WebSubHandler)
+        self._server.receiver = self
+        logger.info(f"WebSub receiver listening on {self.server_address}")
+        threading.Thread(
+            target=self._server.serve_forever, name="websub-server", daemon=True
+        ).start()
+
+        if subscribe:
+            threading.Thread(
+                target=self._run, name="websub-subscriber", daemon=True
+            ).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def subscribe(self, channel_id: str, mode: str = "subscribe") -> None:
+        """
+        Asks the hub to (un)subscribe the channel's feed, the hub confirms with
+        a verification request to the callback URL.
+        """
+        if not self._secret:
+            raise RuntimeError("Refusing to subscribe without a WebSub secret.")
+
+        data = {
+            "hub.callback": self._callback_for(channel_id),
+            "hub.topic": TOPIC_URL.format(channel_id),
+            "hub.mode": mode,
+            "hub.verify": "async",
+            "hub.lease_seconds": str(self._lease_seconds),
+            "hub.secret": self._secret,
+        }
+
+        resp = requests.post(self._hub_url, data=data, timeout=60)
+        resp.raise_for_status()
+        logger.debug(f"Requested {mode} for {channel_id}: {resp.status_code}")
+
+    def renew_subscriptions(self) -> None:
+        """
+        Subscribes every channel without a subscription that's good for at
+        least another half lease, and keeps the pending lists of the tags
+        whose every channel has a verified lease fresh.
+        """
+        now = time.time()
+        # Tag (None for all channels) -> whether every channel has a lease.
+        covered: dict[str | None, bool] = {None: True}
+        unleased = 0
+        rows = (
+            row
+            for batch in self._db.iter_channels(fields=("channel_id", "tags"))
+            for row in batch
+        )
+        for row in rows:
+            channel_id = row["channel_id"]
+            with self._lock:
+                expires = self._leases.get(channel_id, 0)
+            leased = expires > now
+            unleased += not leased
+            for tag in [None, *(row.get("tags") or [])]:
+                covered[tag] = covered.get(tag, True) and leased
+            if expires - now > self._lease_seconds / 2:
+                continue
+
+            try:
+                self.subscribe(channel_id)
+            except requests.RequestException:
+                logger.exception(f"Failed to subscribe to {channel_id}")
+
+        if unleased:
+            logger.warning(
+                f"{unleased} channels have no verified WebSub lease, their tags "
+                "fall back to live discovery."
+            )
+        # Lets `content` use the pending lists rather than polling every feed,
+        # a list missing notifications would only look like there's nothing new.
+        for tag, leased in covered.items():
+            if leased:
+                self._db.add_pending_content(tag, [], PENDING_MAX_AGE)
+
+    def verify(self, params: dict[str, str]) -> str | None:
+        """
+        Handles a verification request from the hub.
+
+        Returns:
+            The body to respond with, or None to refuse the request.
+        """
+        mode = params.get("hub.mode")
+        topic = params.get("hub.topic", "")
+        channel_id = parse_qs(urlsplit(topic).query).get("channel_id", [""])[0]
+
+        if mode == "denied":
+            logger.warning(f"Hub denied {topic}: {params.get('hub.reason')}")
+            return ""
+
+        if mode not in ("subscribe", "unsubscribe"):
+            return None
+        if not channel_id or not self._db.get_channel(channel_id):
+            logger.info(f"Refusing {mode} for unknown topic {topic}")
+            return None
+
+        if mode == "subscribe":
+            lease = int(params.get("hub.lease_seconds", self._lease_seconds))
+            with self._lock:
+                self._leases[channel_id] = time.time() + lease
+        else:
+            with self._lock:
+                self._leases.pop(channel_id, None)
+
+        logger.info(f"Verified {mode} for {channel_id}")
+        return params.get("hub.challenge", "")
+
+    def notify(self, channel_id: str, body: bytes, signature: str) -> None:
+        """
+        Handles a content notification for the channel, adding its new
+        non-Shorts videos to the pending lists of the channel's tags.
+        """
+        if not self._secret:
+            logger.warning(f"Ignoring unsigned notification for {channel_id}")
+            return
+        digest = hmac.new(self._secret.encode(), body, hashlib.sha1).hexdigest()
+        if not hmac.compare_digest(f"sha1={digest}", signature):
+            logger.warning(f"Ignoring notification with bad signature for {channel_id}")
+            return
+
+        row = self._db.get_channel(channel_id)
+        if not row:
+            logger.info(f"Ignoring notification for unknown channel {channel_id}")
+            return
+
+        try:
+            since = parse_timestamp(row["last_update"])
+            entries = list(iter_entries(body, since=since))
+        except (KeyError, ValueError, etree.XMLSyntaxError):
+            logger.exception(f"Failed to parse notification for {channel_id}")
+            return
+        entries = self._filter.filter(row, entries)
+
+        if not entries:
+            # Deletions and edits of already added videos.
+            return
+
+        verdicts = self._shorts_classifier.classify(
+            {entry.video_id: entry.title.casefold() for entry in entries}
+        )
+        videos = [
+            {
+                "channel_id": channel_id,
+                "datetime": entry.published,
+                "video_id": entry.video_id,
+            }
+            for entry in entries
+            if not verdicts[entry.video_id]
+        ]
+        videos = self._filter.limit(row, videos)
+        if not videos:
+            return
+
+        logger.info(f"Received {len(videos)} new videos for {channel_id}")
+        for tag in [None, *(row.get("tags") or [])]:
+            self._db.add_pending_content(tag, videos, PENDING_MAX_AGE)
+
+    def _callback_for(self, channel_id: str) -> str:
+        return f"{self._callback_url}?{urlencode({'channel_id': channel_id})}"
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.renew_subscriptions()
+            except Exception:
+                logger.exception("Failed to renew WebSub subscriptions.")
+            self._stop.wait(RENEW_CHECK_INTERVAL)
@@ -1,9 +1,24 @@
+import json
+import logging
 import os
 
 from cytubebot.chatbot.chat_bot import ChatBot
 from cytubebot.common.database_wrapper import DatabaseWrapper
 from cytubebot.common.exceptions import MissingEnvVar
 from cytubebot.common.socket_wrapper import SocketWrapper
+from cytubebot.content_searchers.content_poller import ContentPoller
+from cytubebot.content_searchers.discovery_stats import DiscoveryStats
+from cytubebot.content_searchers.discovery_worker import DiscoveryWorker
+from cytubebot.content_searchers.websub_receiver import (
+    WEBSUB_RECONCILE_INTERVAL,
+    WebSubReceiver,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _db_config() -> tuple[str, int]:
+    return os.getenv("REDIS_HOST", "localhost"), int(os.getenv("REDIS_PORT", 6379))
 
 
 def main() -> None:
@@ -12,19 +27,47 @@ def main() -> None:
     username = os.getenv("CYTUBE_USERNAME")
     password = os.getenv("CYTUBE_PASSWORD")
 
-    db_host = os.getenv("REDIS_HOST", "localhost")
-    db_port = int(os.getenv("REDIS_PORT", 6379))
+    db_host, db_port = _db_config()
 
     if not url or not channel_name or not username or not password:
         raise MissingEnvVar("One/some of the env variables are missing.")
 
     # Create the singletons
     SocketWrapper(url, channel_name)
-    DatabaseWrapper(db_host, db_port)
+    DatabaseWrapper(db_host, db_port).migrate_channels()
+
+    receiver = WebSubReceiver()
+    receiver.start()
+    poller = ContentPoller()
+    if receiver.enabled and not poller.enabled:
+        # Notifications can be missed, something has to catch up on them.
+        logger.warning(
+            "CONTENT_POLL_INTERVAL isn't set, polling every "
+            f"{WEBSUB_RECONCILE_INTERVAL}s to reconcile WebSub notifications."
+        )
+        poller = ContentPoller(interval=WEBSUB_RECONCILE_INTERVAL)
+    poller.start()
 
     bot = ChatBot(channel_name, username, password)
     bot.listen()
 
 
+def worker() -> None:
+    """
+    Runs a discovery worker instead of the chat bot, see DiscoveryWorker.
+    """
+    DatabaseWrapper(*_db_config()).migrate_channels()
+    DiscoveryWorker().run()
+
+
+def stats() -> None:
+    """
+    Prints the stored discovery stats, including the request latency
+    histograms each run recorded, as JSON.
+    """
+    DatabaseWrapper(*_db_config())
+    print(json.dumps(DiscoveryStats().dump(), indent=2))
+
+
 if __name__ == "__main__":
     main()
@@ -8,6 +8,21 @@ import redis
 
 redis_client = redis.Redis(host="localhost", port=6379, db=0, decode_responses=True)
 
+# Must match cytubebot.common.database_wrapper.
+CHANNEL_JSON_FIELDS = ("tags", "upload_interval")
+
+
+def make_key(channel_id):
+    return f"{channel_id}@youtube.channel"
+
+
+def make_index_key(tag):
+    return f"{tag or 'ALL'}@youtube.channel.index"
+
+
+def normalise_name(name):
+    return name.strip().removeprefix("@").casefold()
+
 
 @click.group()
 def cli():
@@ -22,30 +37,53 @@ def push(file):
     with open(file, "r") as f:
         channels_data = json.load(f)
 
+    pipe = redis_client.pipeline()
     for channel in channels_data:
-        key = f"{channel['channel_id']}@youtube.channel.id"
-        value = json.dumps(channel)
-        redis_client.set(key, value)
-        print(f"Inserted key: {key}")
+        channel_id = channel["channel_id"]
+        key = make_key(channel_id)
+        value = {
+            field: json.dumps(v) if field in CHANNEL_JSON_FIELDS else v
+            for field, v in channel.items()
+            if v is not None
+        }
+        pipe.delete(key)
+        pipe.hset(key, mapping=value)
+        for tag in [None, *channel.get("tags", [])]:
+            pipe.sadd(make_index_key(tag), channel_id)
+        for lookup_key, field in (
+            ("names@youtube.channel.lookup", "channel_name"),
+            ("handles@youtube.channel.lookup", "handle"),
+        ):
+            if channel.get(field):
+                pipe.hset(lookup_key, normalise_name(channel[field]), channel_id)
+    pipe.execute()
+    print(f"Inserted {len(channels_data)} channels")
 
 
 @cli.command()
 @click.argument("path", type=click.Path(exists=True), required=False)
 def pull(path):
-    """Pull all keys from Redis and save them into a timestamped JSON file."""
+    """Pull all channels from Redis and save them into a timestamped JSON file."""
     if path is None:
         path = os.getcwd()
 
-    keys = redis_client.keys("*")
+    channel_ids = sorted(redis_client.smembers(make_index_key(None)))
+
+    pipe = redis_client.pipeline(transaction=False)
+    for channel_id in channel_ids:
+        pipe.hgetall(make_key(channel_id))
 
     channels = []
-    for key in keys:
-        data = redis_client.get(key)
+    for channel_id, channel in zip(channel_ids, pipe.execute()):
+        if not channel:
+            continue
         try:
-            channel = json.loads(data)
+            for field in CHANNEL_JSON_FIELDS:
+                if field in channel:
+                    channel[field] = json.loads(channel[field])
             channels.append(channel)
         except json.JSONDecodeError:
-            print(f"Warning: Could not decode data for key {key}")
+            print(f"Warning: Could not decode data for channel {channel_id}")
 
     current_datetime = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     output_file = f"channels-{current_datetime}.json"
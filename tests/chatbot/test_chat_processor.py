@@ -0,0 +1,214 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Tuple
+
+import pytest
+
+from cytubebot.chatbot.chat_processor import ChatProcessor
+from cytubebot.chatbot.sio_data import SIOData
+from cytubebot.common.last_update_buffer import LastUpdateBuffer
+
+
+class FakeSocket:
+    def __init__(self) -> None:
+        self.data = SIOData()
+        self.queued: List[str] = []
+        self.msgs: List[str] = []
+        self.drop_on: str | None = None
+
+    def add_video_to_queue(self, id: str, wait: bool = True) -> None:
+        if id == self.drop_on:
+            self.drop_on = None
+            raise ConnectionError("Socket dropped")
+        self.queued.append(id)
+
+    def send_chat_msg(self, message: str) -> None:
+        self.msgs.append(message)
+
+
+class FakeDB:
+    def __init__(self, queued: List[str]) -> None:
+        self.queued = set(queued)
+        self.updated: Dict[str, datetime] = {}
+        self.update_calls = 0
+        self.journal: List[Dict] = []
+        self.inflight: List[Dict] = []
+
+    def push_journal(self, content: List[Dict]) -> None:
+        self.journal.extend(content)
+
+    def take_journal(self) -> Tuple[str, Dict] | None:
+        if not self.journal:
+            return None
+        video = self.journal.pop(0)
+        self.inflight.append(video)
+        return video["video_id"], video
+
+    def ack_journal(self, *entries: str) -> None:
+        self.inflight = [v for v in self.inflight if v["video_id"] not in entries]
+
+    def recover_journal(self) -> int:
+        self.journal[:0] = self.inflight
+        self.inflight = []
+        return len(self.journal)
+
+    def is_queued(self, video_id: str) -> bool:
+        return video_id in self.queued
+
+    def update_datetimes(
+        self, last_updates: Dict[str, datetime], uploads: Dict[str, int] | None = None
+    ) -> int:
+        self.update_calls += 1
+        self.updated.update(last_updates)
+        return len(last_updates)
+
+
+class FakeContentFinder:
+    failed_channels: List[str] = []
+    unreached_channels: List[str] = []
+    scan_complete = True
+
+    def __init__(
+        self, content: List[Dict] | None, found: List[Dict] | None = None
+    ) -> None:
+        self._content = content
+        self._found = found or []
+        self.db: FakeDB | None = None
+
+    def take_pending_content(self, tag: str | None) -> List[Dict] | None:
+        return self._content
+
+    def iter_content(
+        self, tag: str | None, within: float | None = None, journal: bool = False
+    ) -> Iterator[Dict]:
+        for video in self._found:
+            if journal and self.db is not None:
+                self.db.push_journal([video])
+            yield video
+
+
+def video(day: int) -> Dict:
+    return {
+        "channel_id": "chan1",
+        "datetime": datetime(2025, 1, day, tzinfo=timezone.utc),
+        "video_id": f"vid{day}",
+    }
+
+
+@pytest.fixture
+def processor() -> ChatProcessor:
+    processor = ChatProcessor.__new__(ChatProcessor)
+    processor._sio = FakeSocket()
+    processor._db = FakeDB(["vid1"])
+    processor._last_updates = LastUpdateBuffer()
+    processor._last_updates._db = processor._db
+    return processor
+
+
+class TestChatProcessor:
+    def test_content_skips_queued_videos(self, processor: ChatProcessor) -> None:
+        processor._content_finder = FakeContentFinder([video(1), video(2)])
+
+        processor._handle_content(None)
+
+        assert processor._sio.queued == ["vid2"]
+        assert processor._db.updated == {"chan1": video(2)["datetime"]}
+        assert processor._db.update_calls == 1
+        assert processor._sio.msgs[-1] == (
+            "Finished adding 1 videos (1 already on the playlist)."
+        )
+
+    def test_content_resumes_interrupted_run(self, processor: ChatProcessor) -> None:
+        # vid3 was being queued when the bot went down.
+        processor._db.journal = [video(4)]
+        processor._db.inflight = [video(3)]
+        processor._content_finder = FakeContentFinder([video(5)])
+
+        processor._handle_content(None)
+
+        assert processor._sio.queued == ["vid3", "vid4", "vid5"]
+        assert processor._db.journal == processor._db.inflight == []
+        assert processor._db.updated == {"chan1": video(5)["datetime"]}
+
+    def test_resume_after_socket_drop(self, processor: ChatProcessor) -> None:
+        processor._content_finder = FakeContentFinder([video(2), video(3)])
+        processor._sio.drop_on = "vid3"
+
+        with pytest.raises(ConnectionError):
+            processor._handle_content(None)
+        processor.resume_content()
+
+        assert processor._sio.queued == ["vid2", "vid3"]
+        assert processor._db.journal == processor._db.inflight == []
+        assert processor._sio.msgs[-1] == (
+            "Resumed adding 1 videos from an interrupted run."
+        )
+
+    def test_content_batches_last_updates(
+        self, monkeypatch: pytest.MonkeyPatch, processor: ChatProcessor
+    ) -> None:
+        monkeypatch.setattr(
+            "cytubebot.chatbot.chat_processor.LAST_UPDATE_BATCH_SIZE", 2
+        )
+        # Out of order, the newest datetime must win.
+        processor._content_finder = FakeContentFinder(
+            [video(2), video(5), video(3), video(4), video(6)]
+        )
+
+        processor._handle_content(None)
+
+        assert processor._db.update_calls == 3
+        assert processor._db.updated == {"chan1": video(6)["datetime"]}
+        assert processor._db.journal == processor._db.inflight == []
+
+    def test_live_content_batches_last_updates(
+        self, monkeypatch: pytest.MonkeyPatch, processor: ChatProcessor
+    ) -> None:
+        monkeypatch.setattr(
+            "cytubebot.chatbot.chat_processor.LAST_UPDATE_BATCH_SIZE", 2
+        )
+        finder = FakeContentFinder(None, [video(2), video(3), video(4), video(5)])
+        finder.db = processor._db
+        processor._content_finder = finder
+
+        processor._handle_content(None)
+
+        # One write per batch of 2, not one per video.
+        assert processor._sio.queued == ["vid2", "vid3", "vid4", "vid5"]
+        assert processor._db.update_calls == 2
+        assert processor._db.updated == {"chan1": video(5)["datetime"]}
+        assert processor._db.journal == processor._db.inflight == []
+
+    def test_live_content_flushes_at_end_of_run(self, processor: ChatProcessor) -> None:
+        finder = FakeContentFinder(None, [video(2), video(3), video(4)])
+        finder.db = processor._db
+        processor._content_finder = finder
+
+        processor._handle_content(None)
+
+        assert processor._db.update_calls == 1
+        assert processor._db.updated == {"chan1": video(4)["datetime"]}
+        assert processor._db.journal == processor._db.inflight == []
+
+    @pytest.mark.parametrize(
+        "args, expected",
+        [
+            ([], (None, None)),
+            (["--force"], (None, None)),
+            (["music", "--within", "20s"], ("MUSIC", 20.0)),
+            (["--force", "--within", "2m", "music"], ("MUSIC", 120.0)),
+        ],
+    )
+    def test_content_command_args(
+        self, processor: ChatProcessor, args: List[str], expected: Tuple
+    ) -> None:
+        calls: List[Tuple] = []
+        processor._handle_content = lambda tag, within=None: calls.append((tag, within))
+
+        processor._handle_content_command(args)
+
+        assert calls == [expected]
+
+    def test_content_command_bad_duration(self, processor: ChatProcessor) -> None:
+        processor._handle_content_command(["--within", "soon"])
+
+        assert processor._sio.msgs == ["Usage: content [TAG] [--within 20s]"]
@@ -0,0 +1,137 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List
+
+import fakeredis
+import pytest
+
+from cytubebot.common.async_database_wrapper import AsyncDatabaseWrapper
+from cytubebot.common.database_wrapper import DatabaseWrapper
+
+
+@pytest.fixture
+def server() -> fakeredis.FakeServer:
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def db(
+    monkeypatch: pytest.MonkeyPatch, server: fakeredis.FakeServer
+) -> Iterator[DatabaseWrapper]:
+    db = DatabaseWrapper("", 0)
+    redis = fakeredis.FakeRedis(server=server, decode_responses=True)
+    monkeypatch.setattr(db, "_redis", redis)
+    yield db
+
+
+@pytest.fixture
+def adb(
+    monkeypatch: pytest.MonkeyPatch, server: fakeredis.FakeServer
+) -> Iterator[AsyncDatabaseWrapper]:
+    adb = AsyncDatabaseWrapper("", 0)
+    redis = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    monkeypatch.setattr(adb, "_redis", redis)
+    yield adb
+
+
+def save(db: DatabaseWrapper, channel_id: str, **fields: Any) -> None:
+    data: Dict[str, Any] = {
+        "channel_id": channel_id,
+        "channel_name": f"{channel_id} name",
+        "last_update": "2025-01-01T00:00:00+00:00",
+        "tags": [],
+        **fields,
+    }
+    db._replace_channel(channel_id, lambda _: data)
+
+
+def video(video_id: str, channel_id: str = "chan1", day: int = 2) -> Dict:
+    return {
+        "channel_id": channel_id,
+        "datetime": datetime(2025, 1, day, tzinfo=timezone.utc),
+        "video_id": video_id,
+    }
+
+
+def by_id(rows: List[Dict]) -> Dict[str, Dict]:
+    return {row["channel_id"]: row for row in rows}
+
+
+class TestAsyncDatabaseWrapper:
+    def test_iter_channels_matches_sync(
+        self, db: DatabaseWrapper, adb: AsyncDatabaseWrapper
+    ) -> None:
+        for i in range(25):
+            save(db, f"chan{i}", tags=["MUSIC"] if i % 2 else [])
+
+        async def collect(tag: str | None, fields: Any) -> List[List[Dict]]:
+            return [
+                batch
+                async for batch in adb.iter_channels(tag, fields=fields, page_size=4)
+            ]
+
+        for tag in (None, "MUSIC"):
+            for fields in (None, ("channel_id", "last_update")):
+                batches = asyncio.run(collect(tag, fields))
+                rows = [row for batch in batches for row in batch]
+
+                assert len(batches) > 1
+                assert len(rows) == len(by_id(rows))
+                expected = [
+                    row for batch in db.iter_channels(tag, fields) for row in batch
+                ]
+                assert by_id(rows) == by_id(expected)
+
+    def test_pop_pending_content_matches_sync(
+        self, db: DatabaseWrapper, adb: AsyncDatabaseWrapper
+    ) -> None:
+        save(db, "chan1", tags=["MUSIC"])
+
+        assert asyncio.run(adb.pop_pending_content(None)) is None
+
+        db.add_discovered_content([video("vid1"), video("vid2", day=3)], 60)
+
+        pending = asyncio.run(adb.pop_pending_content(None))
+        assert pending == [video("vid1"), video("vid2", day=3)]
+        assert db.pop_pending_content("MUSIC") == pending
+        # Taken, but still maintained.
+        assert asyncio.run(adb.pop_pending_content(None)) == []
+
+        asyncio.run(adb.add_pending_content("MUSIC", [video("vid3")], 60))
+        assert db.pop_pending_content("MUSIC") == [video("vid3")]
+
+    def test_update_datetimes_matches_sync(
+        self, db: DatabaseWrapper, adb: AsyncDatabaseWrapper
+    ) -> None:
+        for channel_id in ("sync1", "async1"):
+            save(db, channel_id, last_update="2025-01-01 00:00:00+00:00")
+            save(
+                db,
+                channel_id.replace("1", "2"),
+                last_update="2025-01-05T00:00:00+05:00",
+            )
+        updates = {
+            "1": datetime(2025, 1, 3, tzinfo=timezone.utc),
+            "2": datetime(2025, 1, 4, tzinfo=timezone.utc),
+            "3": datetime(2025, 1, 6, tzinfo=timezone.utc),
+        }
+
+        synced = db.update_datetimes(
+            {f"sync{k}": dt for k, dt in updates.items()}, {"sync1": 2}
+        )
+        awaited = asyncio.run(
+            adb.update_datetimes(
+                {f"async{k}": dt for k, dt in updates.items()}, {"async1": 2}
+            )
+        )
+
+        assert synced == awaited == 1
+        for suffix in ("1", "2"):
+            expected = db.get_channel(f"sync{suffix}")
+            actual = asyncio.run(adb.get_channel(f"async{suffix}"))
+            for field in ("channel_id", "channel_name"):
+                del expected[field], actual[field]
+            assert actual == expected
+        assert float(db.get_channel("sync1")["upload_interval"]) == 24 * 3600
+        assert db.get_channel("sync2")["last_update"] == "2025-01-05T00:00:00+05:00"
+        assert asyncio.run(adb.update_datetimes({})) == 0
@@ -0,0 +1,273 @@
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator
+
+import fakeredis
+import pytest
+
+from cytubebot.common.database_wrapper import (
+    UPLOAD_INTERVAL_SMOOTHING,
+    DatabaseWrapper,
+)
+
+
+@pytest.fixture
+def db(monkeypatch: pytest.MonkeyPatch) -> Iterator[DatabaseWrapper]:
+    db = DatabaseWrapper("", 0)
+    monkeypatch.setattr(db, "_redis", fakeredis.FakeRedis(decode_responses=True))
+    yield db
+
+
+def save(db: DatabaseWrapper, channel_id: str, **fields: Any) -> None:
+    data: Dict[str, Any] = {
+        "channel_id": channel_id,
+        "channel_name": f"{channel_id} name",
+        "last_update": "2025-01-01T00:00:00+00:00",
+        "tags": [],
+        **fields,
+    }
+    db._replace_channel(channel_id, lambda _: data)
+
+
+def video(video_id: str, channel_id: str = "chan1", day: int = 2) -> Dict:
+    return {
+        "channel_id": channel_id,
+        "datetime": datetime(2025, 1, day, tzinfo=timezone.utc),
+        "video_id": video_id,
+    }
+
+
+class TestDiscoveredContent:
+    def test_skips_videos_already_pending(self, db: DatabaseWrapper) -> None:
+        save(db, "chan1", tags=["MUSIC"])
+
+        assert db.add_discovered_content([video("vid1")], 60) == 1
+        assert db.add_discovered_content([video("vid1"), video("vid2")], 60) == 1
+
+        for tag in (None, "MUSIC"):
+            pending = db.pop_pending_content(tag)
+            assert pending is not None
+            assert [v["video_id"] for v in pending] == ["vid1", "vid2"]
+
+    def test_refills_expired_lists(self, db: DatabaseWrapper) -> None:
+        save(db, "chan1")
+        db.add_discovered_content([video("vid1")], 60)
+
+        # Every worker was down for longer than the lists live.
+        db.connection.delete("ALL@pending.content", "ALL@pending.content.refreshed")
+
+        assert db.add_discovered_content([video("vid1")], 60) == 1
+        pending = db.pop_pending_content(None)
+        assert pending is not None
+        assert [v["video_id"] for v in pending] == ["vid1"]
+
+
+class TestUpdateDatetimes:
+    @pytest.mark.parametrize(
+        "old, new",
+        [
+            ("2025-01-01T00:00:00+00:00", "2025-01-01T06:00:00+00:00"),
+            ("2024-12-31 23:00:00+00:00", "2025-01-01T01:30:00+00:00"),
+            ("2024-02-28T12:00:00+00:00", "2024-03-01T12:00:00+00:00"),
+            ("2023-02-28T12:00:00+00:00", "2023-03-01T12:00:00+00:00"),
+            ("2025-01-31T22:00:00-05:00", "2025-02-01T04:00:00+00:00"),
+            ("2025-03-01T00:30:00+05:30", "2025-02-28T20:00:00+00:00"),
+        ],
+    )
+    def test_gap_between_instants(
+        self, db: DatabaseWrapper, old: str, new: str
+    ) -> None:
+        save(db, "chan1", last_update=old)
+        new_dt = datetime.fromisoformat(new)
+
+        assert db.update_datetimes({"chan1": new_dt}) == 1
+
+        channel = db.get_channel("chan1")
+        assert channel["last_update"] == new_dt.isoformat()
+        gap = (new_dt - datetime.fromisoformat(old)).total_seconds()
+        assert float(channel["upload_interval"]) == pytest.approx(gap)
+
+    @pytest.mark.parametrize(
+        "old, new",
+        [
+            ("2025-01-01T06:00:00+00:00", "2025-01-01T05:00:00+00:00"),
+            ("2025-01-01 06:00:00+00:00", "2025-01-01T06:00:00+00:00"),
+            ("2025-01-01T06:00:00-05:00", "2025-01-01T10:00:00+00:00"),
+            ("2024-03-01T00:00:00+00:00", "2024-02-29T23:59:59+00:00"),
+        ],
+    )
+    def test_never_moves_backwards(
+        self, db: DatabaseWrapper, old: str, new: str
+    ) -> None:
+        save(db, "chan1", last_update=old)
+
+        assert db.update_datetimes({"chan1": datetime.fromisoformat(new)}) == 0
+
+        channel = db.get_channel("chan1")
+        assert channel["last_update"] == old
+        assert "upload_interval" not in channel
+
+    def test_gap_split_between_uploads(self, db: DatabaseWrapper) -> None:
+        save(db, "chan1", last_update="2025-01-01T00:00:00+00:00")
+        single = datetime(2025, 1, 1, 10, tzinfo=timezone.utc)
+        db.update_datetimes({"chan1": single})
+
+        db.update_datetimes(
+            {"chan1": datetime(2025, 1, 2, 10, tzinfo=timezone.utc)}, {"chan1": 4}
+        )
+
+        # Four 6 hour gaps move the average the same as four separate flushes.
+        expected = 10 * 3600.0
+        for _ in range(4):
+            expected = (
+                UPLOAD_INTERVAL_SMOOTHING * 6 * 3600
+                + (1 - UPLOAD_INTERVAL_SMOOTHING) * expected
+            )
+        channel = db.get_channel("chan1")
+        assert float(channel["upload_interval"]) == pytest.approx(expected)
+
+    def test_skips_unknown_channels(self, db: DatabaseWrapper) -> None:
+        assert (
+            db.update_datetimes({"chan1": datetime(2025, 1, 2, tzinfo=timezone.utc)})
+            == 0
+        )
+        assert db.get_channel("chan1") == {}
+
+
+class TestMigrateChannels:
+    def test_moves_legacy_records_to_hashes(self, db: DatabaseWrapper) -> None:
+        legacy = {
+            "channelId": "chan1",
+            "name": "Chan One",
+            "last_update": "2025-01-01T00:00:00+00:00",
+            "tags": ["MUSIC"],
+        }
+        db.connection.set("chan1@youtube.channel.id", json.dumps(legacy))
+
+        assert db.migrate_channels() == 1
+
+        assert not db.connection.exists("chan1@youtube.channel.id")
+        assert db.get_channel("chan1") == {
+            "channel_id": "chan1",
+            "channel_name": "Chan One",
+            "last_update": "2025-01-01T00:00:00+00:00",
+            "tags": ["MUSIC"],
+        }
+        assert db.connection.smembers("ALL@youtube.channel.index") == {"chan1"}
+        assert db.connection.smembers("MUSIC@youtube.channel.index") == {"chan1"}
+        assert db.get_channel_id("chan one") == "chan1"
+
+    def test_fills_missing_fields(self, db: DatabaseWrapper) -> None:
+        db.connection.set(
+            "chan1@youtube.channel.id",
+            json.dumps({"name": "Chan One", "tags": "MUSIC"}),
+        )
+
+        assert db.migrate_channels() == 1
+
+        assert db.get_channel("chan1") == {
+            "channel_id": "chan1",
+            "channel_name": "Chan One",
+            "tags": [],
+        }
+
+    def test_skips_malformed_records(self, db: DatabaseWrapper) -> None:
+        db.connection.set("chan1@youtube.channel.id", "{not json")
+        db.connection.set("chan2@youtube.channel.id", json.dumps({"name": "Chan Two"}))
+
+        assert db.migrate_channels() == 1
+
+        # Left in place rather than lost.
+        assert db.connection.get("chan1@youtube.channel.id") == "{not json"
+        assert db.get_channel("chan1") == {}
+        assert db.connection.smembers("ALL@youtube.channel.index") == {"chan2"}
+
+    def test_indexes_names_of_existing_hashes(self, db: DatabaseWrapper) -> None:
+        save(db, "chan1", handle="@ChanOne")
+        db.connection.delete(
+            "names@youtube.channel.lookup", "handles@youtube.channel.lookup"
+        )
+
+        assert db.migrate_channels() == 0
+
+        assert db.get_channel_id("CHAN1 NAME") == "chan1"
+        assert db.get_channel_id("chanone") == "chan1"
+
+
+class TestTags:
+    def test_index_sets_follow_tags(self, db: DatabaseWrapper) -> None:
+        save(db, "chan1")
+        save(db, "chan2", tags=["MUSIC"])
+
+        db.add_tags("chan1", ["MUSIC", "NEWS"])
+        db.add_tags("chan1", ["MUSIC"])
+
+        assert db.get_channel("chan1")["tags"] == ["MUSIC", "NEWS"]
+        assert db.connection.smembers("MUSIC@youtube.channel.index") == {
+            "chan1",
+            "chan2",
+        }
+        assert db.connection.smembers("NEWS@youtube.channel.index") == {"chan1"}
+
+        db.remove_tags("chan1", ["MUSIC", "NEWS"])
+
+        assert db.get_channel("chan1")["tags"] == []
+        assert db.connection.smembers("MUSIC@youtube.channel.index") == {"chan2"}
+        assert not db.connection.exists("NEWS@youtube.channel.index")
+        assert db.connection.smembers("ALL@youtube.channel.index") == {
+            "chan1",
+            "chan2",
+        }
+        assert [row["channel_id"] for row in db.get_channels("MUSIC")] == ["chan2"]
+
+    def test_unknown_channel_left_alone(self, db: DatabaseWrapper) -> None:
+        db.add_tags("chan1", ["MUSIC"])
+
+        assert db.get_channel("chan1") == {}
+        assert not db.connection.exists("MUSIC@youtube.channel.index")
+
+
+class TestNameLookup:
+    def test_rename_drops_old_name(self, db: DatabaseWrapper) -> None:
+        save(db, "chan1", channel_name="Old Name", handle="@old")
+
+        save(db, "chan1", channel_name="New Name", handle="@new")
+
+        assert db.get_channel_id("old name") is None
+        assert db.get_channel_id("@old") is None
+        assert db.get_channel_id("NEW NAME") == "chan1"
+        assert db.get_channel_id("new") == "chan1"
+
+    def test_rename_keeps_name_another_channel_owns(self, db: DatabaseWrapper) -> None:
+        save(db, "chan1", channel_name="Shared", handle="@shared")
+        save(db, "chan2", channel_name="Shared", handle="@shared")
+
+        save(db, "chan1", channel_name="Chan One", handle=None)
+
+        assert db.get_channel_id("shared") == "chan2"
+        assert db.get_channel_id("@shared") == "chan2"
+        assert db.get_channel_id("chan one") == "chan1"
+
+    def test_remove_channel_by_handle(self, db: DatabaseWrapper) -> None:
+        save(db, "chan1", channel_name="Chan One", handle="@ChanOne", tags=["MUSIC"])
+        save(db, "chan2")
+
+        db.remove_channel("@chanone")
+
+        assert db.get_channel("chan1") == {}
+        assert db.get_channel_id("chan one") is None
+        assert db.get_channel_id("chanone") is None
+        assert db.connection.smembers("ALL@youtube.channel.index") == {"chan2"}
+        assert not db.connection.exists("MUSIC@youtube.channel.index")
+
+    def test_remove_stale_lookup(self, db: DatabaseWrapper) -> None:
+        save(db, "chan1", channel_name="Chan One", handle="@chanone")
+        # The channel's hash went without its lookups, e.g. deleted by hand.
+        db.connection.delete("chan1@youtube.channel")
+
+        db.remove_channel("Chan One")
+
+        assert db.get_channel_id("chan one") is None
+        # Only the given name is known, the handle is left for its own removal.
+        assert db.get_channel_id("chanone") == "chan1"
+        assert db.connection.smembers("ALL@youtube.channel.index") == set()
@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+
+from cytubebot.common.hedging import (
+    HEDGE_MIN_SAMPLES,
+    HedgeBudget,
+    Hedger,
+    LatencyHistogram,
+)
+
+
+def warm_up(hedger: Hedger, seconds: float = 0.01) -> None:
+    for _ in range(HEDGE_MIN_SAMPLES):
+        hedger.histogram.observe(seconds)
+
+
+class TestLatencyHistogram:
+    def test_percentile(self) -> None:
+        histogram = LatencyHistogram()
+        assert histogram.percentile(95) is None
+
+        for _ in range(95):
+            histogram.observe(0.01)
+        for _ in range(5):
+            histogram.observe(10)
+
+        assert histogram.percentile(50) == 0.01
+        assert histogram.percentile(95) == 0.01
+        assert histogram.percentile(99) > 10
+
+    def test_snapshot(self) -> None:
+        histogram = LatencyHistogram()
+        histogram.observe(0.01)
+        histogram.observe(100)
+        snapshot = histogram.snapshot()
+
+        assert snapshot["count"] == 2
+        assert snapshot["buckets"]["0.01"] == 1
+        assert snapshot["buckets"]["inf"] == 2
+
+
+class TestHedger:
+    def test_disabled_makes_one_request(self) -> None:
+        hedger = Hedger("test", enabled=False, budget=HedgeBudget(1))
+        warm_up(hedger)
+
+        assert hedger.call(lambda: "resp") == "resp"
+        assert hedger.histogram.count == HEDGE_MIN_SAMPLES + 1
+        assert hedger.hedged == 0
+
+    def test_slow_request_is_hedged(self) -> None:
+        hedger = Hedger("test", enabled=True, budget=HedgeBudget(1))
+        warm_up(hedger)
+        calls = []
+        first = threading.Event()
+
+        def request() -> str:
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                # The first request hangs until the test ends.
+                first.wait(timeout=5)
+                return "slow"
+            return "fast"
+
+        try:
+            assert hedger.call(request) == "fast"
+        finally:
+            first.set()
+        assert hedger.hedged == 1
+
+    def test_budget_exhausted(self) -> None:
+        hedger = Hedger("test", enabled=True, budget=HedgeBudget(0))
+        warm_up(hedger)
+
+        assert hedger.call(lambda: time.sleep(0.05) or "resp") == "resp"
+        assert hedger.hedged == 0
+
+    def test_unbounded_percentile_is_not_hedged(self) -> None:
+        hedger = Hedger("test", enabled=True, budget=HedgeBudget(1))
+        # Every observation lands in the top (inf) bucket.
+        warm_up(hedger, seconds=1000)
+
+        assert hedger.call(lambda: time.sleep(0.05) or "resp") == "resp"
+        assert hedger.hedged == 0
+
+    def test_errors_propagate(self) -> None:
+        hedger = Hedger("test", enabled=True, budget=HedgeBudget(1))
+        warm_up(hedger)
+
+        def request() -> str:
+            time.sleep(0.05)
+            raise ValueError("failed")
+
+        with pytest.raises(ValueError):
+            hedger.call(request)
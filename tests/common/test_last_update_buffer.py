@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+from typing import Dict
+
+import pytest
+
+from cytubebot.common.last_update_buffer import LastUpdateBuffer
+
+
+class FakeDB:
+    def __init__(self) -> None:
+        self.updated: Dict[str, datetime] = {}
+        self.uploads: Dict[str, int] = {}
+        self.fail = False
+
+    def update_datetimes(
+        self, last_updates: Dict[str, datetime], uploads: Dict[str, int] | None = None
+    ) -> int:
+        if self.fail:
+            raise ConnectionError("Redis is down")
+        self.updated.update(last_updates)
+        self.uploads.update(uploads or {})
+        return len(last_updates)
+
+
+def day(day: int) -> datetime:
+    return datetime(2025, 1, day, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def buffer() -> LastUpdateBuffer:
+    buffer = LastUpdateBuffer()
+    buffer._db = FakeDB()
+    return buffer
+
+
+class TestLastUpdateBuffer:
+    def test_keeps_newest_per_channel(self, buffer: LastUpdateBuffer) -> None:
+        buffer.record("chan1", day(3))
+        buffer.record("chan1", day(2))
+        buffer.record("chan2", day(1))
+
+        assert len(buffer) == 2
+        assert buffer.flush() == 2
+        assert buffer._db.updated == {"chan1": day(3), "chan2": day(1)}
+        assert buffer._db.uploads == {"chan1": 2, "chan2": 1}
+        assert len(buffer) == 0
+        assert buffer.flush() == 0
+
+    def test_failed_flush_is_retried(self, buffer: LastUpdateBuffer) -> None:
+        buffer.record("chan1", day(2))
+        buffer._db.fail = True
+
+        with pytest.raises(ConnectionError):
+            buffer.flush()
+        buffer.record("chan1", day(1))
+        buffer._db.fail = False
+        buffer.flush()
+
+        assert buffer._db.updated == {"chan1": day(2)}
+        assert buffer._db.uploads == {"chan1": 2}
@@ -0,0 +1,96 @@
+import time
+from typing import Any, List
+
+import pytest
+import requests
+
+from cytubebot.common.exceptions import CircuitOpenError
+from cytubebot.common.request_guard import CircuitBreaker, RequestGuard, TokenBucket
+
+
+class FakeResponse:
+    def __init__(self, status_code: int) -> None:
+        self.status_code: int = status_code
+
+
+@pytest.fixture
+def guard() -> RequestGuard:
+    guard = RequestGuard()
+    guard._breakers.clear()
+    guard._limiters.clear()
+    return guard
+
+
+class TestTokenBucket:
+    def test_burst_then_rate_limited(self) -> None:
+        bucket = TokenBucket(rate=20, burst=2)
+        start = time.monotonic()
+        for _ in range(4):
+            bucket.acquire()
+
+        # Two tokens from the burst, then two more at 20 a second.
+        assert time.monotonic() - start == pytest.approx(0.1, abs=0.04)
+
+
+class TestCircuitBreaker:
+    def test_opens_and_recovers(self) -> None:
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+
+        assert breaker.is_open
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        time.sleep(0.06)
+        # A single trial call is let through.
+        breaker.before_call()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        breaker.record_success()
+        assert not breaker.is_open
+        breaker.before_call()
+
+    def test_failed_trial_reopens(self) -> None:
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        breaker.before_call()
+        breaker.record_failure()
+
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+
+class TestRequestGuard:
+    def test_fails_fast_while_host_is_failing(
+        self, monkeypatch: pytest.MonkeyPatch, guard: RequestGuard
+    ) -> None:
+        calls: List[str] = []
+
+        def fake_get(url: str, **kwargs: Any) -> FakeResponse:
+            calls.append(url)
+            return FakeResponse(429)
+
+        monkeypatch.setattr(requests, "get", fake_get)
+        url = "https://www.youtube.com/feeds/videos.xml?channel_id=abc"
+        for _ in range(5):
+            assert guard.get(url, timeout=60).status_code == 429
+
+        with pytest.raises(CircuitOpenError):
+            guard.get(url, timeout=60)
+        # Other hosts aren't affected.
+        assert guard.get("https://example.com", timeout=60).status_code == 429
+        assert len(calls) == 6
+
+    def test_not_found_is_healthy(
+        self, monkeypatch: pytest.MonkeyPatch, guard: RequestGuard
+    ) -> None:
+        monkeypatch.setattr(requests, "get", lambda url, **kwargs: FakeResponse(404))
+        url = "https://www.youtube.com/channel/deleted"
+        for _ in range(10):
+            guard.get(url, timeout=60)
+
+        assert not guard.breaker(url).is_open
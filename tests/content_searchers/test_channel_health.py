@@ -0,0 +1,71 @@
+import time
+from typing import Dict, List
+
+import pytest
+
+from cytubebot.content_searchers.channel_health import ChannelHealth
+
+
+class FakeDB:
+    def __init__(self) -> None:
+        self.failures: Dict[str, Dict] = {}
+
+    def get_channel_failures(
+        self, channel_ids: List[str] | None = None
+    ) -> Dict[str, Dict]:
+        return {
+            channel_id: failure
+            for channel_id, failure in self.failures.items()
+            if channel_ids is None or channel_id in channel_ids
+        }
+
+    def set_channel_failures(self, failures: Dict[str, Dict]) -> None:
+        self.failures.update(failures)
+
+    def clear_channel_failures(self, channel_ids: List[str]) -> None:
+        for channel_id in channel_ids:
+            self.failures.pop(channel_id, None)
+
+
+@pytest.fixture
+def health() -> ChannelHealth:
+    health = ChannelHealth(retry_base=60, retry_max=300, dead_after=3)
+    health._db = FakeDB()
+    return health
+
+
+class TestChannelHealth:
+    def test_retry_delay_doubles_up_to_max(self, health: ChannelHealth) -> None:
+        delays = []
+        for _ in range(5):
+            health.record_failures({"dead": "HTTP 404"})
+            delays.append(health._db.failures["dead"]["retry_at"] - time.time())
+
+        assert [round(delay) for delay in delays] == [60, 120, 240, 300, 300]
+
+    def test_select_skips_until_retry(self, health: ChannelHealth) -> None:
+        channels = [{"channel_id": "dead"}, {"channel_id": "alive"}]
+        health.record_failures({"dead": "HTTP 404"})
+
+        assert health.select(channels) == [{"channel_id": "alive"}]
+
+        health._db.failures["dead"]["retry_at"] = time.time() - 1
+        assert health.select(channels) == channels
+
+    def test_success_clears_failures(self, health: ChannelHealth) -> None:
+        health.record_failures({"flaky": "ReadTimeout"})
+        health.record_successes(["flaky"])
+
+        assert health._db.failures == {}
+
+    def test_report(self, health: ChannelHealth) -> None:
+        assert health.report() == "No channels are failing."
+
+        for _ in range(3):
+            health.record_failures({"dead": "HTTP 404"})
+        health.record_failures({"flaky": "ReadTimeout"})
+
+        assert health.report() == (
+            "2 channels are failing, 1 have failed 3+ times in a row: "
+            "dead (HTTP 404)."
+        )
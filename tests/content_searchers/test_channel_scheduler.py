@@ -0,0 +1,84 @@
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import pytest
+
+from cytubebot.content_searchers.channel_scheduler import ChannelScheduler
+
+
+class FakeDB:
+    def __init__(self) -> None:
+        self.schedule: Dict[str, float] = {}
+
+    def get_next_due(self, channel_ids: List[str]) -> Dict[str, float | None]:
+        return {channel_id: self.schedule.get(channel_id) for channel_id in channel_ids}
+
+    def schedule_channels(self, due: Dict[str, float]) -> None:
+        self.schedule.update(due)
+
+
+def channel(channel_id: str, age: timedelta, upload_interval: float | None) -> Dict:
+    return {
+        "channel_id": channel_id,
+        "last_update": (datetime.now(timezone.utc) - age).isoformat(),
+        "upload_interval": upload_interval,
+    }
+
+
+@pytest.fixture
+def scheduler() -> ChannelScheduler:
+    scheduler = ChannelScheduler(
+        enabled=True, min_interval=60, max_interval=86400, exploration_fraction=0
+    )
+    scheduler._db = FakeDB()
+    return scheduler
+
+
+class TestChannelScheduler:
+    def test_select_due_and_unscheduled(self, scheduler: ChannelScheduler) -> None:
+        channels = [
+            channel("due", timedelta(hours=1), 3600),
+            channel("later", timedelta(hours=1), 3600),
+            channel("new", timedelta(hours=1), None),
+        ]
+        scheduler._db.schedule = {"due": time.time() - 1, "later": time.time() + 60}
+
+        assert [row["channel_id"] for row in scheduler.select(channels)] == [
+            "due",
+            "new",
+        ]
+
+    def test_select_disabled(self, scheduler: ChannelScheduler) -> None:
+        channels = [channel("later", timedelta(hours=1), 3600)]
+        scheduler._db.schedule = {"later": time.time() + 60}
+        scheduler.enabled = False
+
+        assert scheduler.select(channels) == channels
+
+    def test_reschedule_follows_cadence(self, scheduler: ChannelScheduler) -> None:
+        now = time.time()
+        scheduler.reschedule(
+            [
+                channel("hourly", timedelta(minutes=1), 3600),
+                channel("quiet", timedelta(days=2), 3600),
+                channel("yearly", timedelta(days=1), 365 * 86400),
+            ]
+        )
+        schedule = scheduler._db.schedule
+
+        assert schedule["hourly"] == pytest.approx(now + 900, abs=5)
+        assert schedule["quiet"] == pytest.approx(now + 43200, abs=5)
+        assert schedule["yearly"] == pytest.approx(now + 86400, abs=5)
+
+    def test_reschedule_follows_unqueued_uploads(
+        self, scheduler: ChannelScheduler
+    ) -> None:
+        """Nothing was queued for days, but the feed has an upload from today."""
+        now = time.time()
+        scheduler.reschedule(
+            [channel("daily", timedelta(days=5), 86400)],
+            {"daily": datetime.now(timezone.utc) - timedelta(hours=1)},
+        )
+
+        assert scheduler._db.schedule["daily"] == pytest.approx(now + 21600, abs=5)
@@ -0,0 +1,118 @@
+import json
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from cytubebot.content_searchers.content_filter import ContentFilter
+from cytubebot.content_searchers.feed_parser import FeedEntry
+
+RULES = {
+    "default": {"exclude_keywords": ["Live Stream"]},
+    "tags": {"MUSIC": {"exclude_patterns": [r"\(teaser\)$"], "max_videos": 3}},
+    "channels": {"chan2": {"min_age": 3600, "max_videos": 1}},
+}
+
+
+def entry(video_id: str, title: str, age: timedelta = timedelta(days=1)) -> FeedEntry:
+    return FeedEntry(video_id, title, datetime.now(timezone.utc) - age)
+
+
+@pytest.fixture
+def content_filter(tmp_path: Path) -> ContentFilter:
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(RULES))
+    return ContentFilter(str(path))
+
+
+class TestContentFilter:
+    def test_no_rules(self) -> None:
+        entries = [entry("vid1", "live stream")]
+
+        assert ContentFilter("").filter({"channel_id": "chan1"}, entries) == entries
+
+    def test_keywords_and_patterns(self, content_filter: ContentFilter) -> None:
+        entries = [
+            entry("vid1", "New song"),
+            entry("vid2", "LIVE STREAM tonight"),
+            entry("vid3", "New song (teaser)"),
+        ]
+
+        untagged = content_filter.filter({"channel_id": "chan1"}, entries)
+        tagged = content_filter.filter(
+            {"channel_id": "chan1", "tags": ["MUSIC"]}, entries
+        )
+
+        assert [e.video_id for e in untagged] == ["vid1", "vid3"]
+        assert [e.video_id for e in tagged] == ["vid1"]
+
+    def test_min_age(self, content_filter: ContentFilter) -> None:
+        entries = [
+            entry("new", "Premiere", age=timedelta(minutes=5)),
+            entry("old", "Video", age=timedelta(hours=2)),
+        ]
+
+        kept = content_filter.filter({"channel_id": "chan2"}, entries)
+
+        assert [e.video_id for e in kept] == ["old"]
+
+    def test_limit_keeps_newest(self, content_filter: ContentFilter) -> None:
+        videos = [{"video_id": f"vid{i}"} for i in range(5)]
+        row = {"channel_id": "chan2", "tags": ["MUSIC"]}
+
+        assert content_filter.limit(row, videos) == videos[:1]
+        assert content_filter.limit({"channel_id": "chan1"}, videos) == videos
+
+    def test_patterns_kept_apart(self, tmp_path: Path) -> None:
+        path = tmp_path / "rules.json"
+        path.write_text(
+            json.dumps(
+                {
+                    "default": {"exclude_patterns": ["(?P<live>live)", "(a)b"]},
+                    "tags": {
+                        "MUSIC": {"exclude_patterns": ["(?P<live>stream)", r"(x)\1"]}
+                    },
+                }
+            )
+        )
+        content_filter = ContentFilter(str(path))
+        entries = [
+            entry("vid1", "Live now"),
+            entry("vid2", "Stream"),
+            entry("vid3", "xx marks the spot"),
+            entry("vid4", "New song"),
+        ]
+
+        kept = content_filter.filter(
+            {"channel_id": "chan1", "tags": ["MUSIC"]}, entries
+        )
+
+        assert [e.video_id for e in kept] == ["vid4"]
+
+    def test_stats_split_held_and_excluded(self, content_filter: ContentFilter) -> None:
+        entries = [
+            entry("new", "Premiere", age=timedelta(minutes=5)),
+            entry("live", "Live stream", age=timedelta(minutes=5)),
+            entry("old", "Video", age=timedelta(hours=2)),
+        ]
+        stats: Counter[str] = Counter()
+
+        content_filter.filter({"channel_id": "chan2"}, entries, stats)
+
+        assert stats == {"held": 1, "excluded": 1}
+
+    @pytest.mark.parametrize(
+        "rules",
+        [
+            {"default": {"exclude_patterns": ["(unclosed"]}},
+            {"tags": {"MUSIC": {"exclude_patterns": ["ok", "[z-a]"]}}},
+            {"channels": {"chan1": {"exclude_patterns": ["*teaser"]}}},
+        ],
+    )
+    def test_bad_pattern_fails_at_startup(self, tmp_path: Path, rules: dict) -> None:
+        path = tmp_path / "rules.json"
+        path.write_text(json.dumps(rules))
+
+        with pytest.raises(ValueError, match="Invalid exclude pattern"):
+            ContentFilter(str(path))
@@ -0,0 +1,553 @@
+import json
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+import pytest
+import requests
+
+from cytubebot.content_searchers.content_filter import ContentFilter
+from cytubebot.content_searchers.content_finder import ContentFinder, _get_parse_pool
+from cytubebot.content_searchers.shorts_classifier import ShortsClassifier
+
+# The fixture stubs out the Shorts checks, some tests need the real thing.
+classify = ShortsClassifier.classify
+
+
+def make_feed(entries: List[Dict[str, str]]) -> str:
+    items = "".join(f"""
+        <entry>
+            <yt:videoId>{entry["video_id"]}</yt:videoId>
+            <title>{entry["title"]}</title>
+            <published>{entry["published"]}</published>
+        </entry>""" for entry in entries)
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+    <feed xmlns:yt="http://www.youtube.com/xml/schemas/2015"
+          xmlns="http://www.w3.org/2005/Atom">{items}
+    </feed>"""
+
+
+class FakeResponse:
+    def __init__(
+        self,
+        text: str,
+        status_code: int = 200,
+        headers: Dict[str, str] | None = None,
+    ) -> None:
+        self.text: str = text
+        self.content: bytes = text.encode()
+        self.status_code: int = status_code
+        self.headers: Dict[str, str] = headers or {}
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error", response=self)
+
+
+class FakeDB:
+    def __init__(self, channels: List[Dict[str, Any]]) -> None:
+        self._channels = channels
+        self.validators: Dict[str, Dict[str, str]] = {}
+        self.pending: List[Dict[str, Any]] | None = None
+        self.failures: Dict[str, Dict] = {}
+        self.runs: List[Dict] = []
+        self.run_channels: Dict[str, Dict[str, Dict]] = {}
+        self.journal: List[Dict[str, Any]] = []
+        self.scans = 0
+
+    def get_channels(self, tag: str | None = None) -> List[Dict[str, Any]]:
+        return self._channels
+
+    def iter_channels(
+        self,
+        tag: str | None = None,
+        fields: Tuple[str, ...] | None = None,
+        page_size: int = 2,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        self.scans += 1
+        channels = self.get_channels(tag)
+        for start in range(0, len(channels), page_size):
+            yield channels[start : start + page_size]
+
+    def get_channels_by_id(
+        self, channel_ids: List[str], fields: Tuple[str, ...] | None = None
+    ) -> Dict[str, Dict[str, Any]]:
+        return {
+            row["channel_id"]: {field: row[field] for field in fields or row}
+            for row in self._channels
+            if row["channel_id"] in channel_ids
+        }
+
+    def pop_pending_content(self, tag: str | None) -> List[Dict[str, Any]] | None:
+        pending, self.pending = self.pending, None
+        return pending
+
+    def get_short_verdict(self, video_id: str) -> bool | None:
+        return None
+
+    def set_short_verdict(self, video_id: str, is_short: bool, ttl: int) -> None:
+        pass
+
+    def get_feed_validators(self, channel_id: str) -> Dict[str, str]:
+        return self.validators.get(channel_id, {})
+
+    def set_feed_validators(self, channel_id: str, validators: Dict) -> None:
+        self.validators[channel_id] = {k: v for k, v in validators.items() if v}
+
+    def get_channel_failures(
+        self, channel_ids: List[str] | None = None
+    ) -> Dict[str, Dict]:
+        return {
+            channel_id: failure
+            for channel_id, failure in self.failures.items()
+            if channel_ids is None or channel_id in channel_ids
+        }
+
+    def set_channel_failures(self, failures: Dict[str, Dict]) -> None:
+        self.failures.update(failures)
+
+    def clear_channel_failures(self, channel_ids: List[str]) -> None:
+        for channel_id in channel_ids:
+            self.failures.pop(channel_id, None)
+
+    def push_journal(self, content: List[Dict[str, Any]]) -> None:
+        self.journal.extend(content)
+
+    def add_discovery_run(
+        self, run: Dict, channels: Dict[str, Dict], max_runs: int, ttl: int
+    ) -> None:
+        self.runs.insert(0, run)
+        self.run_channels[run["id"]] = channels
+
+
+@pytest.fixture
+def feeds() -> Dict[str, str]:
+    return {
+        "chan1": make_feed(
+            [
+                {
+                    "video_id": "vid3",
+                    "title": "Third",
+                    "published": "2025-01-03T00:00:00+00:00",
+                },
+                {
+                    "video_id": "vid1",
+                    "title": "First",
+                    "published": "2025-01-01T00:00:00+00:00",
+                },
+            ]
+        ),
+        "chan2": make_feed(
+            [
+                {
+                    "video_id": "vid2",
+                    "title": "Second",
+                    "published": "2025-01-02T00:00:00+00:00",
+                },
+                {
+                    "video_id": "old",
+                    "title": "Old",
+                    "published": "2024-12-01T00:00:00+00:00",
+                },
+            ]
+        ),
+    }
+
+
+@pytest.fixture
+def finder(monkeypatch: pytest.MonkeyPatch, feeds: Dict[str, str]) -> ContentFinder:
+    def fake_get(url: str, headers: Dict[str, str], timeout: int) -> FakeResponse:
+        channel_id = url.rsplit("=", 1)[-1]
+        if channel_id not in feeds:
+            return FakeResponse("Not Found", status_code=404)
+        etag = f'"{channel_id}-etag"'
+        if headers.get("If-None-Match") == etag:
+            return FakeResponse("", status_code=304)
+        return FakeResponse(feeds[channel_id], headers={"ETag": etag})
+
+    monkeypatch.setattr(requests, "get", fake_get)
+    monkeypatch.setattr(
+        ShortsClassifier,
+        "classify",
+        lambda self, videos, stats=None: {
+            video_id: "#shorts" in t for video_id, t in videos.items()
+        },
+    )
+    finder = ContentFinder(workers=4)
+    # The guard is process wide, don't let one test's failures throttle the next.
+    monkeypatch.setattr(finder._guard, "_breakers", {})
+    monkeypatch.setattr(finder._guard, "_limiters", {})
+    finder._health._db = FakeDB([])
+    finder._stats._db = FakeDB([])
+    return finder
+
+
+def channel(channel_id: str, last_update: str) -> Dict[str, str]:
+    return {
+        "channel_id": channel_id,
+        "channel_name": f"{channel_id} name",
+        "last_update": last_update,
+    }
+
+
+class TestContentFinder:
+    def test_find_content_sorted_across_channels(self, finder: ContentFinder) -> None:
+        finder._db = FakeDB(
+            [
+                channel("chan1", "2024-12-31T00:00:00+00:00"),
+                channel("chan2", "2024-12-31T00:00:00+00:00"),
+            ]
+        )
+        content = finder.find_content()
+
+        assert [c["video_id"] for c in content] == ["vid1", "vid2", "vid3"]
+        assert content[0]["channel_id"] == "chan1"
+        assert content[0]["datetime"] == datetime.fromisoformat(
+            "2025-01-01T00:00:00+00:00"
+        )
+        assert finder.failed_channels == []
+
+    def test_find_content_sorted_across_pages(
+        self, finder: ContentFinder, feeds: Dict[str, str]
+    ) -> None:
+        feeds["chan3"] = make_feed(
+            [
+                {
+                    "video_id": "vid0",
+                    "title": "Zeroth",
+                    "published": "2024-12-31T12:00:00+00:00",
+                }
+            ]
+        )
+        # The fake DB pages two channels at a time.
+        finder._db = FakeDB(
+            [
+                channel("chan1", "2024-12-31T00:00:00+00:00"),
+                channel("chan2", "2024-12-31T00:00:00+00:00"),
+                channel("chan3", "2024-12-31T00:00:00+00:00"),
+            ]
+        )
+        content = finder.find_content()
+
+        assert [c["video_id"] for c in content] == ["vid0", "vid1", "vid2", "vid3"]
+
+    def test_find_content_stops_at_last_update(self, finder: ContentFinder) -> None:
+        finder._db = FakeDB([channel("chan1", "2025-01-01T00:00:00+00:00")])
+        content = finder.find_content()
+
+        assert [c["video_id"] for c in content] == ["vid3"]
+
+    def test_find_content_reports_failed_channels(self, finder: ContentFinder) -> None:
+        finder._db = FakeDB(
+            [
+                channel("missing", "2024-12-31T00:00:00+00:00"),
+                channel("chan2", "2024-12-31T00:00:00+00:00"),
+            ]
+        )
+        content = finder.find_content()
+
+        assert [c["video_id"] for c in content] == ["vid2"]
+        assert finder.failed_channels == ["missing name"]
+        assert list(finder._health._db.failures) == ["missing"]
+
+        stats = finder._stats._db
+        run = stats.runs[0]
+        assert (run["channels"], run["checked"], run["failed"]) == (2, 2, 1)
+        assert run["videos"] == 1
+        assert run["latency"]["feed"]["count"] >= 2
+        records = stats.run_channels[run["id"]]
+        assert records["missing"]["error"] == "HTTP 404"
+        assert records["chan2"]["status"] == 200
+        assert (records["chan2"]["entries"], records["chan2"]["new"]) == (1, 1)
+
+    def test_find_content_skips_failing_channels(self, finder: ContentFinder) -> None:
+        finder._db = FakeDB(
+            [
+                channel("missing", "2024-12-31T00:00:00+00:00"),
+                channel("chan2", "2024-12-31T00:00:00+00:00"),
+            ]
+        )
+        finder.find_content()
+        finder.find_content()
+
+        assert finder.failed_channels == []
+        assert finder._health._db.failures["missing"]["count"] == 1
+
+    def test_find_content_counts_only_channel_errors(
+        self, monkeypatch: pytest.MonkeyPatch, finder: ContentFinder
+    ) -> None:
+        responses = {
+            "limited": FakeResponse("", status_code=429),
+            "down": FakeResponse("", status_code=503),
+            "gone": FakeResponse("", status_code=410),
+            "broken": FakeResponse("<feed><entry>"),
+        }
+
+        def fake_get(url: str, headers: Dict[str, str], timeout: int) -> FakeResponse:
+            channel_id = url.rsplit("=", 1)[-1]
+            if channel_id == "timeout":
+                raise requests.Timeout("timed out")
+            return responses[channel_id]
+
+        monkeypatch.setattr(requests, "get", fake_get)
+        finder._db = FakeDB(
+            [
+                channel(channel_id, "2024-12-31T00:00:00+00:00")
+                for channel_id in ["limited", "down", "timeout", "gone", "broken"]
+            ]
+        )
+        finder.find_content()
+
+        assert len(finder.failed_channels) == 5
+        assert sorted(finder._health._db.failures) == ["broken", "gone"]
+
+    def test_find_content_counts_server_errors_on_healthy_host(
+        self, monkeypatch: pytest.MonkeyPatch, finder: ContentFinder
+    ) -> None:
+        fake_get = requests.get
+
+        def broken_get(url: str, headers: Dict[str, str], timeout: int) -> FakeResponse:
+            if url.endswith("=broken"):
+                return FakeResponse("", status_code=500)
+            return fake_get(url, headers=headers, timeout=timeout)
+
+        monkeypatch.setattr(requests, "get", broken_get)
+        finder._db = FakeDB(
+            [
+                channel("broken", "2024-12-31T00:00:00+00:00"),
+                channel("chan1", "2024-12-31T00:00:00+00:00"),
+            ]
+        )
+        finder.find_content()
+
+        assert finder._health._db.failures["broken"]["error"] == "HTTP 500"
+
+    def test_find_content_conditional_get(self, finder: ContentFinder) -> None:
+        db = FakeDB([channel("chan1", "2025-01-03T00:00:00+00:00")])
+        finder._db = db
+
+        assert finder.find_content() == []
+        assert db.validators["chan1"] == {"etag": '"chan1-etag"'}
+        assert finder.feed_responses[200] == 1
+
+        assert finder.find_content() == []
+        assert finder.feed_responses[304] == 1
+        assert finder.feed_responses[200] == 0
+
+    def test_find_content_no_validators_with_new_content(
+        self, finder: ContentFinder
+    ) -> None:
+        db = FakeDB([channel("chan1", "2024-12-31T00:00:00+00:00")])
+        db.validators["chan1"] = {"etag": '"stale"'}
+        finder._db = db
+
+        assert len(finder.find_content()) == 2
+        assert db.validators["chan1"] == {}
+
+    def test_find_content_refetches_after_failed_shorts_check(
+        self, monkeypatch: pytest.MonkeyPatch, finder: ContentFinder
+    ) -> None:
+        def failing_head(self: requests.Session, url: str, **kwargs: Any) -> None:
+            raise requests.ConnectionError("HEAD failed")
+
+        monkeypatch.setattr(ShortsClassifier, "classify", classify)
+        monkeypatch.setattr(requests.Session, "head", failing_head)
+        db = FakeDB([channel("chan1", "2025-01-02T00:00:00+00:00")])
+        finder._db = db
+        finder._shorts_classifier.cache._db = db
+
+        assert finder.find_content() == []
+        assert db.validators["chan1"] == {}
+        assert finder.channel_stats["chan1"]["shorts_unresolved"] == 1
+
+        # vid3 is still unsettled, so the feed mustn't be cached away.
+        finder.find_content()
+        assert finder.feed_responses == {200: 1}
+
+    def test_take_pending_content(self, finder: ContentFinder) -> None:
+        db = FakeDB([channel("chan1", "2025-01-02T00:00:00+00:00")])
+        finder._db = db
+        assert finder.take_pending_content() is None
+
+        db.pending = [
+            {
+                "channel_id": "chan1",
+                "datetime": datetime.fromisoformat(published),
+                "video_id": video_id,
+            }
+            for video_id, published in [
+                ("vid1", "2025-01-01T00:00:00+00:00"),
+                ("vid3", "2025-01-03T00:00:00+00:00"),
+            ]
+        ]
+        db.pending.append({**db.pending[0], "channel_id": "removed"})
+
+        # Videos added since the list was computed, or from removed channels, are dropped.
+        pending = finder.take_pending_content()
+        assert pending is not None
+        assert [video["video_id"] for video in pending] == ["vid3"]
+        assert db.scans == 0
+
+    def test_iter_content_yields_before_slow_feeds(
+        self, monkeypatch: pytest.MonkeyPatch, finder: ContentFinder
+    ) -> None:
+        """vid1 is older than chan2's last_update, so it can't wait on chan2's feed."""
+        release = threading.Event()
+        fake_get = requests.get
+
+        def slow_get(url: str, headers: Dict[str, str], timeout: int) -> FakeResponse:
+            if url.endswith("chan2"):
+                assert release.wait(timeout=5)
+            return fake_get(url, headers=headers, timeout=timeout)
+
+        monkeypatch.setattr(requests, "get", slow_get)
+        finder._db = FakeDB(
+            [
+                channel("chan2", "2025-01-01T12:00:00+00:00"),
+                channel("chan1", "2024-12-31T00:00:00+00:00"),
+            ]
+        )
+        content = finder.iter_content()
+
+        assert next(content)["video_id"] == "vid1"
+        release.set()
+        assert [c["video_id"] for c in content] == ["vid2", "vid3"]
+
+    def test_iter_content_journals_as_found(self, finder: ContentFinder) -> None:
+        finder._db = FakeDB(
+            [
+                channel("chan1", "2024-12-31T00:00:00+00:00"),
+                channel("chan2", "2024-12-31T00:00:00+00:00"),
+            ]
+        )
+        content = finder.iter_content(journal=True)
+
+        # Journaled by discovery before it reaches the consumer.
+        assert next(content)["video_id"] == "vid1"
+        assert finder._db.journal[0]["video_id"] == "vid1"
+        assert [video["video_id"] for video in content] == ["vid2", "vid3"]
+        assert [video["video_id"] for video in finder._db.journal] == [
+            "vid1",
+            "vid2",
+            "vid3",
+        ]
+
+        finder._db.journal = []
+        finder.find_content()
+        assert finder._db.journal == []
+
+    def test_find_content_within_deadline(
+        self, monkeypatch: pytest.MonkeyPatch, finder: ContentFinder
+    ) -> None:
+        release = threading.Event()
+        fake_get = requests.get
+
+        def slow_get(url: str, headers: Dict[str, str], timeout: int) -> FakeResponse:
+            if url.endswith("chan2"):
+                release.wait(timeout=5)
+                # Abandoned, mustn't reach the Shorts checks of later tests.
+                return FakeResponse("Unavailable", status_code=503)
+            return fake_get(url, headers=headers, timeout=timeout)
+
+        monkeypatch.setattr(requests, "get", slow_get)
+        finder._db = FakeDB(
+            [
+                channel("chan1", "2024-12-31T00:00:00+00:00"),
+                channel("chan2", "2024-12-31T00:00:00+00:00"),
+            ]
+        )
+        try:
+            content = finder.find_content(within=1)
+        finally:
+            release.set()
+
+        assert [c["video_id"] for c in content] == ["vid1", "vid3"]
+        assert finder.unreached_channels == ["chan2 name"]
+        assert finder.scan_complete
+
+    def test_find_content_deadline_before_scan_finished(
+        self, monkeypatch: pytest.MonkeyPatch, finder: ContentFinder
+    ) -> None:
+        release = threading.Event()
+
+        def slow_get(url: str, headers: Dict[str, str], timeout: int) -> FakeResponse:
+            release.wait(timeout=5)
+            return FakeResponse("Unavailable", status_code=503)
+
+        monkeypatch.setattr(requests, "get", slow_get)
+        # Read two channels per page, so the later pages are never read.
+        finder._db = FakeDB(
+            [channel(f"chan{i}", "2024-12-31T00:00:00+00:00") for i in range(1, 7)]
+        )
+        try:
+            content = finder.find_content(within=0)
+        finally:
+            release.set()
+
+        assert content == []
+        assert finder.unreached_channels == ["chan1 name", "chan2 name"]
+        assert not finder.scan_complete
+        assert finder._stats._db.runs[0]["scan_complete"] is False
+
+    def test_find_content_filters_before_shorts_check(
+        self, monkeypatch: pytest.MonkeyPatch, finder: ContentFinder, tmp_path: Path
+    ) -> None:
+        checked: List[str] = []
+        monkeypatch.setattr(
+            ShortsClassifier,
+            "classify",
+            lambda self, videos, stats=None: {
+                video_id: checked.append(video_id) or False for video_id in videos
+            },
+        )
+        rules = tmp_path / "rules.json"
+        rules.write_text(json.dumps({"default": {"exclude_keywords": ["third"]}}))
+        finder._filter = ContentFilter(str(rules))
+        finder._db = FakeDB([channel("chan1", "2024-12-31T00:00:00+00:00")])
+
+        content = finder.find_content()
+
+        assert [c["video_id"] for c in content] == ["vid1"]
+        assert checked == ["vid1"]
+
+    def test_find_content_caches_feed_with_only_excluded_videos(
+        self, finder: ContentFinder, tmp_path: Path
+    ) -> None:
+        rules = tmp_path / "rules.json"
+        rules.write_text(json.dumps({"default": {"exclude_keywords": ["third"]}}))
+        finder._filter = ContentFilter(str(rules))
+        db = FakeDB([channel("chan1", "2025-01-02T00:00:00+00:00")])
+        finder._db = db
+
+        assert finder.find_content() == []
+        assert db.validators["chan1"] == {"etag": '"chan1-etag"'}
+
+    def test_find_content_parse_processes(self, finder: ContentFinder) -> None:
+        finder._parse_processes = 2
+        finder._db = FakeDB(
+            [
+                channel("chan1", "2024-12-31T00:00:00+00:00"),
+                channel("chan2", "2024-12-31T00:00:00+00:00"),
+            ]
+        )
+        content = finder.find_content()
+
+        assert [c["video_id"] for c in content] == ["vid1", "vid2", "vid3"]
+
+    def test_find_content_replaces_broken_parse_pool(
+        self, finder: ContentFinder
+    ) -> None:
+        pool = _get_parse_pool(1)
+        with pytest.raises(BrokenProcessPool):
+            pool.submit(os._exit, 1).result()
+
+        finder._parse_processes = 1
+        finder._db = FakeDB([channel("chan1", "2024-12-31T00:00:00+00:00")])
+        content = finder.find_content()
+
+        assert [c["video_id"] for c in content] == ["vid1", "vid3"]
+        assert _get_parse_pool(1) is not pool
+        assert _get_parse_pool(2) is not _get_parse_pool(1)
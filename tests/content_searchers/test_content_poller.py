@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from cytubebot.content_searchers.content_poller import ContentPoller
+
+
+class FakeDB:
+    def __init__(self) -> None:
+        self.pending: Dict[str | None, List[Dict]] = {}
+
+    def merge_pending_content(
+        self, tag: str | None, content: List[Dict], max_age: int
+    ) -> int:
+        pending = self.pending.setdefault(tag, [])
+        ids = {video["video_id"] for video in pending}
+        new = [video for video in content if video["video_id"] not in ids]
+        pending.extend(new)
+        return len(new)
+
+
+class FakeContentFinder:
+    def __init__(self, runs: List[List[Dict]]) -> None:
+        self._runs = runs
+
+    def find_content(self, tag: str | None = None) -> List[Dict]:
+        return self._runs.pop(0)
+
+
+def video(video_id: str) -> Dict:
+    return {
+        "channel_id": "chan1",
+        "datetime": datetime(2025, 1, 1, tzinfo=timezone.utc),
+        "video_id": video_id,
+    }
+
+
+class TestContentPoller:
+    def test_poll_keeps_videos_from_skipped_channels(self) -> None:
+        poller = ContentPoller(interval=900, jitter=60, tags=["ALL"])
+        poller._db = FakeDB()
+        # The second poll skips the channel vid1 came from as it isn't due.
+        poller._content_finder = FakeContentFinder(
+            [[video("vid1")], [video("vid2")], [video("vid2")]]
+        )
+
+        poller.poll()
+        poller.poll()
+        poller.poll()
+
+        assert [v["video_id"] for v in poller._db.pending[None]] == ["vid1", "vid2"]
@@ -0,0 +1,85 @@
+from typing import Dict, List
+
+import pytest
+
+from cytubebot.content_searchers.discovery_stats import DiscoveryStats
+
+
+class FakeDB:
+    def __init__(self) -> None:
+        self.runs: List[Dict] = []
+        self.run_channels: Dict[str, Dict[str, Dict]] = {}
+
+    def add_discovery_run(
+        self, run: Dict, channels: Dict[str, Dict], max_runs: int, ttl: int
+    ) -> None:
+        self.runs = [run, *self.runs][:max_runs]
+        self.run_channels[run["id"]] = channels
+
+    def get_discovery_runs(self, count: int) -> List[Dict]:
+        return self.runs[:count]
+
+    def get_discovery_run_channels(self, run_id: str) -> Dict[str, Dict]:
+        return self.run_channels.get(run_id, {})
+
+
+def run(run_id: str) -> Dict:
+    return {
+        "id": run_id,
+        "duration": 12.5,
+        "channels": 3,
+        "checked": 2,
+        "fetch": 20.0,
+        "shorts": 1.5,
+        "not_modified": 1,
+        "failed": 0,
+        "videos": 4,
+    }
+
+
+@pytest.fixture
+def stats() -> DiscoveryStats:
+    stats = DiscoveryStats(retention_runs=2)
+    stats._db = FakeDB()
+    stats.record(
+        run("1"),
+        {
+            "fast": {"name": "Fast", "fetch": 1.0, "bytes": 100},
+            "slow": {"name": "Slow", "fetch": 9.0, "bytes": 900},
+        },
+    )
+    stats.record(
+        run("2"),
+        {
+            "fast": {"name": "Fast", "fetch": 3.0, "bytes": 100},
+            "slow": {"name": "Slow", "fetch": 5.0, "error": "ReadTimeout"},
+        },
+    )
+    return stats
+
+
+class TestDiscoveryStats:
+    def test_slowest_channels(self, stats: DiscoveryStats) -> None:
+        slowest = stats.slowest_channels()
+
+        assert [total["channel_id"] for total in slowest] == ["slow", "fast"]
+        assert slowest[0]["fetch"] == 7.0
+        assert slowest[0]["errors"] == 1
+
+    def test_retention(self, stats: DiscoveryStats) -> None:
+        stats.record(run("3"), {})
+
+        assert [run["id"] for run in stats.dump()["runs"]] == ["3", "2"]
+
+    def test_report(self, stats: DiscoveryStats) -> None:
+        assert stats.report() == (
+            "Last run: 2 of 3 channels in 12.5s (fetching 20.0s, Shorts checks "
+            "1.5s in total), 1 unchanged, 0 failed, 4 new videos. "
+            "Slowest: Slow 7.0s, Fast 2.0s"
+        )
+
+    def test_report_no_runs(self) -> None:
+        stats = DiscoveryStats()
+        stats._db = FakeDB()
+
+        assert stats.report() == "No discovery runs recorded yet."
@@ -0,0 +1,187 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Tuple
+
+import pytest
+
+from cytubebot.content_searchers.discovery_worker import DiscoveryWorker, shard_of
+
+
+class FakeDB:
+    """
+    The lease operations of DatabaseWrapper, with a clock the test controls.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.workers: Dict[str, float] = {}
+        # Shard -> (worker ID, expiry).
+        self.leases: Dict[int, tuple] = {}
+        self.runs: Dict[int, float] = {}
+        self.discovered: List[Dict] = []
+        self.markers: List[str | None] = []
+        self.channels = [
+            {"channel_id": f"chan{i}", "last_update": "", "tags": ["MUSIC"]}
+            for i in range(20)
+        ]
+
+    def register_worker(self, worker_id: str, ttl: int) -> int:
+        self.workers[worker_id] = self.now
+        self.workers = {
+            worker: beat
+            for worker, beat in self.workers.items()
+            if beat > self.now - ttl
+        }
+        return len(self.workers)
+
+    def _holder(self, shard: int) -> str | None:
+        holder, expires = self.leases.get(shard, (None, 0))
+        return holder if expires > self.now else None
+
+    def acquire_shard(self, shard: int, worker_id: str, ttl: int) -> bool:
+        if self._holder(shard) is not None:
+            return False
+        self.leases[shard] = (worker_id, self.now + ttl)
+        return True
+
+    def renew_shard(self, shard: int, worker_id: str, ttl: int) -> bool:
+        if self._holder(shard) != worker_id:
+            return False
+        self.leases[shard] = (worker_id, self.now + ttl)
+        return True
+
+    def release_shard(self, shard: int, worker_id: str) -> None:
+        if self._holder(shard) == worker_id:
+            del self.leases[shard]
+
+    def get_shard_run(self, shard: int) -> float | None:
+        return self.runs.get(shard)
+
+    def set_shard_run(self, shard: int, timestamp: float) -> None:
+        self.runs[shard] = timestamp
+
+    def get_channels(self, tag: str | None = None) -> List[Dict[str, Any]]:
+        return self.channels
+
+    def iter_channels(
+        self,
+        tag: str | None = None,
+        fields: Tuple[str, ...] | None = None,
+        page_size: int = 2,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        channels = self.get_channels(tag)
+        for start in range(0, len(channels), page_size):
+            yield channels[start : start + page_size]
+
+    def add_discovered_content(self, content: List[Dict], max_age: int) -> int:
+        self.discovered.extend(content)
+        return len(content)
+
+    def add_pending_content(
+        self, tag: str | None, content: List[Dict], max_age: int
+    ) -> None:
+        self.markers.append(tag)
+
+
+class FakeContentFinder:
+    def __init__(self) -> None:
+        self.checked: List[str] = []
+
+    def find_content(
+        self, tag: str | None = None, channels: List[Dict] | None = None
+    ) -> List[Dict]:
+        assert channels is not None
+        self.checked.extend(row["channel_id"] for row in channels)
+        return [
+            {
+                "channel_id": row["channel_id"],
+                "datetime": datetime(2025, 1, 1, tzinfo=timezone.utc),
+                "video_id": f"{row['channel_id']}-vid",
+            }
+            for row in channels
+        ]
+
+
+@pytest.fixture
+def db() -> FakeDB:
+    return FakeDB()
+
+
+def make_worker(db: FakeDB, worker_id: str) -> DiscoveryWorker:
+    worker = DiscoveryWorker(shards=4, interval=600, lease_ttl=60)
+    worker._db = db
+    worker._content_finder = FakeContentFinder()
+    worker.worker_id = worker_id
+    return worker
+
+
+class TestDiscoveryWorker:
+    def test_shards_split_between_workers(self, db: FakeDB) -> None:
+        first = make_worker(db, "first")
+        second = make_worker(db, "second")
+
+        first.rebalance()
+        assert first.shards == {0, 1, 2, 3}
+
+        # The second worker waits for the first to hand some shards back.
+        second.rebalance()
+        first.rebalance()
+        second.rebalance()
+        assert len(first.shards) == len(second.shards) == 2
+        assert first.shards | second.shards == {0, 1, 2, 3}
+
+    def test_dead_worker_shards_released(self, db: FakeDB) -> None:
+        first = make_worker(db, "first")
+        second = make_worker(db, "second")
+        second.rebalance()
+        first.rebalance()
+        second.rebalance()
+        first.rebalance()
+
+        # The second worker stops heartbeating.
+        db.now += 61
+        first.rebalance()
+        assert first.shards == {0, 1, 2, 3}
+
+        second.rebalance()
+        assert second.shards == set()
+
+    def test_stop_releases_shards(self, db: FakeDB) -> None:
+        worker = make_worker(db, "first")
+        worker.rebalance()
+        worker.stop()
+
+        assert db.leases == {}
+
+    def test_discover_only_checks_shard(self, db: FakeDB) -> None:
+        worker = make_worker(db, "first")
+        worker.discover(2)
+
+        checked = worker._content_finder.checked
+        assert checked
+        assert all(shard_of(channel_id, 4) == 2 for channel_id in checked)
+        assert len(db.discovered) == len(checked)
+        assert set(db.markers) == {None, "MUSIC"}
+        assert 2 in db.runs
+
+    def test_discover_scans_once_for_all_shards(
+        self, monkeypatch: pytest.MonkeyPatch, db: FakeDB
+    ) -> None:
+        scans = []
+        iter_channels = db.iter_channels
+
+        def counting_iter_channels(*args: Any, **kwargs: Any) -> Iterator:
+            scans.append(args)
+            return iter_channels(*args, **kwargs)
+
+        monkeypatch.setattr(db, "iter_channels", counting_iter_channels)
+        worker = make_worker(db, "first")
+        worker.discover(1, 3)
+
+        checked = worker._content_finder.checked
+        assert len(scans) == 1
+        assert {shard_of(channel_id, 4) for channel_id in checked} == {1, 3}
+        assert {1, 3} == set(db.runs)
+
+    def test_shard_of_is_stable(self) -> None:
+        assert shard_of("UC123", 16) == shard_of("UC123", 16)
+        assert {shard_of(f"chan{i}", 4) for i in range(100)} == {0, 1, 2, 3}
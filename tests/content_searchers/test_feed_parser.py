@@ -0,0 +1,53 @@
+from datetime import datetime
+
+import pytest
+
+from cytubebot.content_searchers.feed_parser import FeedEntry, iter_entries
+
+FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015"
+      xmlns="http://www.w3.org/2005/Atom">
+    <title>Channel title</title>
+    <published>2020-01-01T00:00:00+00:00</published>
+    <entry>
+        <yt:videoId>vid2</yt:videoId>
+        <title>Second #Shorts</title>
+        <published>2025-01-02T00:00:00+00:00</published>
+    </entry>
+    <entry>
+        <yt:videoId>vid1</yt:videoId>
+        <title>First</title>
+        <published>2025-01-01T00:00:00+00:00</published>
+    </entry>
+    <entry>
+        <this is not valid xml
+"""
+
+
+class TestFeedParser:
+    def test_iter_entries_stops_at_since(self) -> None:
+        """Parsing stops at `since`, so the broken trailing entry is never read."""
+        since = datetime.fromisoformat("2025-01-01T00:00:00+00:00")
+        entries = list(iter_entries(FEED, since=since))
+
+        assert entries == [
+            FeedEntry(
+                "vid2",
+                "Second #Shorts",
+                datetime.fromisoformat("2025-01-02T00:00:00+00:00"),
+            )
+        ]
+
+    def test_iter_entries_is_lazy(self) -> None:
+        entries = iter_entries(FEED)
+
+        assert next(entries).video_id == "vid2"
+        assert next(entries).video_id == "vid1"
+
+    def test_iter_entries_missing_fields(self) -> None:
+        feed = b"""<feed xmlns="http://www.w3.org/2005/Atom">
+            <entry><title>No ID</title></entry>
+        </feed>"""
+
+        with pytest.raises(ValueError):
+            list(iter_entries(feed))
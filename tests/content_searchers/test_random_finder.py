@@ -11,6 +11,7 @@ from cytubebot.content_searchers.random_finder import RandomFinder
 class FakeResponse:
     def __init__(self, text: str) -> None:
         self.text: str = text
+        self.status_code: int = 200
 
 
 class FakeFile:
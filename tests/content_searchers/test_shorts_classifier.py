@@ -0,0 +1,87 @@
+from collections import Counter
+from typing import Any, Dict, List
+
+import pytest
+import requests
+
+from cytubebot.content_searchers.shorts_classifier import ShortsClassifier
+
+
+class FakeResponse:
+    def __init__(self, status_code: int) -> None:
+        self.status_code: int = status_code
+
+
+class FakeDB:
+    def __init__(self) -> None:
+        self.verdicts: Dict[str, bool] = {}
+
+    def get_short_verdict(self, video_id: str) -> bool | None:
+        return self.verdicts.get(video_id)
+
+    def set_short_verdict(self, video_id: str, is_short: bool, ttl: int) -> None:
+        self.verdicts[video_id] = is_short
+
+
+@pytest.fixture
+def head_calls(monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    """Every video ID starting with "short" is a Shorts video, 'error' is a 500."""
+    calls: List[str] = []
+
+    def fake_head(self: requests.Session, url: str, **kwargs: Any) -> FakeResponse:
+        calls.append(url)
+        video_id = url.rsplit("/", 1)[-1]
+        if video_id == "error":
+            return FakeResponse(500)
+        return FakeResponse(200 if video_id.startswith("short") else 303)
+
+    monkeypatch.setattr(requests.Session, "head", fake_head)
+    return calls
+
+
+def make_classifier(db: FakeDB) -> ShortsClassifier:
+    classifier = ShortsClassifier(concurrency=4)
+    classifier.cache._db = db
+    return classifier
+
+
+class TestShortsClassifier:
+    def test_classify(self, head_calls: List[str]) -> None:
+        db = FakeDB()
+        classifier = make_classifier(db)
+
+        stats: Counter[str] = Counter()
+        verdicts = classifier.classify(
+            {
+                "vid1": "a video",
+                "short1": "a short",
+                "tagged": "a short #shorts",
+                "error": "unknown",
+            },
+            stats,
+        )
+
+        assert verdicts == {
+            "vid1": False,
+            "short1": True,
+            "tagged": True,
+            "error": True,
+        }
+        assert len(head_calls) == 3
+        assert stats == {"checked": 3, "unresolved": 1}
+        # Only definitive answers are cached.
+        assert db.verdicts == {"vid1": False, "short1": True}
+
+    def test_classify_uses_cache(self, head_calls: List[str]) -> None:
+        db = FakeDB()
+        classifier = make_classifier(db)
+
+        classifier.classify({"vid1": "a video"})
+        assert classifier.classify({"vid1": "a video"}) == {"vid1": False}
+        assert len(head_calls) == 1
+        assert (classifier.cache.hits, classifier.cache.misses) == (1, 1)
+
+        # A fresh classifier has an empty LRU but still finds the verdict in Redis.
+        other = make_classifier(db)
+        assert other.classify({"vid1": "a video"}) == {"vid1": False}
+        assert len(head_calls) == 1
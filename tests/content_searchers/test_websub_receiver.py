@@ -0,0 +1,231 @@
+import hashlib
+import hmac
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict, Iterator, List, Tuple
+from urllib.parse import parse_qs
+
+import pytest
+import requests
+
+from cytubebot.content_searchers.shorts_classifier import ShortsClassifier
+from cytubebot.content_searchers.websub_receiver import WebSubReceiver
+
+SECRET = "secret"
+NOTIFICATION = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015"
+      xmlns="http://www.w3.org/2005/Atom">
+    <entry>
+        <yt:videoId>vid2</yt:videoId>
+        <yt:channelId>chan1</yt:channelId>
+        <title>New upload</title>
+        <published>2025-01-02T00:00:00+00:00</published>
+    </entry>
+</feed>"""
+
+
+class FakeDB:
+    def __init__(self) -> None:
+        self.channels: Dict[str, Dict[str, Any]] = {
+            "chan1": {
+                "channel_id": "chan1",
+                "channel_name": "Channel 1",
+                "last_update": "2025-01-01T00:00:00+00:00",
+                "tags": ["MUSIC"],
+            }
+        }
+        self.pending: Dict[str | None, List[Dict]] = {}
+
+    def get_channel(self, channel_id: str) -> Dict[str, Any]:
+        return self.channels.get(channel_id, {})
+
+    def get_channels(self, tag: str | None = None) -> List[Dict[str, Any]]:
+        return list(self.channels.values())
+
+    def iter_channels(
+        self,
+        tag: str | None = None,
+        fields: Tuple[str, ...] | None = None,
+        page_size: int = 2,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        channels = self.get_channels(tag)
+        for start in range(0, len(channels), page_size):
+            yield channels[start : start + page_size]
+
+    def add_pending_content(
+        self, tag: str | None, content: List[Dict], max_age: int
+    ) -> None:
+        self.pending.setdefault(tag, []).extend(content)
+
+
+class StandInHub:
+    """
+    A local hub that verifies each subscription request with the subscriber,
+    like the real hub does asynchronously.
+    """
+
+    def __init__(self) -> None:
+        self.verified: List[str] = []
+        hub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                length = int(self.headers["Content-Length"])
+                form = parse_qs(self.rfile.read(length).decode())
+                params = {key: values[0] for key, values in form.items()}
+                resp = requests.get(
+                    params["hub.callback"],
+                    params={
+                        "hub.mode": params["hub.mode"],
+                        "hub.topic": params["hub.topic"],
+                        "hub.challenge": "challenge123",
+                        "hub.lease_seconds": params["hub.lease_seconds"],
+                    },
+                    timeout=5,
+                )
+                if resp.text == "challenge123":
+                    hub.verified.append(params["hub.topic"])
+                self.send_response(202)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = HTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/subscribe"
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def hub() -> Iterator[StandInHub]:
+    hub = StandInHub()
+    yield hub
+    hub.close()
+
+
+@pytest.fixture
+def receiver(
+    monkeypatch: pytest.MonkeyPatch, hub: StandInHub
+) -> Iterator[WebSubReceiver]:
+    monkeypatch.setattr(
+        ShortsClassifier,
+        "classify",
+        lambda self, videos: {video_id: False for video_id in videos},
+    )
+    receiver = WebSubReceiver(
+        callback_url="placeholder",
+        host="127.0.0.1",
+        port=0,
+        hub_url=hub.url,
+        secret=SECRET,
+    )
+    receiver._db = FakeDB()
+    receiver.start(subscribe=False)
+    host, port = receiver.server_address
+    receiver._callback_url = f"http://{host}:{port}/websub"
+    yield receiver
+    receiver.stop()
+
+
+def notify(receiver: WebSubReceiver, body: bytes, secret: str) -> int:
+    signature = hmac.new(secret.encode(), body, hashlib.sha1).hexdigest()
+    resp = requests.post(
+        f"{receiver._callback_url}?channel_id=chan1",
+        data=body,
+        headers={"X-Hub-Signature": f"sha1={signature}"},
+        timeout=5,
+    )
+    return resp.status_code
+
+
+class TestWebSubReceiver:
+    def test_subscription_verified(
+        self, receiver: WebSubReceiver, hub: StandInHub
+    ) -> None:
+        receiver.renew_subscriptions()
+
+        assert hub.verified == [
+            "https://www.youtube.com/feeds/videos.xml?channel_id=chan1"
+        ]
+        assert "chan1" in receiver._leases
+
+    def test_pending_lists_refreshed_once_leased(
+        self, receiver: WebSubReceiver
+    ) -> None:
+        # Verified while subscribing, the lists are trusted from the next pass.
+        receiver.renew_subscriptions()
+        assert receiver._db.pending == {}
+
+        receiver.renew_subscriptions()
+        assert set(receiver._db.pending) == {None, "MUSIC"}
+
+    def test_pending_lists_not_refreshed_without_leases(
+        self, receiver: WebSubReceiver, hub: StandInHub
+    ) -> None:
+        hub.close()
+
+        receiver.renew_subscriptions()
+        receiver.renew_subscriptions()
+
+        assert receiver._leases == {}
+        assert receiver._db.pending == {}
+
+    def test_unknown_topic_refused(
+        self, receiver: WebSubReceiver, hub: StandInHub
+    ) -> None:
+        receiver.subscribe("unknown")
+
+        assert hub.verified == []
+
+    def test_unknown_topic_unsubscribe_refused(
+        self, receiver: WebSubReceiver, hub: StandInHub
+    ) -> None:
+        receiver.subscribe("unknown", mode="unsubscribe")
+
+        assert hub.verified == []
+
+    def test_disabled_without_secret(self, hub: StandInHub) -> None:
+        receiver = WebSubReceiver(
+            callback_url="http://127.0.0.1/websub", port=0, hub_url=hub.url, secret=""
+        )
+        receiver.start(subscribe=False)
+
+        assert not receiver.enabled
+        assert receiver._server is None
+        with pytest.raises(RuntimeError):
+            receiver.subscribe("chan1")
+        assert hub.verified == []
+
+    def test_bad_content_length(self, receiver: WebSubReceiver) -> None:
+        host, port = receiver.server_address
+        with socket.create_connection((host, port), timeout=5) as conn:
+            conn.sendall(
+                b"POST /websub?channel_id=chan1 HTTP/1.1\r\n"
+                b"Host: localhost\r\nContent-Length: nope\r\n\r\n"
+            )
+            status_line = conn.makefile("rb").readline()
+
+        assert status_line.split()[1] == b"400"
+        assert receiver._db.pending == {}
+
+    def test_notification_adds_pending_content(self, receiver: WebSubReceiver) -> None:
+        assert notify(receiver, NOTIFICATION, SECRET) == 204
+
+        pending = receiver._db.pending
+        assert list(pending) == [None, "MUSIC"]
+        assert [video["video_id"] for video in pending[None]] == ["vid2"]
+        assert pending[None] == pending["MUSIC"]
+
+    def test_notification_bad_signature_ignored(self, receiver: WebSubReceiver) -> None:
+        assert notify(receiver, NOTIFICATION, "wrong") == 204
+
+        assert receiver._db.pending == {}